@@ -0,0 +1,69 @@
+"""
+Time from starting a download to receiving its first byte, with and without
+reusing the info dict from fetch_info.
+
+Usage:
+    python -m benchmarks.first_byte URL [URL ...] [--repeat N] [--browser NAME]
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+
+from core.downloader import YtDlpWorker, DownloadCancelled
+
+
+def time_to_first_byte(url, info=None, cookies_browser=None):
+    """Starts a download, returns seconds until the first payload byte arrives."""
+    worker = YtDlpWorker()
+    stop = threading.Event()
+    first_byte = []
+
+    def on_progress(data):
+        if not first_byte and data.get('status') == 'downloading' and data.get('downloaded_bytes'):
+            first_byte.append(time.perf_counter())
+            stop.set()
+
+    worker.progress.connect(on_progress)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        try:
+            worker.run_download(url, {'paths': {'home': tmp}}, cookies_browser,
+                                cancel_event=stop, info=info)
+        except DownloadCancelled:
+            pass
+    if not first_byte:
+        raise RuntimeError(f"No data received for {url}")
+    return first_byte[0] - start
+
+
+def fetch(url, cookies_browser=None):
+    worker = YtDlpWorker()
+    result = []
+    worker.info_ready.connect(result.append)
+    worker.error_occurred.connect(lambda msg: result.append(RuntimeError(msg)))
+    worker.fetch_info(url, cookies_browser, use_cache=False)
+    if isinstance(result[0], Exception):
+        raise result[0]
+    return result[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--browser', default=None)
+    args = parser.parse_args()
+
+    print(f"{'url':50} {'re-extract':>12} {'reuse info':>12}")
+    for url in args.urls:
+        info = fetch(url, args.browser)
+        extract_times = [time_to_first_byte(url, None, args.browser) for _ in range(args.repeat)]
+        reuse_times = [time_to_first_byte(url, info, args.browser) for _ in range(args.repeat)]
+        print(f"{url[:50]:50} {statistics.median(extract_times) * 1000:10.1f}ms "
+              f"{statistics.median(reuse_times) * 1000:10.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Per-job overhead of fetching info and downloading, with a fresh YoutubeDL
+for every job (the pool keeps nothing) and with pooled, warm instances.
+Jobs run one after another against the same URLs, so pooled jobs reuse
+the previous job's instance and kept-alive connections.
+
+Usage:
+    python -m benchmarks.job_overhead URL [URL ...] [--repeat N] [--browser NAME]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from core.engine import YtDlpEngine, warm_up
+from core.ydl_pool import get_ydl_pool
+
+
+def time_fetch(url, cookies_browser=None):
+    start = time.perf_counter()
+    YtDlpEngine().fetch_info(url, cookies_browser, use_cache=False)
+    return time.perf_counter() - start
+
+
+def time_download(url, folder, cookies_browser=None):
+    start = time.perf_counter()
+    YtDlpEngine(use_archive=False).download(url, {'paths': {'home': folder}}, cookies_browser)
+    elapsed = time.perf_counter() - start
+    # Same folder every time, like the app's download folder, so the options stay the same
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    return elapsed
+
+
+def run(urls, repeat, cookies_browser, pooled):
+    pool = get_ydl_pool()
+    pool.clear()
+    pool.max_idle_per_profile = 4 if pooled else 0
+    before = pool.stats()
+    fetches, downloads = [], []
+    with tempfile.TemporaryDirectory() as folder:
+        for _ in range(repeat):
+            for url in urls:
+                fetches.append(time_fetch(url, cookies_browser))
+                downloads.append(time_download(url, folder, cookies_browser))
+    counts = {key: pool.stats()[key] - before[key] for key in ('created', 'reused')}
+    return statistics.median(fetches), statistics.median(downloads), counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--browser', default=None)
+    args = parser.parse_args()
+
+    warm_up()
+    print(f"{'':10} {'fetch_info':>12} {'download':>12}   instances")
+    for label, pooled in (('fresh', False), ('pooled', True)):
+        fetch, download, stats = run(args.urls, args.repeat, args.browser, pooled)
+        print(f"{label:10} {fetch * 1000:10.1f}ms {download * 1000:10.1f}ms   "
+              f"{stats['created']} created, {stats['reused']} reused")
+
+
+if __name__ == '__main__':
+    main()
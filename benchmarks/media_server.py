@@ -0,0 +1,234 @@
+"""
+Local stand-in for a media host, for benchmarks that must run offline.
+
+Serves synthetic payloads that yt-dlp's generic extractor accepts:
+
+    /video.mp4            progressive file (Range requests supported)
+    /hls/index.m3u8       HLS playlist of .ts segments
+    /dash/manifest.mpd    DASH manifest of .m4s segments
+    /stall/...            any of the above, hanging half-way: progressive
+                          files after half their bytes, playlists and
+                          manifests from their middle segment on
+
+The bytes are a repeated random block, not decodable media, so downloads
+must not be post-processed (use 'fixup': 'never'). An optional rate limit
+and per-request latency make it behave more like a remote server.
+"""
+import http.server
+import os
+import re
+import threading
+import time
+
+CHUNK_SIZE = 64 * 1024
+SEGMENT_SECONDS = 4
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(body=False)
+
+    def do_GET(self):
+        self._respond(body=True)
+
+    def _respond(self, body):
+        server = self.server.media
+        path = self.path.split('?')[0]
+        stall = path.startswith('/stall/')
+        if stall:
+            path = path[len('/stall'):]
+        resource = server.resource(path)
+        if resource is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content_type, size, text = resource
+        if server.latency:
+            time.sleep(server.latency)
+
+        start, end = 0, size - 1
+        m = re.match(r'bytes=(\d*)-(\d*)', self.headers.get('Range') or '')
+        if m and text is None:
+            if m.group(1):
+                start = int(m.group(1))
+            if m.group(2):
+                end = min(int(m.group(2)), size - 1)
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        server.count_request()
+        if not body:
+            return
+        try:
+            if text is not None:
+                self.wfile.write(text)
+                return
+            if stall and server.segment_index(path) is not None:
+                if server.segment_index(path) >= server.segment_count // 2:
+                    server.stopped.wait()
+                    return
+                stall = False
+            self._send_payload(server, start, end + 1, stall)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_payload(self, server, start, stop, stall):
+        sent_since = time.monotonic()
+        sent = 0
+        position = start
+        while position < stop:
+            if stall and position - start >= (stop - start) // 2:
+                server.stopped.wait()
+                return
+            chunk = server.payload(position, min(stop, position + CHUNK_SIZE))
+            self.wfile.write(chunk)
+            position += len(chunk)
+            sent += len(chunk)
+            if server.rate:
+                # Paced per connection
+                ahead = sent / server.rate - (time.monotonic() - sent_since)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping kept-alive or cancelled connections are expected
+        pass
+
+
+class MediaServer:
+    """
+    Threaded HTTP server on 127.0.0.1 serving the synthetic media.
+    `rate` caps each connection (bytes/s, None for unlimited); `latency` is
+    added before every response.
+    """
+
+    def __init__(self, file_size=32 * 1024 * 1024, segment_count=40, segment_size=512 * 1024,
+                 rate=None, latency=0.0, port=0):
+        self.file_size = file_size
+        self.segment_count = segment_count
+        self.segment_size = segment_size
+        self.rate = rate
+        self.latency = latency
+        self.stopped = threading.Event()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._block = os.urandom(1024 * 1024)
+        self._httpd = _Server(('127.0.0.1', port), _Handler)
+        self._httpd.media = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def progressive_url(self):
+        return f"{self.base_url}/video.mp4"
+
+    @property
+    def hls_url(self):
+        return f"{self.base_url}/hls/index.m3u8"
+
+    @property
+    def dash_url(self):
+        return f"{self.base_url}/dash/manifest.mpd"
+
+    def stall_url(self, url):
+        """The same resource, served only half-way before it hangs."""
+        return url.replace(self.base_url, self.base_url + "/stall", 1)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="MediaServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def payload(self, start, stop):
+        """Bytes [start, stop) of any synthetic file: the random block, repeated."""
+        block = self._block
+        offset = start % len(block)
+        length = min(stop - start, len(block) - offset)
+        return block[offset:offset + length]
+
+    def resource(self, path):
+        """(content type, size, text or None for payload) for a path, or None if unknown."""
+        if path == '/video.mp4':
+            return 'video/mp4', self.file_size, None
+        if path == '/hls/index.m3u8':
+            return self._text('application/vnd.apple.mpegurl', self._hls_playlist())
+        if path == '/dash/manifest.mpd':
+            return self._text('application/dash+xml', self._dash_manifest())
+        index = self.segment_index(path)
+        if index is not None and index < self.segment_count:
+            return ('video/mp2t' if path.endswith('.ts') else 'video/iso.segment'), self.segment_size, None
+        if path == '/dash/init.mp4':
+            return 'video/mp4', 1024, None
+        return None
+
+    @staticmethod
+    def segment_index(path):
+        m = re.fullmatch(r'/(?:hls|dash)/seg(\d+)\.(?:ts|m4s)', path)
+        return int(m.group(1)) if m else None
+
+    @staticmethod
+    def _text(content_type, text):
+        data = text.encode()
+        return content_type, len(data), data
+
+    def _hls_playlist(self):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}',
+                 '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:VOD']
+        for index in range(self.segment_count):
+            lines += [f'#EXTINF:{SEGMENT_SECONDS}.0,', f'seg{index}.ts']
+        lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines) + '\n'
+
+    def _dash_manifest(self):
+        duration = self.segment_count * SEGMENT_SECONDS
+        segments = ''.join(f'<SegmentURL media="seg{index}.m4s"/>' for index in range(self.segment_count))
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S" '
+            f'mediaPresentationDuration="PT{duration}S" profiles="urn:mpeg:dash:profile:isoff-main:2011">'
+            '<Period><AdaptationSet mimeType="video/mp4" contentType="video">'
+            '<Representation id="video" bandwidth="1000000" width="1280" height="720" codecs="avc1.64001f">'
+            f'<SegmentList duration="{SEGMENT_SECONDS}" timescale="1">'
+            f'<Initialization sourceURL="init.mp4"/>{segments}</SegmentList>'
+            '</Representation></AdaptationSet></Period></MPD>'
+        )
@@ -0,0 +1,219 @@
+"""
+Offline benchmark of the download engine against a local media server
+(benchmarks.media_server): progressive, HLS and DASH downloads through
+YtDlpWorker, and a batch through DownloadQueue's signal path.
+
+Reports per scenario: throughput, time to first byte, progress-event
+overhead (engine progress callbacks, signals emitted and time spent
+handling them), peak Python memory, and how long a cancelled download takes
+to return. Runs fully offline, so results are comparable between changes
+on the same machine.
+
+Usage:
+    python -m benchmarks.offline [--repeat N] [--rate RATE] [--latency SECONDS]
+                                 [--size MIB] [--jobs N] [--json FILE]
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from benchmarks.media_server import MediaServer
+from core.bandwidth import parse_rate
+from core.downloader import DownloadCancelled, DownloadQueue, YtDlpWorker
+from core.ydl_pool import YoutubeDLPool
+
+# Synthetic payloads can't be probed or remuxed by ffmpeg
+DOWNLOAD_OPTS = {'fixup': 'never'}
+
+
+class QuietLogger:
+    """yt-dlp logger that drops everything, for the retries a cancel provokes."""
+
+    def debug(self, msg):
+        pass
+
+    info = warning = error = debug
+
+# One instance: the logger is part of the pooled YoutubeDL's key
+QUIET_LOGGER = QuietLogger()
+
+
+class TimedWorker(YtDlpWorker):
+    """YtDlpWorker that counts and times the progress callbacks it handles."""
+
+    def __init__(self):
+        super().__init__()
+        # Benchmark downloads must not end up in the user's download archive
+        self.engine.use_archive = False
+        self.callbacks = 0
+        self.callback_seconds = 0.0
+        self.signals = 0
+        self.first_byte = threading.Event()
+        self.progress.connect(self._on_signal)
+
+    def _on_progress(self, d):
+        started = time.perf_counter()
+        super()._on_progress(d)
+        self.callbacks += 1
+        self.callback_seconds += time.perf_counter() - started
+        if d.get('downloaded_bytes'):
+            self.first_byte.set()
+
+    def _on_signal(self, state):
+        self.signals += 1
+
+
+def run_download(url, trace_memory=False):
+    """One download through YtDlpWorker; returns its measurements."""
+    worker = TimedWorker()
+    with tempfile.TemporaryDirectory() as folder:
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        worker.run_download(url, dict(DOWNLOAD_OPTS, paths={'home': folder}))
+        wall = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    timings = worker.engine.timings.as_dict()
+    size = timings['counters']['bytes']
+    return {
+        'seconds': wall,
+        'throughput': size / wall,
+        'first_byte': timings['phases'].get('first_byte'),
+        'callbacks': worker.callbacks,
+        'signals': worker.signals,
+        'callback_seconds': worker.callback_seconds,
+        'peak_memory': peak,
+    }
+
+
+def cancel_latency(url, after=0.3):
+    """Seconds from cancelling a stalled download to run_download returning."""
+    worker = TimedWorker()
+    cancelled_at = []
+    with tempfile.TemporaryDirectory() as folder:
+        def cancel():
+            worker.first_byte.wait(30)
+            time.sleep(after)
+            cancelled_at.append(time.perf_counter())
+            worker.trigger_cancel()
+        threading.Thread(target=cancel, daemon=True).start()
+        try:
+            worker.run_download(url, dict(DOWNLOAD_OPTS, paths={'home': folder}, logger=QUIET_LOGGER))
+        except DownloadCancelled:
+            pass
+        returned = time.perf_counter()
+    return returned - cancelled_at[0] if cancelled_at else None
+
+
+def run_queue(url, jobs):
+    """`jobs` downloads of `url` through DownloadQueue with a Qt event loop, as the GUI runs them."""
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    queue = DownloadQueue(max_workers=jobs, per_host_limit=jobs, use_archive=False, journal=None)
+    counts = {'progress_signals': 0, 'finished': 0, 'failed': 0}
+
+    def on_progress(states):
+        counts['progress_signals'] += 1
+
+    def on_done(job_id, *args):
+        counts['finished'] += 1
+
+    def on_error(job_id, message):
+        counts['failed'] += 1
+
+    queue.progress_updated.connect(on_progress)
+    queue.job_finished.connect(on_done)
+    queue.job_error.connect(on_error)
+    queue.idle.connect(app.quit)
+    with tempfile.TemporaryDirectory() as folder:
+        started = time.perf_counter()
+        for _ in range(jobs):
+            queue.add(url, dict(DOWNLOAD_OPTS, paths={'home': folder}, outtmpl='%(title)s.%(autonumber)s.%(ext)s'))
+        QTimer.singleShot(300_000, app.quit) # Give up on a hung run
+        app.exec()
+        wall = time.perf_counter() - started
+        queue.shutdown(wait=True)
+    counts['seconds'] = wall
+    return counts
+
+
+def hook_counts(ydl):
+    """Progress hooks of a YoutubeDL, its postprocessor hooks and those of each of its postprocessors."""
+    return (len(ydl._progress_hooks), len(ydl._postprocessor_hooks),
+            [len(pp._progress_hooks) for pps in ydl._pps.values() for pp in pps])
+
+
+def check_pool_reset(cycles=3):
+    """
+    Borrows one pooled instance `cycles` times, adding per-job hooks like
+    YtDlpEngine does. True if every borrow found the hooks it was built with.
+    """
+    pool = YoutubeDLPool()
+    params = {'quiet': True, 'postprocessors': [{'key': 'FFmpegMetadata'}]}
+    counts = []
+    for _ in range(cycles):
+        with pool.borrow(params) as ydl:
+            counts.append(hook_counts(ydl))
+            ydl.add_progress_hook(lambda d: None)
+            ydl.add_postprocessor_hook(lambda d: None)
+    pool.clear()
+    return pool.stats()['reused'] == cycles - 1 and all(c == counts[0] for c in counts)
+
+
+def median(runs, key):
+    values = [run[key] for run in runs if run.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--rate', type=parse_rate, default=None, help="per-connection server rate, e.g. 20M")
+    parser.add_argument('--latency', type=float, default=0.0, help="server latency per request, seconds")
+    parser.add_argument('--size', type=int, default=32, help="progressive file size, MiB")
+    parser.add_argument('--jobs', type=int, default=4, help="downloads in the queue scenario")
+    parser.add_argument('--json', metavar='FILE', help="also write the results as JSON")
+    args = parser.parse_args()
+
+    if not check_pool_reset():
+        sys.exit("pooled YoutubeDL instances keep per-job hooks after release")
+
+    results = {}
+    with MediaServer(file_size=args.size * 1024 * 1024, rate=args.rate, latency=args.latency) as server:
+        scenarios = {'progressive': server.progressive_url, 'hls': server.hls_url, 'dash': server.dash_url}
+        print(f"{'scenario':12} {'MiB/s':>8} {'1st byte':>9} {'callbacks':>9} {'signals':>8} "
+              f"{'cb time':>8} {'peak mem':>9} {'cancel':>8}")
+        for name, url in scenarios.items():
+            run_download(url) # Warm-up: imports, extractor registry, pooled instances
+            runs = [run_download(url) for _ in range(args.repeat)]
+            memory = run_download(url, trace_memory=True)['peak_memory']
+            cancel = statistics.median(cancel_latency(server.stall_url(url)) for _ in range(args.repeat))
+            result = {key: median(runs, key) for key in runs[0]}
+            result.update(peak_memory=memory, cancel_latency=cancel)
+            results[name] = result
+            print(f"{name:12} {result['throughput'] / 2**20:8.1f} {result['first_byte'] * 1000:7.1f}ms "
+                  f"{result['callbacks']:9.0f} {result['signals']:8.0f} {result['callback_seconds'] * 1000:6.1f}ms "
+                  f"{memory / 2**20:7.1f}MiB {cancel * 1000:6.1f}ms")
+
+        queue = run_queue(server.progressive_url, args.jobs)
+        results['queue'] = queue
+        total = args.jobs * server.file_size
+        print(f"\nqueue: {args.jobs} x {args.size} MiB in {queue['seconds']:.2f}s "
+              f"({total / queue['seconds'] / 2**20:.1f} MiB/s), {queue['progress_signals']} progress signals, "
+              f"{queue['finished']} finished, {queue['failed']} failed")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
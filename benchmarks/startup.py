@@ -0,0 +1,85 @@
+"""
+Cold start benchmark for the GUI: interpreter start to module import, to the
+first paint of the main window, and to yt_dlp being fully warmed up in the
+background. Every run uses a fresh interpreter.
+
+Usage:
+    python -m benchmarks.startup [--repeat N] [--offscreen]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in the child interpreter; T0 is the parent's timestamp right before spawning it
+CHILD = r'''
+import json, os, sys, threading, time
+t0 = float(os.environ["STARTUP_BENCH_T0"])
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from ui.main_window import MainWindow
+t_import = time.time()
+yt_dlp_at_import = "yt_dlp" in sys.modules
+
+app = QApplication(sys.argv)
+window = MainWindow()
+result = {}
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "first_paint" not in result:
+            result["first_paint"] = time.time() - t0
+            result["yt_dlp_at_paint"] = "yt_dlp" in sys.modules
+            QTimer.singleShot(0, app.quit)
+        return False
+
+paint_filter = FirstPaint()
+window.installEventFilter(paint_filter)
+window.show()
+app.exec()
+
+for thread in threading.enumerate():
+    if thread.name == "YtDlpWarmUp":
+        thread.join()
+result["warm"] = time.time() - t0
+result["import"] = t_import - t0
+result["yt_dlp_at_import"] = yt_dlp_at_import
+print(json.dumps(result))
+window.download_queue.shutdown(wait=False)
+window.downloader_thread.quit()
+window.downloader_thread.wait()
+'''
+
+
+def run_once(env):
+    env = dict(env, STARTUP_BENCH_T0=repr(time.time()))
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=REPO_ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--offscreen', action='store_true', help="use Qt's offscreen platform (no display needed)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+    runs = [run_once(env) for _ in range(args.repeat)]
+    for key in ('import', 'first_paint', 'warm'):
+        values = [run[key] * 1000 for run in runs]
+        print(f"{key:12} median {statistics.median(values):8.1f}ms   min {min(values):8.1f}ms")
+    print(f"yt_dlp loaded before first paint: {any(run['yt_dlp_at_paint'] for run in runs)}")
+
+
+if __name__ == '__main__':
+    main()
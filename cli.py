@@ -0,0 +1,197 @@
+"""
+Headless batch downloader. Reads URLs (one per line, '#' comments allowed)
+from files or stdin and downloads them through the same engine as the GUI,
+printing one JSON object per event on stdout.
+
+    python cli.py urls.txt -o ~/Videos -j 8
+    cat urls.txt | python cli.py -q 720p
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from core.archive import get_download_archive
+from core.bandwidth import get_bandwidth_governor, parse_rate, parse_schedule_entry
+from core.batch import dedup_urls
+from core.cookies import get_cookie_jar_cache
+from core.engine import DownloadManager
+from core.jobs import DEFAULT_PER_HOST_LIMIT, Job
+from core.journal import JobJournal
+from core.metrics import get_metrics_recorder
+from core.presets import QUALITY_PRESETS, build_download_opts
+from core.process_pool import ProcessWorkerPool
+
+
+def read_urls(sources):
+    """Yields stripped, non-comment lines from the given files ('-' = stdin)."""
+    for source in sources:
+        stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+class JsonLinesReporter:
+    """Writes events as JSON lines; safe to call from worker threads."""
+
+    def __init__(self, stream=sys.stdout):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + '\n')
+            self._stream.flush()
+
+    def on_job_update(self, job):
+        if job.status == Job.PENDING:
+            self.emit('queued', job=job.id, url=job.url)
+        elif job.status == Job.RUNNING:
+            self.emit('started', job=job.id, url=job.url)
+        elif job.status == Job.PROCESSING:
+            self.emit('processing', job=job.id, url=job.url)
+        elif job.status == Job.FINISHED:
+            fields = {'fragments': job.fragment_stats} if job.fragment_stats else {}
+            if job.timings is not None:
+                fields['phases'] = job.timings.as_dict()['phases']
+            self.emit('finished', job=job.id, url=job.url, filename=job.filename, skipped=job.skipped, **fields)
+        elif job.status == Job.FAILED:
+            self.emit('failed', job=job.id, url=job.url, error=job.error)
+        elif job.status == Job.CANCELLED:
+            self.emit('cancelled', job=job.id, url=job.url)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='*', default=['-'],
+                        help="files containing URLs, '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default=os.getcwd(), help="download directory")
+    parser.add_argument('-q', '--quality', default="Best Quality", choices=list(QUALITY_PRESETS))
+    parser.add_argument('-j', '--jobs', type=int, default=8, help="concurrent downloads")
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST_LIMIT, help="concurrent downloads per host")
+    parser.add_argument('--cookies-from-browser', dest='browser', default=None)
+    parser.add_argument('--progress-interval', type=float, default=1.0,
+                        help="seconds between progress events, 0 to disable")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="download even if the archive says the file already exists")
+    parser.add_argument('--archive-import', metavar='FILE',
+                        help="import a yt-dlp --download-archive file before starting")
+    parser.add_argument('--archive-export', metavar='FILE',
+                        help="export the archive in yt-dlp's format when done")
+    parser.add_argument('--fragment-connections', type=int, default=32,
+                        help="connections shared by all HLS/DASH fragment downloads, 1 to fetch fragments one at a time")
+    parser.add_argument('--limit-rate', type=parse_rate, default=None, metavar='RATE',
+                        help="total download rate shared by all jobs, e.g. 2M or 500K")
+    parser.add_argument('--host-limit', action='append', default=[], metavar='HOST=RATE',
+                        help="rate cap for one site, repeatable")
+    parser.add_argument('--schedule', action='append', default=[], type=parse_schedule_entry,
+                        metavar='HH:MM-HH:MM=RATE',
+                        help="total rate during a time of day, replaces --limit-rate then; RATE 0 = unlimited")
+    parser.add_argument('--inline-post-processing', action='store_true',
+                        help="merge/convert on the download worker instead of a background process pool")
+    parser.add_argument('--journal', metavar='FILE',
+                        help="job journal: resume jobs left unfinished in it, then log this run to it")
+    parser.add_argument('--metrics-log', metavar='FILE',
+                        help="append every job's phase timings and counters to FILE as JSON lines")
+    parser.add_argument('--metrics-prom', metavar='FILE',
+                        help="keep totals of the job metrics in FILE in Prometheus text format")
+    parser.add_argument('--connections', type=int, default=1, metavar='N',
+                        help="connections per progressive file, fetched as byte ranges (default: 1, a single stream)")
+    parser.add_argument('--preallocate', action='store_true',
+                        help="allocate progressive files at full size before downloading them")
+    parser.add_argument('--no-space-check', action='store_true',
+                        help="start jobs without checking that their formats fit on the disk")
+    parser.add_argument('--worker-processes', type=int, default=0, metavar='N',
+                        help="run each job in one of N worker processes (default 0: in threads)")
+    return parser
+
+
+def parse_host_limits(parser, entries):
+    limits = {}
+    for entry in entries:
+        host, sep, rate = entry.partition('=')
+        try:
+            if not sep or not host:
+                raise ValueError(entry)
+            limits[host.strip().lower()] = parse_rate(rate)
+        except ValueError:
+            parser.error(f"invalid --host-limit {entry!r}, expected HOST=RATE")
+    return limits
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    get_bandwidth_governor().configure(
+        global_rate=args.limit_rate,
+        host_rates=parse_host_limits(parser, args.host_limit),
+        schedule=args.schedule,
+    )
+    get_metrics_recorder().configure(args.metrics_log, args.metrics_prom)
+    reporter = JsonLinesReporter()
+    if args.archive_import:
+        count = get_download_archive().import_text(args.archive_import)
+        reporter.emit('archive_imported', file=args.archive_import, entries=count)
+    manager = DownloadManager(max_workers=args.jobs, per_host_limit=args.per_host,
+                              on_update=reporter.on_job_update, use_archive=not args.no_archive,
+                              journal=JobJournal(args.journal) if args.journal else None,
+                              parallel_fragments=args.fragment_connections > 1,
+                              max_fragment_connections=max(1, args.fragment_connections),
+                              pooled_post_processing=not args.inline_post_processing,
+                              check_disk_space=not args.no_space_check,
+                              process_pool=ProcessWorkerPool(args.worker_processes) if args.worker_processes > 0 else None)
+
+    # First Ctrl+C stops everything (journaled jobs keep their partial files
+    # for a later --journal run), a second one exits immediately
+    def on_interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if manager.journal is not None:
+            manager.suspend_all()
+        else:
+            manager.cancel_all()
+    signal.signal(signal.SIGINT, on_interrupt)
+
+    opts = build_download_opts(args.quality, os.path.abspath(args.output), args.connections, args.preallocate)
+    jobs = manager.resume_journal()
+    for url in dedup_urls(read_urls(args.sources)):
+        jobs.append(manager.add(url, dict(opts), args.browser))
+
+    interval = args.progress_interval if args.progress_interval > 0 else 0.2
+    while manager.active_count() > 0:
+        time.sleep(interval)
+        states = manager.progress_aggregator.drain()
+        if args.progress_interval > 0:
+            for job_id, state in states.items():
+                reporter.emit('progress', job=job_id, **state)
+    # Let workers deliver their final status events before the summary
+    manager.shutdown(wait=True, timeout=5)
+    if manager.process_pool is not None:
+        manager.process_pool.shutdown()
+
+    counts = {status: 0 for status in (Job.FINISHED, Job.FAILED, Job.CANCELLED)}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    reporter.emit('summary', total=len(jobs), **counts)
+    if args.browser:
+        reporter.emit('cookies', browser=args.browser, **get_cookie_jar_cache().stats())
+    if args.archive_export:
+        count = get_download_archive().export_text(args.archive_export)
+        reporter.emit('archive_exported', file=args.archive_export, entries=count)
+    return 0 if counts[Job.FAILED] == 0 and counts[Job.CANCELLED] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import threading
+import time
+
+from core.settings import get_app_data_dir
+
+# Format key of entries imported from a yt-dlp archive: matches any format
+ANY_FORMAT = '*'
+
+
+def format_key(opts):
+    """
+    Identifies "the same download" for archive purposes: the format selector
+    plus the target codec when audio is extracted.
+    """
+    key = (opts or {}).get('format') or 'default'
+    for pp in (opts or {}).get('postprocessors') or []:
+        if pp.get('key') == 'FFmpegExtractAudio':
+            key += f"|audio:{pp.get('preferredcodec', 'best')}"
+    return key
+
+
+def archive_id(info):
+    """(extractor, id) of an info dict, as used by yt-dlp's download archive."""
+    extractor = info.get('extractor_key') or info.get('ie_key') or info.get('extractor')
+    video_id = info.get('id')
+    if not extractor or not video_id:
+        return None
+    return extractor.lower(), str(video_id)
+
+
+class DownloadArchive:
+    """
+    Persistent record of finished downloads, keyed by extractor + video id +
+    format key and stored in SQLite (primary-key lookups stay fast with
+    millions of rows). Can import and export yt-dlp's `download_archive`
+    text format ("extractor id" per line).
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or get_app_data_dir() / "download_archive.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        # Caller holds self._lock
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                " extractor TEXT NOT NULL, video_id TEXT NOT NULL, format TEXT NOT NULL,"
+                " path TEXT, completed REAL,"
+                " PRIMARY KEY (extractor, video_id, format)) WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, extractor, video_id, fmt):
+        """
+        Returns the path of an existing download of this video in this format,
+        or None. Entries whose file has since been deleted are ignored, and so
+        are imported ones, which have no file (see imported()).
+        """
+        try:
+            with self._lock:
+                rows = self._db().execute(
+                    "SELECT path FROM downloads WHERE extractor = ? AND video_id = ? AND format IN (?, ?)",
+                    (extractor.lower(), str(video_id), fmt, ANY_FORMAT),
+                ).fetchall()
+        except sqlite3.Error:
+            return None
+        for (path,) in rows:
+            if path and os.path.exists(path):
+                return path
+        return None
+
+    def imported(self, extractor, video_id):
+        """
+        True if the video came from an imported yt-dlp archive: downloaded
+        before, in whatever format, to a file that is not known.
+        """
+        try:
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT 1 FROM downloads WHERE extractor = ? AND video_id = ? AND format = ? AND path IS NULL",
+                    (extractor.lower(), str(video_id), ANY_FORMAT),
+                ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None
+
+    def record(self, extractor, video_id, fmt, path):
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?)",
+                    (extractor.lower(), str(video_id), fmt, path, time.time()),
+                )
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+    def import_text(self, filename):
+        """Imports a yt-dlp download archive file. Returns the number of entries read."""
+        def entries():
+            with open(filename, encoding='utf-8') as f:
+                for line in f:
+                    parts = line.strip().split(' ', 1)
+                    if len(parts) == 2:
+                        yield parts[0].lower(), parts[1], ANY_FORMAT, None, time.time()
+
+        rows = list(entries())
+        with self._lock:
+            db = self._db()
+            # Never overwrite a real entry (with a path) by an imported one
+            db.executemany("INSERT OR IGNORE INTO downloads VALUES (?, ?, ?, ?, ?)", rows)
+            db.commit()
+        return len(rows)
+
+    def export_text(self, filename):
+        """Writes all archived videos in yt-dlp's archive format. Returns the count."""
+        count = 0
+        with self._lock:
+            cursor = self._db().execute("SELECT DISTINCT extractor, video_id FROM downloads ORDER BY extractor, video_id")
+            with open(filename, 'w', encoding='utf-8') as f:
+                for extractor, video_id in cursor:
+                    f.write(f"{extractor} {video_id}\n")
+                    count += 1
+        return count
+
+
+_shared_archive = None
+_shared_lock = threading.Lock()
+
+def get_download_archive():
+    """Process-wide DownloadArchive instance."""
+    global _shared_archive
+    with _shared_lock:
+        if _shared_archive is None:
+            _shared_archive = DownloadArchive()
+        return _shared_archive
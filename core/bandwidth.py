@@ -0,0 +1,186 @@
+import datetime
+import re
+import threading
+import time
+
+# A stream that read nothing for this long no longer counts towards the shares
+ACTIVE_WINDOW = 1.0
+# Bucket size, in seconds worth of the stream's rate
+BURST = 0.5
+# Reads are split so a throttled stream sleeps often and briefly
+THROTTLED_READ_SIZE = 64 * 1024
+
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_rate(text):
+    """
+    '500K', '2.5M', '1G' or plain bytes per second -> bytes per second.
+    0, '', 'none' and 'unlimited' mean no limit (None).
+    """
+    text = str(text).strip().upper()
+    if text in ('', '0', 'NONE', 'UNLIMITED'):
+        return None
+    m = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?(?:/S)?', text)
+    if not m:
+        raise ValueError(f"Invalid rate: {text!r}")
+    rate = float(m.group(1)) * _UNITS[m.group(2)]
+    return rate or None
+
+
+def parse_schedule_entry(text):
+    """'HH:MM-HH:MM=RATE' -> schedule entry dict (see BandwidthGovernor)."""
+    m = re.fullmatch(r'\s*(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})\s*=\s*(.+)', text)
+    if not m:
+        raise ValueError(f"Invalid schedule entry: {text!r} (expected HH:MM-HH:MM=RATE)")
+    return {'start': m.group(1), 'end': m.group(2), 'rate': parse_rate(m.group(3))}
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class BandwidthStream:
+    """
+    One job's share of the bandwidth: a token bucket whose rate is recomputed
+    on every read from the governor's current limits and the set of jobs
+    competing for them.
+    """
+
+    def __init__(self, governor, host, weight):
+        self._governor = governor
+        self.host = host
+        self.weight = max(0.01, float(weight))
+        self.tokens = 0.0
+        self.refilled = time.monotonic()
+        self.last_active = self.refilled
+
+    @property
+    def limited(self):
+        return self._governor.rate_for(self) is not None
+
+    def consume(self, size, cancel_event=None):
+        """Accounts for `size` bytes read, sleeping until they fit in the share."""
+        delay = self._governor._charge(self, size)
+        while delay > 0:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            # Wake up periodically so limits changed meanwhile take effect
+            step = min(delay, 0.25)
+            if cancel_event is not None:
+                cancel_event.wait(step)
+            else:
+                time.sleep(step)
+            delay = self._governor._charge(self, 0)
+
+    def report(self):
+        """
+        For reads throttled elsewhere (in a worker process): marks the stream
+        as reading and returns its current rate, None for unlimited.
+        """
+        with self._governor._lock:
+            now = time.monotonic()
+            self.last_active = now
+            return self._governor._rate_for(self, now)
+
+    def close(self):
+        self._governor._close(self)
+
+
+class BandwidthGovernor:
+    """
+    Shares download bandwidth between all running jobs.
+
+    Limits are a global rate, per-host rates, and a time-of-day schedule
+    whose entries ({'start': 'HH:MM', 'end': 'HH:MM', 'rate': bytes/s or
+    None}) replace the global rate while they apply, e.g. unlimited at night.
+    Each capped rate is split between the jobs currently reading, in
+    proportion to their weights, and the split is recomputed on every read
+    so it follows jobs starting, finishing or going idle. Rates are in bytes
+    per second; None means unlimited.
+    """
+
+    def __init__(self, global_rate=None, host_rates=None, schedule=None):
+        self._lock = threading.Lock()
+        self._streams = set()
+        self.global_rate = None
+        self.host_rates = {}
+        self.schedule = []
+        self.configure(global_rate, host_rates, schedule)
+
+    def configure(self, global_rate=None, host_rates=None, schedule=None):
+        """Replaces all limits; running jobs pick them up on their next read."""
+        with self._lock:
+            self.global_rate = global_rate or None
+            self.host_rates = {host.lower().removeprefix("www."): rate
+                               for host, rate in (host_rates or {}).items() if rate}
+            self.schedule = list(schedule or [])
+
+    def open(self, host, weight=1.0):
+        """Registers a job; returns the BandwidthStream its reads go through."""
+        stream = BandwidthStream(self, host or "", weight)
+        with self._lock:
+            self._streams.add(stream)
+        return stream
+
+    def current_global_rate(self, now=None):
+        """Global rate in effect at `now` (a datetime), after the schedule."""
+        now = now or datetime.datetime.now()
+        minute = now.hour * 60 + now.minute
+        for entry in self.schedule:
+            start, end = _minutes(entry['start']), _minutes(entry['end'])
+            inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+            if inside:
+                return entry.get('rate') or None
+        return self.global_rate
+
+    def rate_for(self, stream):
+        with self._lock:
+            return self._rate_for(stream, time.monotonic())
+
+    def _rate_for(self, stream, now):
+        # Caller holds self._lock
+        active = [s for s in self._streams
+                  if s is stream or now - s.last_active < ACTIVE_WINDOW]
+        rates = []
+        global_rate = self.current_global_rate()
+        if global_rate:
+            rates.append(global_rate * stream.weight / sum(s.weight for s in active))
+        host_rate = self.host_rates.get(stream.host)
+        if host_rate:
+            same_host = [s for s in active if s.host == stream.host]
+            rates.append(host_rate * stream.weight / sum(s.weight for s in same_host))
+        return min(rates) if rates else None
+
+    def _charge(self, stream, size):
+        """Takes `size` tokens from the stream's bucket; returns how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            rate = self._rate_for(stream, now)
+            stream.last_active = now
+            if rate is None:
+                stream.tokens = 0.0
+                stream.refilled = now
+                return 0.0
+            burst = rate * BURST
+            stream.tokens = min(burst, stream.tokens + (now - stream.refilled) * rate)
+            stream.refilled = now
+            stream.tokens -= size
+            return -stream.tokens / rate if stream.tokens < 0 else 0.0
+
+    def _close(self, stream):
+        with self._lock:
+            self._streams.discard(stream)
+
+
+_shared_governor = None
+_shared_lock = threading.Lock()
+
+def get_bandwidth_governor():
+    """Process-wide BandwidthGovernor instance (unlimited until configured)."""
+    global _shared_governor
+    with _shared_lock:
+        if _shared_governor is None:
+            _shared_governor = BandwidthGovernor()
+        return _shared_governor
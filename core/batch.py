@@ -0,0 +1,119 @@
+import concurrent.futures
+import re
+import threading
+
+from core.cache import normalize_url
+
+# Links resolved at once by default; each one is a full extraction
+DEFAULT_WORKERS = 4
+
+_URL_RE = re.compile(r'https?://[^\s<>"\'`{}|\\^\[\]]+', re.IGNORECASE)
+_TRAILING = '.,;:!?\'"*'
+
+
+def _trim(url):
+    """Drops punctuation that ends the surrounding sentence rather than the link."""
+    while url:
+        if url[-1] in _TRAILING:
+            url = url[:-1]
+        elif url[-1] == ')' and url.count('(') < url.count(')'):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+
+def dedup_urls(urls, seen=None):
+    """
+    `urls` without repeats, in order. Two spellings of the same link (see
+    normalize_url) count as one; the first is kept. `seen` (a set of
+    normalized URLs) carries over between calls and is updated.
+    """
+    seen = set() if seen is None else seen
+    result = []
+    for url in urls:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            result.append(url)
+    return result
+
+
+def extract_urls(text):
+    """The http(s) links in free text (one per line, comma-separated, or inline), deduplicated."""
+    return dedup_urls(url for url in (_trim(m.group(0)) for m in _URL_RE.finditer(text or '')) if url)
+
+
+def urls_from_file(path):
+    """
+    The links in a text file (URL lists, .url and .webloc shortcuts, saved
+    pages...). Lines starting with '#' are comments.
+    """
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = [line for line in f if not line.lstrip().startswith('#')]
+    return extract_urls(''.join(lines))
+
+
+class BatchResolver:
+    """
+    Fetches the metadata of many URLs concurrently on a bounded thread pool.
+
+    `on_result(url, info, error)` is called from a pool thread as each URL
+    completes, in completion order; exactly one of `info` and `error` (the
+    message) is set. cancel() drops everything submitted so far: queued
+    lookups never start and lookups already running report nothing.
+    """
+
+    def __init__(self, on_result=None, max_workers=DEFAULT_WORKERS, fetch_info=None):
+        self._on_result = on_result
+        self._fetch_info = fetch_info or self._engine_fetch_info
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max(1, int(max_workers)), thread_name_prefix="BatchResolver")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures = set()
+
+    @staticmethod
+    def _engine_fetch_info(url, cookies_browser, use_cache):
+        from core.engine import YtDlpEngine
+        return YtDlpEngine().fetch_info(url, cookies_browser, use_cache)
+
+    def submit(self, urls, cookies_browser=None, use_cache=True):
+        """Queues lookups of `urls` (already deduplicated by the caller)."""
+        with self._lock:
+            generation = self._generation
+            for url in urls:
+                future = self._executor.submit(self._resolve, generation, url, cookies_browser, use_cache)
+                self._futures.add(future)
+                future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def pending(self):
+        """Number of lookups queued or running."""
+        with self._lock:
+            return len(self._futures)
+
+    def _resolve(self, generation, url, cookies_browser, use_cache):
+        info = error = None
+        try:
+            info = self._fetch_info(url, cookies_browser, use_cache)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        with self._lock:
+            current = generation == self._generation
+        if current and self._on_result:
+            self._on_result(url, info, error)
+
+    def cancel(self):
+        with self._lock:
+            self._generation += 1
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def shutdown(self, wait=True):
+        self.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,247 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+from core.settings import get_app_data_dir
+
+# Key set on cached info dicts whose stream URLs were dropped because they expired.
+# The downloader must re-extract such entries instead of using them directly.
+STREAMS_EXPIRED_KEY = '_streams_expired'
+
+# Query parameters that never change what a URL points to
+_TRACKING_PARAMS = {'si', 'feature', 'fbclid', 'gclid', 'igshid', 'ref', 'ref_src', 'pp'}
+
+_EXPIRE_RE = re.compile(r'[?&/]expires?[=/](\d{9,11})')
+
+DEFAULT_TTL = 12 * 3600
+# Assumed lifetime of stream URLs that do not advertise their own expiry
+DEFAULT_STREAM_TTL = 30 * 60
+# Stream URLs closer than this to expiring are treated as already expired
+STREAM_EXPIRY_MARGIN = 5 * 60
+
+
+def normalize_url(url):
+    """
+    Canonical form of a URL for cache lookups: lowercase host without "www.",
+    no fragment, no tracking parameters and sorted query.
+    """
+    url = url.strip()
+    try:
+        parts = urlparse(url)
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _TRACKING_PARAMS and not k.startswith('utm_')
+    ]
+    query.sort()
+    path = parts.path.rstrip('/') or '/'
+    return urlunparse(((parts.scheme or 'https').lower(), host, path, '', urlencode(query), ''))
+
+
+def _stream_urls(info):
+    for fmt in [info] + list(info.get('formats') or []) + list(info.get('requested_formats') or []):
+        if not isinstance(fmt, dict):
+            continue
+        for key in ('url', 'manifest_url', 'fragment_base_url'):
+            value = fmt.get(key)
+            if isinstance(value, str) and value.startswith(('http://', 'https://')):
+                yield value
+
+
+def stream_expiry(info, fetched_at):
+    """Earliest time at which one of the info's stream URLs stops working."""
+    expiries = []
+    for url in _stream_urls(info):
+        match = _EXPIRE_RE.search(url)
+        if match:
+            expiries.append(int(match.group(1)))
+    if expiries:
+        return min(expiries)
+    return fetched_at + DEFAULT_STREAM_TTL
+
+
+def streams_usable(info):
+    """True if an info dict's stream URLs can still be handed to the downloader."""
+    if info.get(STREAMS_EXPIRED_KEY) or not (info.get('formats') or info.get('url')):
+        return False
+    fetched_at = info.get('epoch') or 0
+    return time.time() < stream_expiry(info, fetched_at) - STREAM_EXPIRY_MARGIN
+
+
+def strip_streams(info):
+    """Drops everything in an info dict that points at a (possibly dead) stream."""
+    for key in ('url', 'manifest_url', 'fragments', 'fragment_base_url',
+                'requested_formats', 'requested_downloads', 'http_headers'):
+        info.pop(key, None)
+    info.pop('formats', None)
+    info[STREAMS_EXPIRED_KEY] = True
+    return info
+
+
+class InfoCache:
+    """
+    On-disk cache of yt-dlp info dicts, backed by SQLite.
+
+    Entries are keyed by extractor + video id and reachable through any of the
+    normalized URLs they were fetched from. Entries older than `ttl` seconds are
+    ignored, and the least recently used ones are evicted once the cache grows
+    past `max_entries` or `max_bytes` (compressed size).
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_entries=500, max_bytes=64 * 1024 * 1024):
+        self.path = str(path or get_app_data_dir() / "info_cache.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        # Caller holds self._lock
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS info ("
+                " key TEXT PRIMARY KEY, data BLOB, size INTEGER,"
+                " created REAL, accessed REAL, streams_expire REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS info_accessed ON info(accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS alias (url_key TEXT PRIMARY KEY, key TEXT)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _scope(cookies_browser):
+        # Logged-in extractions can differ, so keep them apart per browser
+        return cookies_browser if cookies_browser and cookies_browser != "None" else ""
+
+    @staticmethod
+    def _entry_key(info, scope):
+        extractor = info.get('extractor_key') or info.get('extractor')
+        video_id = info.get('id')
+        if extractor and video_id:
+            return f"{scope}|{extractor}:{video_id}"
+        return f"{scope}|{normalize_url(info.get('webpage_url') or info.get('original_url') or '')}"
+
+    def get(self, url, cookies_browser=None):
+        """
+        Returns the cached info dict for `url`, or None on a miss.
+        Stream URLs that have (nearly) expired are stripped, see STREAMS_EXPIRED_KEY.
+        """
+        url_key = f"{self._scope(cookies_browser)}|{normalize_url(url)}"
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT info.key, data, created, streams_expire FROM alias"
+                    " JOIN info ON info.key = alias.key WHERE alias.url_key = ?",
+                    (url_key,),
+                ).fetchone()
+                if row is None:
+                    return None
+                key, data, created, streams_expire = row
+                if now - created > self.ttl:
+                    db.execute("DELETE FROM info WHERE key = ?", (key,))
+                    db.execute("DELETE FROM alias WHERE key = ?", (key,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE info SET accessed = ? WHERE key = ?", (now, key))
+                db.commit()
+            info = json.loads(zlib.decompress(data))
+        except (sqlite3.Error, zlib.error, ValueError):
+            return None
+
+        if now >= streams_expire - STREAM_EXPIRY_MARGIN:
+            strip_streams(info)
+        return info
+
+    def put(self, url, info, cookies_browser=None):
+        """Stores an info dict fetched from `url`."""
+        scope = self._scope(cookies_browser)
+        key = self._entry_key(info, scope)
+        now = time.time()
+        try:
+            data = zlib.compress(json.dumps(info).encode('utf-8'), 6)
+        except (TypeError, ValueError):
+            return
+        url_keys = {
+            f"{scope}|{normalize_url(u)}"
+            for u in (url, info.get('original_url'), info.get('webpage_url'))
+            if u
+        }
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO info VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now, stream_expiry(info, now)),
+                )
+                db.executemany(
+                    "INSERT OR REPLACE INTO alias VALUES (?, ?)",
+                    [(url_key, key) for url_key in url_keys],
+                )
+                self._evict(db)
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, db):
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM info").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM info ORDER BY accessed ASC"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM info WHERE key = ?", doomed)
+        db.executemany("DELETE FROM alias WHERE key = ?", doomed)
+
+    def invalidate(self, url, cookies_browser=None):
+        url_key = f"{self._scope(cookies_browser)}|{normalize_url(url)}"
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute("SELECT key FROM alias WHERE url_key = ?", (url_key,)).fetchone()
+                if row:
+                    db.execute("DELETE FROM info WHERE key = ?", row)
+                    db.execute("DELETE FROM alias WHERE key = ?", row)
+                    db.commit()
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute("DELETE FROM info")
+                db.execute("DELETE FROM alias")
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+def get_info_cache():
+    """Process-wide InfoCache instance."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = InfoCache()
+        return _shared_cache
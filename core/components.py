@@ -0,0 +1,113 @@
+import concurrent.futures
+import threading
+
+
+def component_name(first_name, first_format, fmt):
+    """
+    The file name yt-dlp's process_info gives component `fmt` of a merged
+    format, derived from the name it gave the first one (`<root>.f<id>.<ext>`).
+    None if `first_name` does not follow that pattern.
+    """
+    suffix = f".f{first_format.get('format_id')}.{first_format.get('ext')}"
+    if not first_name.endswith(suffix):
+        return None
+    return f"{first_name[:-len(suffix)]}.f{fmt.get('format_id')}.{fmt.get('ext')}"
+
+
+class ComponentDownloads:
+    """
+    The components (video, audio) of one merged format, downloaded together.
+
+    yt-dlp downloads them one after the other with a dl() call each. When the
+    first call comes in, start() submits the other components to helper
+    threads; the first then downloads on the calling thread and the later
+    dl() calls just collect the results, so the merge can start as soon as
+    the slowest component is in.
+
+    combine() turns the progress hook dicts of all components into one
+    progress for the whole format: bytes and speeds summed, 'finished' only
+    once every component is.
+    """
+
+    def __init__(self, info_dict):
+        self.info_dict = info_dict
+        self._lock = threading.Lock()
+        self._futures = {} # name -> Future
+        self._executor = None
+        self._aborted = False
+        self.started = False
+        self._states = {} # name -> [downloaded, total, speed, finished]
+
+    def start(self, name, first_info, dl):
+        """
+        Called with the first component's dl() arguments. Submits
+        `dl(name, info)` for every other component and returns how many were.
+        """
+        self.started = True
+        formats = self.info_dict.get('requested_formats') or []
+        first = next((f for f in formats if f.get('format_id') == first_info.get('format_id')), None)
+        if first is None:
+            return 0
+        base = {key: value for key, value in self.info_dict.items() if key != 'requested_formats'}
+        others = []
+        for fmt in formats:
+            other = component_name(name, first, fmt)
+            if other is None:
+                return 0
+            if fmt is not first:
+                others.append((other, dict(base, **fmt)))
+        for component, fmt in [(name, first)] + [(other, info) for other, info in others]:
+            self._states[component] = [0, fmt.get('filesize') or fmt.get('filesize_approx') or 0, None, False]
+        if not others:
+            return 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(len(others), thread_name_prefix="ComponentDownload")
+        for other, info in others:
+            self._futures[other] = self._executor.submit(dl, other, info)
+        return len(others)
+
+    def result(self, name):
+        """
+        Waits for the component started for `name` and returns its dl()
+        result (or raises its error). None if `name` was not started here.
+        """
+        future = self._futures.pop(name, None)
+        return future.result() if future is not None else None
+
+    def abort(self):
+        """Makes the components still downloading fail at their next progress report."""
+        self._aborted = True
+
+    def close(self):
+        """Waits for the helper threads to end; call abort() first to not wait for full downloads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._futures.clear()
+
+    def combine(self, d):
+        """The progress dict of the whole format for a component's hook dict `d`."""
+        name = d.get('filename')
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                return d
+            if self._aborted and d.get('status') == 'downloading':
+                raise Exception("Component download aborted")
+            status = d.get('status')
+            if status == 'downloading':
+                state[0] = d.get('downloaded_bytes') or 0
+                state[1] = d.get('total_bytes') or d.get('total_bytes_estimate') or state[1]
+                state[2] = d.get('speed')
+            elif status == 'finished':
+                state[1] = state[0] = d.get('total_bytes') or d.get('downloaded_bytes') or state[0]
+                state[2] = None
+                state[3] = True
+            downloaded = sum(s[0] for s in self._states.values())
+            total = sum(max(s[0], s[1]) for s in self._states.values())
+            speed = sum(s[2] for s in self._states.values() if s[2])
+            finished = all(s[3] for s in self._states.values())
+        combined = dict(d, status='finished' if finished else 'downloading',
+                        filename=self.info_dict.get('_filename') or name, downloaded_bytes=downloaded,
+                        total_bytes=total or None, speed=speed or None,
+                        eta=(total - downloaded) / speed if speed and total else None)
+        combined.pop('total_bytes_estimate', None)
+        return combined
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+# Jars of browsers whose cookie store couldn't be located are reloaded after this long
+UNKNOWN_STORE_MAX_AGE = 30 * 60
+
+
+def _cookie_store_files(browser):
+    """
+    Files whose modification means the browser's cookies changed: the
+    cookie database and its journal/WAL. Located with yt-dlp's own lookup
+    rules; empty if it can't be found.
+    """
+    from yt_dlp import cookies
+    try:
+        if browser == 'firefox':
+            database = cookies._newest(cookies._firefox_cookie_dbs(cookies._firefox_browser_dirs()))
+        elif browser == 'safari':
+            database = os.path.expanduser('~/Library/Cookies/Cookies.binarycookies')
+        elif browser in cookies.CHROMIUM_BASED_BROWSERS:
+            root = cookies._get_chromium_based_browser_settings(browser)['browser_dir']
+            database = cookies._newest(cookies._find_files(root, 'Cookies', cookies.YDLLogger()))
+        else:
+            database = None
+    except Exception:
+        database = None
+    if not database:
+        return []
+    return [database, database + '-journal', database + '-wal']
+
+
+def _signature(files):
+    signature = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class _CachedJar:
+    __slots__ = ('jar', 'files', 'signature', 'loaded_at', 'lock')
+
+    def __init__(self):
+        self.jar = None
+        self.files = None
+        self.signature = None
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+
+class CookieJarCache:
+    """
+    Browser cookies extracted once and shared by every YoutubeDL instance.
+
+    Extracting means copying, opening and decrypting the browser's cookie
+    database, which can take seconds or fail while the browser holds a
+    lock. A jar is reused until the database (or its journal) changes on
+    disk; concurrent lookups of a jar being loaded wait for that one load.
+    stats() reports how long lookups and loads take.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jars = {}
+        self._stats = {'lookups': 0, 'hits': 0, 'loads': 0, 'load_seconds': 0.0,
+                       'last_load_seconds': None, 'lookup_seconds': 0.0}
+
+    def get(self, browser):
+        """The cookie jar of `browser` (a yt-dlp browser name), loading it if needed."""
+        started = time.perf_counter()
+        with self._lock:
+            entry = self._jars.get(browser)
+            if entry is None:
+                entry = self._jars[browser] = _CachedJar()
+        with entry.lock:
+            hit = entry.jar is not None and self._fresh(entry)
+            if not hit:
+                self._load(browser, entry)
+            jar = entry.jar
+        with self._lock:
+            self._stats['lookups'] += 1
+            self._stats['hits'] += hit
+            self._stats['lookup_seconds'] += time.perf_counter() - started
+        return jar
+
+    def _fresh(self, entry):
+        # Caller holds entry.lock
+        if not entry.files:
+            return time.monotonic() - entry.loaded_at < UNKNOWN_STORE_MAX_AGE
+        return _signature(entry.files) == entry.signature
+
+    def _load(self, browser, entry):
+        # Caller holds entry.lock
+        from yt_dlp import cookies
+        started = time.perf_counter()
+        files = _cookie_store_files(browser)
+        # Taken before reading, so a write during extraction triggers a reload
+        signature = _signature(files)
+        entry.jar = cookies.extract_cookies_from_browser(browser, logger=cookies.YDLLogger())
+        entry.files = files
+        entry.signature = signature
+        entry.loaded_at = time.monotonic()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats['loads'] += 1
+            self._stats['load_seconds'] += elapsed
+            self._stats['last_load_seconds'] = elapsed
+
+    def preload(self, browser):
+        """Loads the jar of `browser` on a background thread (errors are left for get())."""
+        def load():
+            try:
+                self.get(browser)
+            except Exception:
+                pass
+        threading.Thread(target=load, name="CookiePreload", daemon=True).start()
+
+    def invalidate(self, browser=None):
+        """Drops the jar of `browser` (all jars if None)."""
+        with self._lock:
+            if browser is None:
+                self._jars.clear()
+            else:
+                self._jars.pop(browser, None)
+
+    def stats(self):
+        """Lookup/load counters and timings, with the average lookup time in ms."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['lookups']
+        stats['avg_lookup_ms'] = stats['lookup_seconds'] * 1000 / lookups if lookups else None
+        return stats
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+def get_cookie_jar_cache():
+    """Process-wide CookieJarCache instance."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = CookieJarCache()
+        return _shared_cache
@@ -0,0 +1,205 @@
+import errno
+import itertools
+import os
+import shutil
+import threading
+import time
+
+# Left free on every volume on top of what the jobs need
+MIN_FREE_BYTES = 256 * 1024 * 1024
+# Merging or converting writes a new file while its inputs are still on disk
+POST_PROCESS_OVERHEAD = 1.0
+# filesize_approx (and bitrate x duration) are guesses, allow for being short
+APPROX_MARGIN = 1.1
+# How often a deferred job looks at the free space again
+RECHECK_INTERVAL = 1.0
+
+
+class InsufficientDiskSpace(Exception):
+    """Raised when a download cannot fit on the volume of its download folder."""
+
+
+def format_size(fmt):
+    """Expected bytes of one format, 0 if nothing hints at it."""
+    if fmt.get('filesize'):
+        return fmt['filesize']
+    approx = fmt.get('filesize_approx')
+    if not approx and fmt.get('tbr') and fmt.get('duration'):
+        approx = fmt['tbr'] * 125 * fmt['duration'] # kbit/s
+    return int((approx or 0) * APPROX_MARGIN)
+
+
+def estimate_size(info, post_processing=False):
+    """
+    Bytes a processed info dict needs on disk: its selected formats, plus
+    room for the merged or converted output. 0 when the size is unknown.
+    """
+    formats = info.get('requested_formats') or [info]
+    media = sum(format_size(f) for f in formats)
+    if len(formats) > 1 or post_processing:
+        media += media * POST_PROCESS_OVERHEAD
+    return int(media)
+
+
+def preallocate(f, size):
+    """
+    Allocates `size` bytes for the open file `f` up front, as one extent
+    where the filesystem supports it; elsewhere the file is only extended.
+    Raises OSError (ENOSPC) if the space is not there.
+    """
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+                raise
+    f.truncate(size)
+
+
+def _existing_folder(path):
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def claim_space(reservation, size, is_cancelled=None):
+    """
+    Blocks until `reservation` holds `size` more bytes. Raises
+    InsufficientDiskSpace if they can never fit; returns False if
+    `is_cancelled()` turned true while waiting, True otherwise.
+    """
+    while True:
+        status, message = reservation.try_claim(size)
+        if status == 'ok':
+            return True
+        if status == 'refuse':
+            raise InsufficientDiskSpace(message)
+        if is_cancelled is not None and is_cancelled():
+            return False
+        time.sleep(RECHECK_INTERVAL)
+
+
+class DiskReservation:
+    """
+    Space one job holds on the volume of its download folder: its expected
+    size, minus what it has written so far (which the free space already
+    shows). Created by DiskSpaceLedger.open().
+    """
+
+    def __init__(self, ledger, path, size, seq):
+        self._ledger = ledger
+        self.path = str(path)
+        self.seq = seq
+        self.size = size
+        # Set once the job itself claimed space, its size is then exact
+        self.claimed = False
+        self._written = {} # file name -> bytes written
+        try:
+            self.volume = os.stat(_existing_folder(self.path)).st_dev
+        except OSError:
+            self.volume = None
+
+    @property
+    def remaining(self):
+        return max(0, self.size - sum(self._written.values()))
+
+    def try_claim(self, size):
+        """
+        Asks for `size` more bytes: ('ok', None) once they are held,
+        ('wait', message) while running jobs hold them, ('refuse', message)
+        if they will not fit.
+        """
+        return self._ledger._try_claim(self, size)
+
+    def update(self, d):
+        """Takes a progress hook dict into account."""
+        filename = d.get('filename')
+        if filename and d.get('status') in ('downloading', 'finished'):
+            with self._ledger._lock:
+                self._written[filename] = d.get('downloaded_bytes') or d.get('total_bytes') or 0
+
+    def close(self):
+        self._ledger._close(self)
+
+
+class DiskSpaceLedger:
+    """
+    Free space bookkeeping shared by all jobs, so that jobs started together
+    do not each count on the same free bytes.
+
+    A job queued with a size estimate reserves it right away; once running,
+    it claims the exact size of the formats it is about to download. A claim
+    is refused when the volume cannot hold it next to MIN_FREE_BYTES of
+    headroom, and deferred while the space is held by running downloads or
+    reserved by jobs queued before it.
+    """
+
+    def __init__(self, margin=MIN_FREE_BYTES):
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._reservations = []
+
+    def open(self, path, size=0):
+        """Returns a DiskReservation of `size` bytes on the volume of `path`."""
+        reservation = DiskReservation(self, path, size, next(self._seq))
+        with self._lock:
+            self._reservations.append(reservation)
+        return reservation
+
+    def _try_claim(self, reservation, size):
+        folder = _existing_folder(reservation.path)
+        try:
+            free = shutil.disk_usage(folder).free
+        except OSError:
+            return 'ok', None # Can't tell, the download will find out
+        with self._lock:
+            running = queued = 0
+            for other in self._reservations:
+                if other is reservation or other.volume != reservation.volume:
+                    continue
+                if other.claimed:
+                    running += other.remaining
+                elif other.seq < reservation.seq:
+                    queued += other.remaining
+            available = free - self.margin
+            if size > available:
+                return 'refuse', (f"Not enough disk space in {folder}: the download needs about "
+                                  f"{_format_bytes(size)}, {_format_bytes(max(0, available))} can be used")
+            # Queued jobs may still be cancelled, so their space is waited for, not refused
+            held = running + queued
+            if size > available - held:
+                return 'wait', f"Waiting for {_format_bytes(size - available + held)} of disk space"
+            reservation.size = sum(reservation._written.values()) + size
+            reservation.claimed = True
+            return 'ok', None
+
+    def _close(self, reservation):
+        with self._lock:
+            if reservation in self._reservations:
+                self._reservations.remove(reservation)
+
+
+_shared_ledger = None
+_shared_lock = threading.Lock()
+
+def get_disk_space_ledger():
+    """Process-wide DiskSpaceLedger."""
+    global _shared_ledger
+    with _shared_lock:
+        if _shared_ledger is None:
+            _shared_ledger = DiskSpaceLedger()
+        return _shared_ledger
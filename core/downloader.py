@@ -1,206 +1,298 @@
-import yt_dlp
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
-from pathlib import Path
-import os
-import re
-import sys
-
-def get_ffmpeg_path():
-    if getattr(sys, 'frozen', False):
-        return sys._MEIPASS
-    return None
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer
+import time
+
+from core.batch import DEFAULT_WORKERS, BatchResolver
+from core.engine import YtDlpEngine, DownloadManager, DownloadCancelled, get_ffmpeg_path
+from core.jobs import DEFAULT_PER_HOST_LIMIT, Job
+from core.playlist import PlaylistCursor
+from core.prefetch import MetadataPrefetcher
+from core.process_pool import ProcessEngine
+from core.progress import ProgressAggregator
+
+# Rate at which progress reaches the UI, independent of chunk rate
+PROGRESS_INTERVAL = 0.1
 
 class YtDlpWorker(QObject):
     """
     Worker class to handle yt-dlp operations in a separate thread.
+    Thin Qt wrapper that turns YtDlpEngine results into signals.
     """
     finished = pyqtSignal()
     progress = pyqtSignal(dict)
     info_ready = pyqtSignal(dict)
     error_occurred = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, progress_aggregator=None, progress_key=None, process_pool=None):
+        """
+        With a shared `progress_aggregator` the worker only feeds it (under
+        `progress_key`) and the owner samples it; otherwise the worker emits
+        `progress` itself, at most every PROGRESS_INTERVAL seconds.
+        With a `process_pool` the yt-dlp work runs in a worker process
+        (ProcessEngine); the signals are the same.
+        """
         super().__init__()
-        self._is_running = False
-        self._cancel_requested = False
-        self._current_filename = None
+        if process_pool is not None:
+            self.engine = ProcessEngine(process_pool, progress_callback=self._on_progress)
+        else:
+            self.engine = YtDlpEngine(progress_callback=self._on_progress)
+        self._shared_progress = progress_aggregator is not None
+        self._aggregator = progress_aggregator or ProgressAggregator()
+        self._progress_key = progress_key
+        self._last_progress_emit = 0.0
+
+    @property
+    def current_filename(self):
+        """Name of the file most recently reported by yt-dlp."""
+        return self.engine.current_filename
 
     def trigger_cancel(self):
         """Sets the cancellation flag."""
-        self._cancel_requested = True
+        self.engine.cancel()
     
-    def fetch_info(self, url, cookies_browser=None):
+    def fetch_info(self, url, cookies_browser=None, use_cache=True):
         """Fetch video information without downloading."""
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'skip_download': True,
-                'noplaylist': True,
-                'extract_flat':'in_playlist',
-                'force_ipv4':True,
-            }
-            if cookies_browser and cookies_browser != "None":
-                ydl_opts['cookiesfrombrowser'] = (cookies_browser,)
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                if 'entries' in info and info['entries']:
-                    info = info['entries'][0] # Take the first video if it's a playlist link
-                self.info_ready.emit(info)
+            self.info_ready.emit(self.engine.fetch_info(url, cookies_browser, use_cache))
         except Exception as e:
             self.error_occurred.emit(str(e))
 
-    def download(self, url, opts=None, cookies_browser=None):
+    def download(self, url, opts=None, cookies_browser=None, info=None):
         """Download video with given options."""
-        self._cancel_requested = False
-        self._current_filename = None
-
-        if opts is None:
-            opts = {}
-
-        # Capture the intended paths (home) to verify file existence in correct dir
-        download_dir = Path(opts.get('paths', {}).get('home', os.getcwd()))
-
-        def avoid_collision(info_dict, default_filename_func):
-            """
-            Hook to modify filename if it exists.
-            Generates 'filename (1).ext' pattern.
-            """
-            # Get the default filename generated by yt-dlp
-            filename = default_filename_func(info_dict)
-            base_path = Path(filename)
-            
-            if not base_path.exists():
-                return filename
-
-            # File exists, find a unique name
-            folder = base_path.parent
-            stem = base_path.stem
-            suffix = base_path.suffix
-            
-            counter = 1
-            while True:
-                new_stem = f"{stem} ({counter})"
-                new_filename = folder / (new_stem + suffix)
-                if not new_filename.exists():
-                    return str(new_filename)
-                counter += 1
-
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'progress_hooks': [self._progress_hook],
-            'outtmpl': '%(title)s.%(ext)s',
-            # 'prepare_filename': ... # Will inject this manually
-        }
-
-        if cookies_browser and cookies_browser != "None":
-            ydl_opts['cookiesfrombrowser'] = (cookies_browser,)
-
-        ffmpeg_path = get_ffmpeg_path()
-        if ffmpeg_path:
-            ydl_opts['ffmpeg_location'] = ffmpeg_path
-
-        ydl_opts.update(opts)
-
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                original_prepare_filename = ydl.prepare_filename
-                
-                def collision_avoidance_wrapper(info, *args, **kwargs):
-                    path_str = original_prepare_filename(info, *args, **kwargs)
-                    path = Path(path_str)
-                    
-                    if not path.exists():
-                        return path_str
-                    
-                    # Conflict
-                    parent = path.parent
-                    stem = path.stem
-                    suffix = path.suffix
-                    
-                    counter = 1
-                    while True:
-                        new_path = parent / f"{stem} ({counter}){suffix}"
-                        if not new_path.exists():
-                            return str(new_path)
-                        counter += 1
-                
-                ydl.prepare_filename = collision_avoidance_wrapper
-                
-                ydl.download([url])
+            self.run_download(url, opts, cookies_browser, info=info)
             self.finished.emit()
+        except DownloadCancelled:
+            self.error_occurred.emit("Download cancelled.")
         except Exception as e:
-            msg = str(e)
-            if "DOWNLOAD_CANCELLED" in msg:
-                # Clean up incomplete files
-                if self._current_filename:
-                    import time
-                    import glob
-
-                    # Give yt-dlp a moment to release handles
-                    time.sleep(0.5)
-
-                    try:
-                        file_path = Path(self._current_filename)
-                        if not file_path.is_absolute():
-                            file_path = download_dir / file_path
-                        
-                        # Find all related files (including fragments) using glob
-                        folder = file_path.parent
-                        name_pattern = file_path.name + "*"
-                        
-                        candidates = []
-                        if folder.exists():
-                           candidates = list(folder.glob(name_pattern))
-
-                        if file_path not in candidates:
-                            candidates.append(file_path)
-
-                        for path in candidates:
-                            if path.exists():
-                                for _ in range(3):
-                                    try:
-                                        os.remove(path)
-                                        break # Success
-                                    except PermissionError:
-                                        time.sleep(0.5) 
-                                    except OSError:
-                                        break 
-                    except Exception:
-                        pass
-                
-                self.error_occurred.emit("Download cancelled.")
-            else:
-                self.error_occurred.emit(str(e))
-
-    def _progress_hook(self, d):
-        """Internal hook to emit progress signal."""
-        if self._cancel_requested:
-            raise Exception("DOWNLOAD_CANCELLED")
-
-        self._current_filename = d.get('filename')
-
-        if d['status'] == 'downloading':
-            p_dict = {
-                'status': 'downloading',
-                'filename': d.get('filename', 'Unknown'),
-                'downloaded_bytes': d.get('downloaded_bytes', 0),
-                'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate', 0),
-                'speed': d.get('speed', 0),
-                'eta': d.get('eta', 0),
-                'percent': d.get('_percent_str', '0%').replace('%','')
-            }
-            self.progress.emit(p_dict)
-        elif d['status'] == 'finished':
-            self.progress.emit({'status': 'finished', 'filename': d['filename']})
+            self.error_occurred.emit(str(e))
+
+    def run_download(self, url, opts=None, cookies_browser=None, cancel_event=None, info=None):
+        """Blocking download, see YtDlpEngine.download."""
+        self.engine.download(url, opts, cookies_browser, cancel_event=cancel_event, info=info)
+
+    def _on_progress(self, d):
+        """Engine progress callback, runs on the downloading thread."""
+        self._aggregator.update(self._progress_key, d)
+        if self._shared_progress:
+            return # Owner samples the shared aggregator
+
+        now = time.monotonic()
+        if d['status'] == 'finished' or now - self._last_progress_emit >= PROGRESS_INTERVAL:
+            self._last_progress_emit = now
+            for state in self._aggregator.drain().values():
+                self.progress.emit(state)
 
 class DownloaderThread(QThread):
-    def __init__(self):
+    def __init__(self, process_pool=None):
         super().__init__()
-        self.worker = YtDlpWorker()
+        self.worker = YtDlpWorker(process_pool=process_pool)
         self.worker.moveToThread(self)
     
     def run(self):
         self.exec()
+
+class DownloadQueue(QObject):
+    """
+    Qt front-end for DownloadManager: runs several downloads concurrently and
+    reports each job's lifecycle through signals carrying the job id.
+    """
+    job_started = pyqtSignal(int)
+    job_processing = pyqtSignal(int) # Downloaded, being merged/converted in the background
+    progress_updated = pyqtSignal(dict) # {job id: progress state}, at most every PROGRESS_INTERVAL
+    job_finished = pyqtSignal(int, str)
+    job_skipped = pyqtSignal(int, str) # Already in the download archive: id, existing file
+    job_stats = pyqtSignal(int, list) # Per-format HLS/DASH fragment stats, sent before job_finished
+    job_error = pyqtSignal(int, str)
+    job_cancelled = pyqtSignal(int)
+    idle = pyqtSignal()
+
+    def __init__(self, max_workers=8, per_host_limit=DEFAULT_PER_HOST_LIMIT, use_archive=True, journal=None,
+                 parallel_fragments=True, max_fragment_connections=None, pooled_post_processing=True,
+                 process_pool=None, check_disk_space=True, parent=None):
+        super().__init__(parent)
+        self.manager = DownloadManager(
+            max_workers=max_workers,
+            per_host_limit=per_host_limit,
+            on_update=self._on_job_update,
+            use_archive=use_archive,
+            journal=journal,
+            parallel_fragments=parallel_fragments,
+            max_fragment_connections=max_fragment_connections,
+            pooled_post_processing=pooled_post_processing,
+            process_pool=process_pool,
+            check_disk_space=check_disk_space,
+        )
+        # All workers feed one aggregator that is sampled on the GUI thread,
+        # so no per-chunk events cross threads.
+        self._progress_timer = QTimer(self)
+        self._progress_timer.setInterval(int(PROGRESS_INTERVAL * 1000))
+        self._progress_timer.timeout.connect(self._emit_progress)
+        self._progress_timer.start()
+
+    def add(self, url, opts=None, cookies_browser=None, title=None, info=None, weight=1.0):
+        """Queues a download and returns its job id."""
+        return self.manager.add(url, opts, cookies_browser, title, info, weight=weight).id
+
+    def cancel(self, job_id):
+        self.manager.cancel(job_id)
+
+    def cancel_all(self):
+        self.manager.cancel_all()
+
+    def suspend_all(self):
+        """Stops all jobs but keeps them (and their partial files) for the next launch."""
+        self.manager.suspend_all()
+
+    def resume_interrupted(self):
+        """Re-queues jobs interrupted in the previous session; returns [(job id, title)]."""
+        return [(job.id, job.title) for job in self.manager.resume_journal()]
+
+    def active_count(self):
+        return self.manager.active_count()
+
+    def shutdown(self, wait=True):
+        self._progress_timer.stop()
+        self.manager.shutdown(wait=wait)
+
+    def _emit_progress(self):
+        states = self.manager.progress_aggregator.drain()
+        if states:
+            self.progress_updated.emit(states)
+
+    def _on_job_update(self, job):
+        """Called from worker threads; signals are queued to the GUI thread."""
+        if job.status == Job.RUNNING:
+            self.job_started.emit(job.id)
+        elif job.status == Job.PROCESSING:
+            self.job_processing.emit(job.id)
+        elif job.status == Job.FINISHED and job.skipped:
+            self.job_skipped.emit(job.id, job.filename or "")
+        elif job.status == Job.FINISHED:
+            if job.fragment_stats:
+                self.job_stats.emit(job.id, job.fragment_stats)
+            self.job_finished.emit(job.id, job.filename or "")
+        elif job.status == Job.FAILED:
+            self.job_error.emit(job.id, job.error or "Unknown error")
+        elif job.status == Job.CANCELLED:
+            self.job_cancelled.emit(job.id)
+        if job.done and self.manager.active_count() == 0:
+            self.idle.emit()
+
+class BatchFetcher(QObject):
+    """
+    Metadata lookups for a batch of URLs on a bounded pool (BatchResolver),
+    reported as signals on the owner's thread as each one completes.
+    """
+    item_ready = pyqtSignal(str, dict) # url, info
+    item_failed = pyqtSignal(str, str) # url, error message
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, fetch_info=None, parent=None):
+        super().__init__(parent)
+        self.resolver = BatchResolver(self._on_result, max_workers, fetch_info)
+
+    def fetch(self, urls, cookies_browser=None, use_cache=True):
+        self.resolver.submit(urls, cookies_browser, use_cache)
+
+    def pending(self):
+        return self.resolver.pending()
+
+    def cancel(self):
+        self.resolver.cancel()
+
+    def shutdown(self, wait=True):
+        self.resolver.shutdown(wait=wait)
+
+    def _on_result(self, url, info, error):
+        """Called from pool threads; signals are queued to the owner's thread."""
+        if error is None:
+            self.item_ready.emit(url, info)
+        else:
+            self.item_failed.emit(url, error)
+
+class PlaylistLoader(QObject):
+    """
+    Lists one playlist or channel at a time through a PlaylistCursor. Lives
+    on its own thread (PlaylistThread); its slots are driven by queued
+    signals, so pages are fetched in the order they are requested. Every
+    signal carries the playlist URL, so late pages of a dismissed playlist
+    can be told apart.
+    """
+    opened = pyqtSignal(str, dict) # url, playlist_summary()
+    page_ready = pyqtSignal(str, list, bool) # url, entry items, more to come
+    error_occurred = pyqtSignal(str, str) # url, error message
+
+    def __init__(self):
+        super().__init__()
+        self._cursor = None
+
+    def open(self, url, cookies_browser=None):
+        """Starts listing `url` (closing the previous playlist) and sends its first page."""
+        self.close()
+        self._cursor = PlaylistCursor(url, cookies_browser)
+        try:
+            self.opened.emit(url, self._cursor.open())
+        except Exception as e:
+            self._cursor = None
+            self.error_occurred.emit(url, str(e))
+            return
+        self.next_page()
+
+    def next_page(self):
+        cursor = self._cursor
+        if cursor is None:
+            return
+        try:
+            items = cursor.next_page()
+        except Exception as e:
+            self.error_occurred.emit(cursor.url, str(e))
+            return
+        self.page_ready.emit(cursor.url, items, not cursor.exhausted)
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+            self._cursor = None
+
+class PlaylistThread(QThread):
+    def __init__(self):
+        super().__init__()
+        self.loader = PlaylistLoader()
+        self.loader.moveToThread(self)
+
+    def run(self):
+        self.exec()
+        self.loader.close()
+
+class MetadataPrefetch(QObject):
+    """
+    Qt front-end for MetadataPrefetcher: lookups started ahead of the user,
+    reported as signals on the owner's thread.
+    """
+    ready = pyqtSignal(str, dict) # url, info
+    failed = pyqtSignal(str, str) # url, error message
+    skipped = pyqtSignal(str) # url not recognized by a specific extractor, nothing fetched
+
+    def __init__(self, fetch_info=None, parent=None):
+        super().__init__(parent)
+        self.prefetcher = MetadataPrefetcher(self._on_result, fetch_info)
+
+    def prefetch(self, url, cookies_browser=None, use_cache=True):
+        return self.prefetcher.prefetch(url, cookies_browser, use_cache)
+
+    def take(self, url, cookies_browser=None):
+        return self.prefetcher.take(url, cookies_browser)
+
+    def is_pending(self, url, cookies_browser=None):
+        return self.prefetcher.is_pending(url, cookies_browser)
+
+    def shutdown(self, wait=True):
+        self.prefetcher.shutdown(wait=wait)
+
+    def _on_result(self, url, info, error):
+        """Called from pool threads; signals are queued to the owner's thread."""
+        if info is not None:
+            self.ready.emit(url, info)
+        elif error is not None:
+            self.failed.emit(url, error)
+        else:
+            self.skipped.emit(url)
@@ -0,0 +1,977 @@
+from pathlib import Path
+from functools import partial
+import concurrent.futures
+import copy
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+import weakref
+
+from core.archive import archive_id, format_key, get_download_archive
+from core.bandwidth import THROTTLED_READ_SIZE, get_bandwidth_governor
+from core.cookies import get_cookie_jar_cache
+from core.diskspace import claim_space, estimate_size, get_disk_space_ledger
+from core.cache import get_info_cache, streams_usable
+from core.components import ComponentDownloads
+from core.fragments import THROTTLE_STATUSES, FragmentRun, get_fragment_tuner, is_fragmented
+from core.jobs import DEFAULT_PER_HOST_LIMIT, Job, JobScheduler, host_of
+from core.journal import resume_opts
+from core.metrics import JobTimings, get_metrics_recorder
+from core.names import get_name_index
+from core.playlist import extract_unprocessed, is_playlist, playlist_summary
+from core.postprocess import child_options, gather, get_post_process_pool
+from core.progress import ProgressAggregator
+from core.reaper import get_file_reaper
+from core.ydl_pool import get_ydl_pool
+
+# Options of the YoutubeDL instances fetch_info() extracts with
+INFO_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'noplaylist': True,
+    'extract_flat':'in_playlist',
+    'force_ipv4':True,
+}
+
+def load_yt_dlp():
+    """
+    Returns the yt_dlp module, importing it on first use. The import pulls in
+    hundreds of extractor modules, so it is kept off the startup path.
+    """
+    import yt_dlp
+    return yt_dlp
+
+def warm_up():
+    """
+    Imports yt_dlp, builds the extractor registry and leaves a ready
+    fetch_info() instance in the pool, so the first real lookup does not pay
+    for it. Meant for a background thread.
+    """
+    try:
+        yt_dlp = load_yt_dlp()
+        yt_dlp.extractor.gen_extractor_classes()
+        get_ydl_pool().prewarm(INFO_OPTIONS)
+    except Exception:
+        pass # Best effort, the first real call will import it anyway
+
+def start_warm_up():
+    """Runs warm_up() on a daemon thread and returns immediately."""
+    threading.Thread(target=warm_up, name="YtDlpWarmUp", daemon=True).start()
+
+def specific_extractor(url):
+    """
+    The extractor class whose URL pattern matches `url`, or None if only the
+    generic extractor would handle it. No network access.
+    """
+    yt_dlp = load_yt_dlp()
+    for ie in yt_dlp.extractor.gen_extractor_classes():
+        if ie.ie_key() != 'Generic' and ie.suitable(url):
+            return ie
+    return None
+
+def archive_id_from_url(url):
+    """
+    (extractor, id) for a URL from the extractors' URL patterns alone, without
+    any network access. None if only the generic extractor would handle it.
+    """
+    ie = specific_extractor(url)
+    if ie is None:
+        return None
+    temp_id = ie.get_temp_id(url)
+    return (ie.ie_key().lower(), str(temp_id)) if temp_id else None
+
+def _downloaded_entries(result):
+    """Yields the video info dicts of a download result (flattening playlists)."""
+    if not result:
+        return
+    if result.get('_type') == 'playlist':
+        for entry in result.get('entries') or []:
+            yield from _downloaded_entries(entry)
+    else:
+        yield result
+
+def _with_outputs(path):
+    """`path` and the output merging or post-processing it writes first ("title.temp.mp4")."""
+    path = Path(path)
+    return [str(path), str(path.with_name(f"{path.stem}.temp{path.suffix}"))]
+
+def _deferred_files(task):
+    """Files a deferred post-processing task reads or writes."""
+    filename, info, files_to_move, _ = task
+    names = [filename, info.get('filepath')] + list(info.get('__files_to_merge') or [])
+    names += list(files_to_move) + list(files_to_move.values())
+    return sorted({path for name in names if name for path in _with_outputs(name)})
+
+# Engine whose download() is running on the current thread
+_running_engine = threading.local()
+_popen_hook_lock = threading.Lock()
+_popen_hooked = False
+
+def _track_subprocesses(yt_dlp):
+    """
+    Makes yt-dlp's Popen (ffmpeg downloads, merging, post-processing) report
+    each child process to the engine downloading on the creating thread, so
+    that cancel() can kill it instead of waiting for it to finish.
+    """
+    global _popen_hooked
+    with _popen_hook_lock:
+        if _popen_hooked:
+            return
+        popen_class = yt_dlp.utils.Popen
+        original_init = popen_class.__init__
+
+        def tracking_init(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            engine = getattr(_running_engine, 'engine', None)
+            if engine is not None:
+                engine._register_process(self)
+
+        popen_class.__init__ = tracking_init
+        _popen_hooked = True
+
+def _find_socket(obj, depth=4):
+    """The socket under a yt-dlp response (urllib, requests and urllib3 wrap it differently)."""
+    if isinstance(obj, socket.socket):
+        return obj
+    if obj is None or depth == 0:
+        return None
+    for attr in ('fp', '_fp', 'raw', '_sock', 'sock', '_connection'):
+        found = _find_socket(getattr(obj, attr, None), depth - 1)
+        if found is not None:
+            return found
+    return None
+
+def _abort_response(response):
+    """Unblocks a read in progress on `response` (from another thread) and closes it."""
+    sock = _find_socket(response)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    try:
+        response.close()
+    except Exception:
+        pass
+
+def _browser_cookie_jar(cookies_browser):
+    """
+    The shared jar of the browser's cookies, handed to YoutubeDL instances
+    instead of letting each extract them itself (what 'cookiesfrombrowser'
+    would do). None without a browser.
+    """
+    if cookies_browser and cookies_browser != "None":
+        return get_cookie_jar_cache().get(cookies_browser)
+    return None
+
+def get_ffmpeg_path():
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return None
+
+class DownloadCancelled(Exception):
+    """Raised by YtDlpEngine.download when the user cancelled the job."""
+
+class YtDlpEngine:
+    """
+    Qt-free yt-dlp operations. Methods block the calling thread, return their
+    result or raise; raw yt-dlp progress dicts go to `progress_callback`.
+    """
+
+    def __init__(self, progress_callback=None, use_archive=True, parallel_fragments=True):
+        self._progress_callback = progress_callback
+        self.use_archive = use_archive
+        # Download HLS/DASH fragments in parallel, tuned by the shared FragmentTuner
+        self.parallel_fragments = parallel_fragments
+        self._fragment_run = None
+        # Download the video and audio of merged formats at the same time
+        self.parallel_components = True
+        self._components = None
+        # Stats of each fragmented format downloaded by the last download()
+        self.fragment_stats = []
+        # Phase timings and counters of the last download()
+        self.timings = JobTimings()
+        # BandwidthStream that HTTP reads are charged to, None for unlimited
+        self.bandwidth = None
+        # DiskReservation the downloaded formats are claimed from, None for no check
+        self.disk_space = None
+        # Leave post-processing to the caller (see post_process_deferred)
+        self.defer_post_processing = False
+        self.deferred = []
+        self._deferred_params = None
+        self._deferred_format = None
+        self._cancel_requested = False
+        self._cancel_event = None
+        self._current_filename = None
+        # Every file yt-dlp reported, removed if the download is cancelled
+        self._seen_filenames = set()
+        # Open HTTP responses and child processes of the running download
+        self._transfer_lock = threading.Lock()
+        self._responses = weakref.WeakSet()
+        self._processes = weakref.WeakSet()
+        # Set by download() when the archive already had the file
+        self.skipped_existing = False
+        # Leave .part/fragment files on cancel so the job can resume later
+        self.keep_partial_files = False
+
+    @property
+    def current_filename(self):
+        """Name of the file most recently reported by yt-dlp."""
+        return self._current_filename
+
+    def cancel(self):
+        """
+        Cancels the running download: in-flight network reads are aborted and
+        ffmpeg processes killed, so download() returns promptly. Safe to call
+        from any thread.
+        """
+        self._cancel_requested = True
+        with self._transfer_lock:
+            responses = list(self._responses)
+            processes = list(self._processes)
+        for response in responses:
+            _abort_response(response)
+        for process in processes:
+            self._kill_process(process)
+
+    def _is_cancelled(self):
+        return self._cancel_requested or bool(self._cancel_event and self._cancel_event.is_set())
+
+    def _check_cancelled(self):
+        if self._is_cancelled():
+            raise Exception("DOWNLOAD_CANCELLED")
+
+    def _register_response(self, response):
+        with self._transfer_lock:
+            self._responses.add(response)
+        if self._is_cancelled():
+            _abort_response(response)
+
+    def _register_process(self, process):
+        with self._transfer_lock:
+            self._processes.add(process)
+        if self._is_cancelled():
+            self._kill_process(process)
+
+    @staticmethod
+    def _kill_process(process):
+        try:
+            if process.poll() is None:
+                process.kill()
+        except OSError:
+            pass
+
+    def fetch_info(self, url, cookies_browser=None, use_cache=True):
+        """
+        Fetch video information without downloading.
+        For a playlist or channel link only its playlist_summary() is
+        returned, with '_type' 'playlist' and no entries.
+        Served from the metadata cache when possible; `use_cache=False` forces
+        a fresh extraction (the result still refreshes the cache).
+        """
+        cache = get_info_cache()
+        if use_cache:
+            info = cache.get(url, cookies_browser)
+            if info is not None:
+                return info
+
+        with get_ydl_pool().borrow(INFO_OPTIONS, _browser_cookie_jar(cookies_browser)) as ydl:
+            info = extract_unprocessed(ydl, url)
+            if is_playlist(info):
+                # Listed page by page (see PlaylistCursor), not resolved here
+                return playlist_summary(info, url)
+            info = ydl.process_ie_result(info, download=False)
+            info = ydl.sanitize_info(info)
+        cache.put(url, info, cookies_browser)
+        return info
+
+    def download(self, url, opts=None, cookies_browser=None, cancel_event=None, info=None):
+        """
+        Download video with given options, blocking the calling thread.
+        Raises DownloadCancelled if cancelled, or the yt-dlp error on failure.
+        `cancel_event` is an optional threading.Event that also cancels the download.
+        `info` is the dict returned by fetch_info; when its stream URLs are still
+        valid it is downloaded directly instead of running the extractor again.
+        Returns the path of the existing file when the download archive shows
+        this video was already fetched in this format, otherwise None (and
+        `skipped_existing` tells an entry imported from a yt-dlp archive).
+        With `opts['segmented_connections']` above 1, progressive HTTP formats
+        are fetched as byte ranges over that many connections (core.segmented);
+        `opts['preallocate']` allocates their files at full size up front.
+        """
+        self._cancel_requested = False
+        self._cancel_event = cancel_event
+        self._current_filename = None
+        self._seen_filenames = set()
+        self.fragment_stats = []
+        self.timings = JobTimings()
+        # Archive lookup and getting a YoutubeDL ready
+        self.timings.switch('setup')
+        self.deferred = []
+        self.skipped_existing = False
+
+        if opts is None:
+            opts = {}
+
+        fmt = format_key(opts)
+        if self.use_archive:
+            existing = self._find_in_archive(url, info, fmt)
+            if existing is not None:
+                self._current_filename = existing or None
+                self.skipped_existing = True
+                self.timings.switch(None)
+                return existing or None
+
+        # Capture the intended paths (home) to resolve relative file names
+        download_dir = Path(opts.get('paths', {}).get('home', os.getcwd()))
+
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True, # Progress is reported through the hook only
+            'outtmpl': '%(title)s.%(ext)s',
+            # 'prepare_filename': ... # Will inject this manually
+        }
+
+        ffmpeg_path = get_ffmpeg_path()
+        if ffmpeg_path:
+            ydl_opts['ffmpeg_location'] = ffmpeg_path
+
+        ydl_opts.update(opts)
+        self._deferred_params = ydl_opts
+
+        yt_dlp = load_yt_dlp()
+        _track_subprocesses(yt_dlp)
+        names = get_name_index()
+        reserved_names = {}
+        completed = False
+        _running_engine.engine = self
+        timings = self.timings
+        try:
+            # Pooled per option profile: the per-job hook, filter and patches are set on the
+            # borrowed instance and dropped again when it goes back to the pool
+            with get_ydl_pool().borrow(ydl_opts, _browser_cookie_jar(cookies_browser)) as ydl:
+                ydl.add_progress_hook(self._progress_hook)
+                ydl.add_postprocessor_hook(self._postprocessor_hook)
+                if self.use_archive and 'match_filter' not in opts:
+                    # Second chance for URLs whose id is only known after extraction
+                    ydl.params['match_filter'] = partial(self._archive_match_filter, fmt)
+                original_prepare_filename = ydl.prepare_filename
+                original_urlopen = ydl.urlopen
+                original_dl = ydl.dl
+                original_post_process = ydl.post_process
+                original_process_video_result = ydl.process_video_result
+                original_process_info = ydl.process_info
+
+                def reserving_prepare_filename(info_dict, dir_type='', **kwargs):
+                    path_str = original_prepare_filename(info_dict, dir_type, **kwargs)
+                    # Only the media file itself, not thumbnails/subtitles/etc.
+                    if dir_type not in ('', 'temp') or kwargs.get('outtmpl') or path_str in ('', '-'):
+                        return path_str
+                    # yt-dlp asks several times per file, always hand back the same name
+                    if path_str not in reserved_names:
+                        reserved_names[path_str] = names.reserve(path_str)
+                    return reserved_names[path_str]
+
+                def tracking_urlopen(req):
+                    # Also stops yt-dlp's retry loop once the job is cancelled
+                    self._check_cancelled()
+                    run = self._fragment_run
+                    record = run.request_started() if run is not None else None
+                    timings.count('requests')
+                    try:
+                        response = original_urlopen(req)
+                    except yt_dlp.networking.exceptions.HTTPError as e:
+                        timings.count('retries')
+                        if e.status in THROTTLE_STATUSES:
+                            timings.count('throttled')
+                        if run is not None:
+                            run.failed(e.status)
+                        raise
+                    except yt_dlp.networking.exceptions.TransportError:
+                        timings.count('retries')
+                        if run is not None:
+                            run.failed()
+                        raise
+                    self._register_response(response)
+                    if run is not None or self.bandwidth is not None:
+                        self._instrument_reads(response, run, record)
+                    return response
+
+                def is_tuned(info_dict):
+                    return (self.parallel_fragments and is_fragmented(info_dict)
+                            and 'concurrent_fragment_downloads' not in opts)
+
+                connections = int(opts.get('segmented_connections') or 1)
+                preallocate = bool(opts.get('preallocate'))
+
+                def plain_dl(name, info_dict, subtitle=False, test=False):
+                    if (connections > 1 or preallocate) and not (subtitle or test):
+                        # Progressive files go to the segmented downloader if the job asked for it
+                        from core.segmented import is_segmentable, segmented_dl
+                        if is_segmentable(info_dict, ydl.params):
+                            return segmented_dl(ydl, name, info_dict, connections, preallocate)
+                    return original_dl(name, info_dict, subtitle, test)
+
+                def component_dl(name, info_dict):
+                    # Helper thread of ComponentDownloads
+                    _running_engine.engine = self
+                    try:
+                        return plain_dl(name, info_dict)
+                    finally:
+                        _running_engine.engine = None
+
+                def tuning_dl(name, info_dict, subtitle=False, test=False):
+                    components = self._components
+                    if components is not None and not (subtitle or test):
+                        result = components.result(name)
+                        if result is not None:
+                            return result
+                        if not components.started and components.start(name, info_dict, component_dl):
+                            try:
+                                return plain_dl(name, info_dict)
+                            except BaseException:
+                                components.abort()
+                                raise
+                    if subtitle or test or not is_tuned(info_dict):
+                        return plain_dl(name, info_dict, subtitle, test)
+                    return self._dl_fragmented(ydl, original_dl, name, info_dict, url)
+                
+                def timed_process_video_result(info_dict, download=True):
+                    timings.switch('format_selection')
+                    return original_process_video_result(info_dict, download)
+
+                def timed_process_info(info_dict):
+                    if self.disk_space is not None:
+                        timings.switch('disk_wait')
+                        self._claim_disk_space(info_dict, opts)
+                    timings.switch('download')
+                    formats = info_dict.get('requested_formats') or []
+                    # Fragmented components already get parallel connections from the tuner,
+                    # whose per-run accounting assumes one format at a time
+                    if (not self.parallel_components or len(formats) < 2
+                            or any(is_tuned(dict(info_dict, **f)) for f in formats)):
+                        return original_process_info(info_dict)
+                    components = self._components = ComponentDownloads(info_dict)
+                    try:
+                        return original_process_info(info_dict)
+                    except BaseException:
+                        components.abort()
+                        raise
+                    finally:
+                        components.close()
+                        self._components = None
+
+                def deferring_post_process(filename, info_dict, files_to_move=None):
+                    task = self._defer_post_process(ydl, ydl_opts, filename, info_dict, files_to_move)
+                    if task is None:
+                        timings.switch('post_processing')
+                        info_dict = original_post_process(filename, info_dict, files_to_move)
+                    else:
+                        self.deferred.append(task)
+                    # Whatever comes next (another playlist entry) starts with extraction
+                    timings.switch('extraction')
+                    return info_dict
+                
+                ydl.prepare_filename = reserving_prepare_filename
+                ydl.urlopen = tracking_urlopen
+                ydl.dl = tuning_dl
+                ydl.post_process = deferring_post_process
+                ydl.process_video_result = timed_process_video_result
+                ydl.process_info = timed_process_info
+                
+                timings.switch('extraction')
+                if info is not None and streams_usable(info):
+                    result = self._download_from_info(ydl, url, info)
+                else:
+                    result = ydl.extract_info(url, download=True)
+                timings.switch('cleanup')
+            completed = True
+            if self.deferred:
+                # Recorded once post-processing produced the final files
+                self._deferred_format = fmt
+            elif self.use_archive:
+                self._record_in_archive(result, fmt)
+        except Exception as e:
+            timings.switch('cleanup')
+            # Aborted reads and killed processes surface as ordinary yt-dlp errors
+            if "DOWNLOAD_CANCELLED" in str(e) or self._is_cancelled():
+                if not self.keep_partial_files:
+                    self._reap_partial_files(download_dir, reserved_names.values())
+                raise DownloadCancelled() from e
+            raise
+        finally:
+            _running_engine.engine = None
+            for reserved in reserved_names.values():
+                names.release(reserved, written=completed)
+            timings.switch(None)
+
+    def _claim_disk_space(self, info_dict, opts):
+        """
+        Claims room for the formats about to be downloaded, waiting while
+        running jobs hold it. Raises InsufficientDiskSpace if it will not fit.
+        """
+        size = estimate_size(info_dict, bool(opts.get('postprocessors')))
+        if size and not claim_space(self.disk_space, size, self._is_cancelled):
+            self._check_cancelled()
+
+    def _dl_fragmented(self, ydl, original_dl, name, info_dict, url):
+        """Runs one HLS/DASH format download with tuner-chosen fragment parallelism."""
+        tuner = get_fragment_tuner()
+        host = host_of(info_dict.get('url') or url)
+        granted = tuner.acquire(host)
+        run = self._fragment_run = FragmentRun(host, granted, info_dict.get('format_id'))
+        ydl.params['concurrent_fragment_downloads'] = granted
+        stats = None
+        try:
+            result = original_dl(name, info_dict)
+            stats = run.result()
+            self.fragment_stats.append(stats)
+            self.timings.count('fragments', stats['fragments'])
+            return result
+        finally:
+            self._fragment_run = None
+            ydl.params.pop('concurrent_fragment_downloads', None)
+            tuner.release(host, granted, stats)
+
+    def _instrument_reads(self, response, run, record):
+        """
+        Makes reads from `response` report their timing to the FragmentRun
+        and wait for the job's BandwidthStream share.
+        """
+        original_read = response.read
+        bandwidth = self.bandwidth
+        cancel_event = self._cancel_event
+        timings = self.timings
+
+        def instrumented_read(amt=None, *args, **kwargs):
+            if bandwidth is not None and bandwidth.limited:
+                # Small reads keep a throttled transfer smooth; sized readers handle short reads
+                if amt is not None and amt > THROTTLED_READ_SIZE:
+                    amt = THROTTLED_READ_SIZE
+            data = original_read(amt, *args, **kwargs)
+            if run is not None:
+                run.read(record, len(data))
+            if bandwidth is not None and data:
+                started = time.perf_counter()
+                bandwidth.consume(len(data), cancel_event)
+                timings.count('bandwidth_wait_seconds', time.perf_counter() - started)
+            return data
+
+        response.read = instrumented_read
+
+    def _defer_post_process(self, ydl, ydl_opts, filename, info_dict, files_to_move):
+        """
+        Task tuple for post-processing `filename` in another process, or None
+        if it should run inline (nothing to do but moving files, or a
+        postprocessor that can't be recreated there).
+        """
+        if not self.defer_post_processing:
+            return None
+        yt_dlp = load_yt_dlp()
+        extra_pps = info_dict.get('__postprocessors') or []
+        if not extra_pps and not ydl_opts.get('postprocessors'):
+            return None
+        names = [type(pp).__name__ for pp in extra_pps]
+        if any(getattr(yt_dlp.postprocessor, name, None) is not type(pp) for name, pp in zip(names, extra_pps)):
+            return None
+        snapshot = {key: value for key, value in info_dict.items() if key != '__postprocessors'}
+        return (filename, ydl.sanitize_info(snapshot), dict(files_to_move or {}), names)
+
+    def post_process_deferred(self, pool=None, cancel_event=None):
+        """
+        Hands the post-processing deferred by download() to `pool` (a
+        PostProcessPool, the shared one by default); blocks while the pool is
+        full. Returns a Future for the list of final file paths, or None if
+        cancelled while waiting. Cancelling the Future stops the tasks (their
+        ffmpeg is killed) and reaps their files.
+        """
+        pool = pool or get_post_process_pool()
+        params = child_options(self._deferred_params or {})
+        tasks, self.deferred = self.deferred, []
+        futures = []
+        for filename, info, files_to_move, extra_pps in tasks:
+            future = pool.submit(params, filename, info, files_to_move, extra_pps, cancel_event)
+            if future is None:
+                self._cancel_post_processing(pool, tasks, futures)
+                return None
+            futures.append(future)
+
+        result = concurrent.futures.Future()
+
+        def on_processed(combined):
+            if result.cancelled():
+                return
+            try:
+                infos = []
+                for info, phases in combined.result():
+                    infos.append(info)
+                    for phase, seconds in phases.items():
+                        self.timings.add(phase, seconds)
+                if self.use_archive:
+                    self._record_in_archive({'_type': 'playlist', 'entries': infos}, self._deferred_format)
+                result.set_result([info.get('filepath') for info in infos])
+            except concurrent.futures.InvalidStateError:
+                pass # Cancelled meanwhile
+            except Exception as e:
+                result.set_exception(e)
+
+        def on_done(_):
+            if result.cancelled():
+                self._cancel_post_processing(pool, tasks, futures)
+
+        result.add_done_callback(on_done)
+        gather(futures).add_done_callback(on_processed)
+        return result
+
+    def _cancel_post_processing(self, pool, tasks, futures):
+        """
+        Cancels the deferred `tasks`, of which the first ones were submitted
+        to `pool` as `futures`, and hands each task's files to the reaper
+        once it has stopped working on them.
+        """
+        reaper = get_file_reaper()
+        for index, task in enumerate(tasks):
+            paths = [] if self.keep_partial_files else _deferred_files(task)
+            if index < len(futures):
+                pool.cancel(futures[index])
+                futures[index].add_done_callback(lambda _, paths=paths: reaper.reap(paths))
+            else:
+                reaper.reap(paths)
+
+    def _reap_partial_files(self, download_dir, reserved_names):
+        """Hands the incomplete files of a cancelled download to the background reaper."""
+        paths = set()
+        for name in list(self._seen_filenames) + list(reserved_names):
+            path = Path(name)
+            if not path.is_absolute():
+                path = download_dir / path
+            paths.update(_with_outputs(path))
+        get_file_reaper().reap(sorted(paths))
+
+    def _download_from_info(self, ydl, url, info):
+        """
+        Runs only the format selection + download phase on an extracted info dict
+        (what yt-dlp does for --load-info-json). Falls back to a full extraction
+        if the stored streams turn out to be unusable.
+        """
+        yt_dlp = load_yt_dlp()
+        info = ydl.sanitize_info(copy.deepcopy(info), remove_private_keys=True)
+        try:
+            return ydl.process_ie_result(info, download=True)
+        except (yt_dlp.utils.DownloadError, yt_dlp.utils.ReExtractInfo) as e:
+            if "DOWNLOAD_CANCELLED" in str(e) or self._is_cancelled():
+                raise
+            return ydl.extract_info(info.get('webpage_url') or url, download=True)
+
+    def _find_in_archive(self, url, info, fmt):
+        """
+        Path of an earlier download of the same video and format, if it still
+        exists; '' if the video was imported from a yt-dlp archive (downloaded,
+        file unknown); None if it has to be downloaded.
+        """
+        try:
+            key = archive_id(info) if info else archive_id_from_url(url)
+        except Exception:
+            key = None
+        if key is None:
+            return None
+        archive = get_download_archive()
+        path = archive.lookup(key[0], key[1], fmt)
+        if path is None and archive.imported(key[0], key[1]):
+            return ''
+        return path
+
+    def _archive_match_filter(self, fmt, info_dict, *, incomplete=False):
+        """yt-dlp match_filter: skips the download if the archive already has it."""
+        if incomplete:
+            return None
+        existing = self._find_in_archive(None, info_dict, fmt)
+        if existing is not None:
+            self._current_filename = existing or None
+            self.skipped_existing = True
+            return "Already in download archive"
+        return None
+
+    def _record_in_archive(self, result, fmt):
+        archive = get_download_archive()
+        # Entries the archive filter skipped have no file and are left out
+        for entry in _downloaded_entries(result):
+            key = archive_id(entry)
+            downloads = entry.get('requested_downloads') or [entry]
+            path = downloads[-1].get('filepath')
+            if key and path:
+                archive.record(key[0], key[1], fmt, path)
+
+    def _progress_hook(self, d):
+        """Internal hook: checks for cancellation and forwards progress."""
+        # Remember the file before a cancel check can raise, so it gets cleaned up
+        self._current_filename = d.get('filename')
+        for name in (d.get('filename'), d.get('tmpfilename')):
+            if name:
+                self._seen_filenames.add(name)
+        if d.get('status') == 'downloading' and d.get('downloaded_bytes'):
+            self.timings.first_byte()
+        elif d.get('status') == 'finished':
+            self.timings.count('bytes', d.get('downloaded_bytes') or d.get('total_bytes') or 0)
+        self._check_cancelled()
+        components = self._components
+        if components is not None:
+            # One progress for the video and audio downloading side by side
+            d = components.combine(d)
+
+        if self._progress_callback:
+            run = self._fragment_run
+            if run is not None:
+                d = dict(d, fragment_parallelism=run.parallelism)
+            self._progress_callback(d)
+
+    def _postprocessor_hook(self, d):
+        """Charges inline merging and post-processing to their phases."""
+        if d.get('status') == 'started':
+            self.timings.switch('merge' if d.get('postprocessor') == 'Merger' else 'post_processing')
+        elif d.get('status') == 'finished':
+            self.timings.switch('post_processing')
+
+
+class DownloadManager:
+    """
+    Qt-free download queue: a JobScheduler whose workers run one YtDlpEngine
+    per job, with all progress collected in a shared ProgressAggregator.
+
+    `on_update(job)` is called from worker threads on every status change;
+    consumers sample `progress_aggregator.drain()` at their own rate.
+
+    With a `journal` (JobJournal), every job is logged so that jobs
+    interrupted by a shutdown or crash can be picked up again by
+    resume_journal(), continuing from their partial files.
+
+    HLS/DASH formats are fetched with parallel fragments unless
+    `parallel_fragments` is False; `max_fragment_connections` caps the
+    fragment connections of all running jobs together.
+
+    Every job draws from `bandwidth` (a BandwidthGovernor, the shared one by
+    default) in proportion to its weight.
+
+    With `pooled_post_processing`, merging and conversion run on
+    `post_process_pool` (the shared PostProcessPool by default): the job is
+    PROCESSING meanwhile and its worker already starts the next download.
+
+    The phase timings and counters of every job that ends go to `metrics`
+    (a MetricsRecorder, the shared one by default).
+
+    With a `process_pool` (core.process_pool.ProcessWorkerPool) every job
+    runs in a worker process instead of on the worker thread itself, which
+    then only relays its progress.
+
+    With `check_disk_space`, every job holds a reservation in `disk_space`
+    (a DiskSpaceLedger, the shared one by default) from the moment it is
+    queued, and fails before writing anything if its formats will not fit.
+    """
+
+    def __init__(self, max_workers=8, per_host_limit=DEFAULT_PER_HOST_LIMIT, on_update=None, use_archive=True, journal=None,
+                 parallel_fragments=True, max_fragment_connections=None, bandwidth=None,
+                 post_process_pool=None, pooled_post_processing=True, metrics=None, process_pool=None,
+                 disk_space=None, check_disk_space=True):
+        self.progress_aggregator = ProgressAggregator()
+        self.disk_space = (disk_space or get_disk_space_ledger()) if check_disk_space else None
+        self._reservations = {} # job id -> DiskReservation
+        self.process_pool = process_pool
+        self.metrics = metrics or get_metrics_recorder()
+        self._recorded = set()
+        self.post_process_pool = post_process_pool
+        self.pooled_post_processing = pooled_post_processing
+        self.bandwidth = bandwidth or get_bandwidth_governor()
+        self.use_archive = use_archive
+        self.parallel_fragments = parallel_fragments
+        if max_fragment_connections is not None:
+            get_fragment_tuner().set_limits(max_connections=max_fragment_connections)
+        self.journal = journal
+        self._on_update = on_update
+        self._engines = {}
+        self._engines_lock = threading.Lock()
+        self.scheduler = JobScheduler(
+            self._run_job,
+            max_workers=max_workers,
+            per_host_limit=per_host_limit,
+            on_update=self._on_job_update,
+        )
+
+    def add(self, url, opts=None, cookies_browser=None, title=None, info=None, journal_key=None, weight=1.0):
+        """Queues a download and returns its Job."""
+        if self.journal is not None and journal_key is None:
+            journal_key = uuid.uuid4().hex
+            if not self.journal.added(journal_key, url, opts, cookies_browser, title):
+                journal_key = None
+        return self.scheduler.submit(url, opts, cookies_browser, title, info, journal_key, weight)
+
+    def resume_journal(self):
+        """Re-queues the jobs left unfinished by the previous run. Returns them."""
+        if self.journal is None:
+            return []
+        return [
+            self.add(entry['url'], resume_opts(entry), entry.get('cookies_browser'),
+                     entry.get('title'), journal_key=entry['key'])
+            for entry in self.journal.load()
+        ]
+
+    def cancel(self, job_id):
+        self.scheduler.cancel(job_id)
+        with self._engines_lock:
+            engine = self._engines.get(job_id)
+        if engine is not None:
+            engine.cancel()
+
+    def cancel_all(self):
+        self.scheduler.cancel_all()
+        self._cancel_engines()
+
+    def _cancel_engines(self):
+        with self._engines_lock:
+            engines = list(self._engines.values())
+        for engine in engines:
+            engine.cancel()
+
+    def active_count(self):
+        return self.scheduler.active_count()
+
+    def suspend_all(self):
+        """
+        Stops all jobs for an app shutdown: partial files are kept and the
+        jobs stay in the journal, to be resumed on the next launch.
+        """
+        for job in self.scheduler.jobs():
+            if not job.done:
+                job.suspended = True
+        with self._engines_lock:
+            for engine in self._engines.values():
+                engine.keep_partial_files = True
+        self.cancel_all()
+
+    def shutdown(self, wait=True, timeout=None):
+        self.scheduler.cancel_all()
+        self._cancel_engines()
+        self.scheduler.shutdown(wait=wait, timeout=timeout)
+        if self.pooled_post_processing:
+            (self.post_process_pool or get_post_process_pool()).shutdown(wait=wait)
+        get_ydl_pool().clear()
+        if wait:
+            get_file_reaper().wait(timeout)
+        if self.journal is not None:
+            self.journal.close()
+
+    def _run_job(self, job):
+        """Runs on a scheduler worker thread."""
+        queued = time.monotonic() - job.created
+        format_ids = []
+
+        reservation = self._reservation(job)
+
+        def on_progress(d):
+            self.progress_aggregator.update(job.id, d)
+            if reservation is not None:
+                reservation.update(d)
+            if job.journal_key is None:
+                return
+            info_dict = d.get('info_dict') or {}
+            format_id = info_dict.get('format_id')
+            new_format = format_id and format_id not in format_ids
+            if new_format:
+                format_ids.append(format_id)
+            self.journal.progress(
+                job.journal_key, force=new_format or d.get('status') == 'finished',
+                filename=info_dict.get('_filename') or d.get('filename'),
+                tmpfilename=d.get('tmpfilename'),
+                format_ids=format_ids,
+                downloaded_bytes=d.get('downloaded_bytes'),
+            )
+
+        if self.process_pool is not None:
+            from core.process_pool import ProcessEngine
+            engine = ProcessEngine(self.process_pool, progress_callback=on_progress, use_archive=self.use_archive,
+                                   parallel_fragments=self.parallel_fragments)
+        else:
+            engine = YtDlpEngine(progress_callback=on_progress, use_archive=self.use_archive,
+                                 parallel_fragments=self.parallel_fragments)
+        engine.defer_post_processing = self.pooled_post_processing
+        engine.bandwidth = self.bandwidth.open(job.host, job.weight)
+        engine.disk_space = reservation
+        with self._engines_lock:
+            self._engines[job.id] = engine
+            engine.keep_partial_files = job.suspended
+        try:
+            engine.download(job.url, job.opts, job.cookies_browser,
+                            cancel_event=job.cancel_event, info=job.info)
+        except DownloadCancelled:
+            pass
+        finally:
+            engine.bandwidth.close()
+            with self._engines_lock:
+                self._engines.pop(job.id, None)
+            job.filename = engine.current_filename
+            job.skipped = engine.skipped_existing
+            job.fragment_stats = engine.fragment_stats
+            engine.timings.add('queued', queued)
+            job.timings = engine.timings
+        # A job cancelled while running was reported before its run ended
+        self._record_timings(job)
+        if engine.deferred:
+            return self._post_process(job, engine)
+
+    def _reservation(self, job):
+        """
+        The job's DiskReservation, opened with the size of its looked-up
+        formats when it is first seen. None without a disk space check.
+        """
+        if self.disk_space is None:
+            return None
+        with self._engines_lock:
+            reservation = self._reservations.get(job.id)
+            if reservation is None and not job.done:
+                folder = (job.opts.get('paths') or {}).get('home') or os.getcwd()
+                size = estimate_size(job.info, bool(job.opts.get('postprocessors'))) if job.info else 0
+                reservation = self._reservations[job.id] = self.disk_space.open(folder, size)
+            return reservation
+
+    def _post_process(self, job, engine):
+        """Queues the job's deferred post-processing; returns its Future for the scheduler."""
+        future = engine.post_process_deferred(self.post_process_pool, job.cancel_event)
+        if future is None:
+            return None # Cancelled while the pool was full
+
+        def on_processed(f):
+            # Runs before the scheduler's own callback, which reports the job
+            if not f.cancelled() and f.exception() is None and f.result():
+                job.filename = f.result()[-1]
+
+        future.add_done_callback(on_processed)
+        return future
+
+    def _record_timings(self, job):
+        """Hands the timings of an ended job to the metrics recorder, once."""
+        with self._engines_lock:
+            if not job.done or job.timings is None or job.id in self._recorded:
+                return
+            self._recorded.add(job.id)
+        self.metrics.record(job, job.timings)
+
+    def _on_job_update(self, job):
+        if job.status == Job.PENDING:
+            # Queued jobs hold their expected size too
+            self._reservation(job)
+        if job.done:
+            with self._engines_lock:
+                reservation = self._reservations.pop(job.id, None)
+            if reservation is not None:
+                reservation.close()
+            self._record_timings(job)
+            self.progress_aggregator.discard(job.id)
+            # Suspended jobs stay in the journal to be resumed
+            if job.journal_key is not None and not job.suspended:
+                self.journal.done(job.journal_key)
+        if self._on_update:
+            self._on_update(job)
@@ -0,0 +1,199 @@
+import threading
+import time
+
+# Protocols downloaded fragment by fragment by yt-dlp's native downloaders,
+# which honour `concurrent_fragment_downloads`
+FRAGMENT_PROTOCOLS = ('m3u8_native', 'http_dash_segments', 'http_dash_segments_generator', 'ism', 'f4m')
+
+# Responses that mean the server is pushing back rather than failing
+THROTTLE_STATUSES = (429, 503)
+
+# Tuning rules: start here, grow while throughput keeps improving by at least
+# GROWTH_GAIN, halve when more than ERROR_RATE of the requests were throttled
+INITIAL_PARALLELISM = 4
+GROWTH_GAIN = 1.15
+ERROR_RATE = 0.05
+
+
+def is_fragmented(info):
+    """True if this (single) format is downloaded as HLS/DASH fragments."""
+    return (info or {}).get('protocol') in FRAGMENT_PROTOCOLS
+
+
+class FragmentRun:
+    """
+    Measures one fragmented format download: every HTTP request made during
+    it is timed from request to last byte read, which gives the summed
+    per-fragment transfer time next to the wall-clock time.
+    """
+
+    def __init__(self, host, parallelism, format_id=None):
+        self.host = host
+        self.parallelism = parallelism
+        self.format_id = format_id
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._requests = [] # [start, last read, bytes]
+        self.errors = 0
+        self.throttled = 0
+
+    def request_started(self):
+        """Returns the record to pass to read() for a new request."""
+        record = [time.monotonic(), None, 0]
+        with self._lock:
+            self._requests.append(record)
+        return record
+
+    def read(self, record, size):
+        # Called from fragment threads, each with its own record
+        record[1] = time.monotonic()
+        record[2] += size
+
+    def failed(self, status=None):
+        """
+        Counts a failed request; `status` is its HTTP status, None for a
+        transport error (reset, timeout), which is not taken for throttling.
+        """
+        with self._lock:
+            self.errors += 1
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+
+    def result(self):
+        """Stats dict of the finished run."""
+        wall = max(time.monotonic() - self.started, 1e-6)
+        with self._lock:
+            requests = [r for r in self._requests if r[1] is not None]
+            errors, throttled = self.errors, self.throttled
+        busy = sum(last - start for start, last, _ in requests)
+        total_bytes = sum(size for _, _, size in requests)
+        return {
+            'format_id': self.format_id,
+            'parallelism': self.parallelism,
+            'fragments': len(requests),
+            'bytes': total_bytes,
+            'seconds': round(wall, 3),
+            'throughput': total_bytes / wall,
+            'fragment_throughput': total_bytes / busy if busy > 0 else None,
+            # Time the fragments would have taken one after another, over the time they took
+            'speedup': round(busy / wall, 2) if busy > 0 else None,
+            'errors': errors,
+            'throttled': throttled,
+        }
+
+
+class _HostState:
+    __slots__ = ('target', 'ceiling', 'rates', 'runs', 'last')
+
+    def __init__(self, target):
+        self.target = target
+        self.ceiling = None
+        self.rates = {} # parallelism -> smoothed throughput
+        self.runs = 0
+        self.last = None
+
+
+class FragmentTuner:
+    """
+    Chooses `concurrent_fragment_downloads` for each fragmented download.
+
+    Each host has its own target parallelism, learnt from finished runs:
+    it grows while the measured throughput keeps improving, backs off when
+    the server starts throttling or failing fragment requests, and otherwise
+    settles on the best level seen. All running downloads share one budget of
+    `max_connections` fragment connections, so a full job queue gets fewer
+    fragments per job instead of opening jobs × fragments connections.
+    """
+
+    def __init__(self, max_connections=32, max_per_job=16, smoothing=0.5):
+        self.max_connections = max(1, int(max_connections))
+        self.max_per_job = max(1, int(max_per_job))
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._in_use = 0
+
+    def set_limits(self, max_connections=None, max_per_job=None):
+        with self._lock:
+            if max_connections is not None:
+                self.max_connections = max(1, int(max_connections))
+            if max_per_job is not None:
+                self.max_per_job = max(1, int(max_per_job))
+
+    def _host(self, host):
+        # Caller holds self._lock
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(min(INITIAL_PARALLELISM, self.max_per_job))
+        return state
+
+    def acquire(self, host):
+        """Grants fragment connections for one download; always at least one."""
+        with self._lock:
+            state = self._host(host)
+            free = self.max_connections - self._in_use
+            granted = max(1, min(state.target, self.max_per_job, free))
+            self._in_use += granted
+        return granted
+
+    def release(self, host, granted, stats=None):
+        """Returns the connections and learns from the run's stats (FragmentRun.result())."""
+        with self._lock:
+            self._in_use = max(0, self._in_use - granted)
+            if stats and stats['fragments']:
+                self._learn(self._host(host), stats)
+
+    def _learn(self, state, stats):
+        # Caller holds self._lock
+        level = stats['parallelism']
+        state.runs += 1
+        state.last = stats
+        requests = stats['fragments'] + stats['errors']
+        if stats['throttled'] and stats['throttled'] > ERROR_RATE * requests:
+            state.ceiling = max(1, level - 1)
+            state.target = max(1, level // 2)
+            state.rates.pop(level, None)
+            return
+
+        rate = stats['throughput']
+        old = state.rates.get(level)
+        state.rates[level] = rate if old is None else self.smoothing * rate + (1 - self.smoothing) * old
+        if level < state.target:
+            return # Squeezed by the budget, says nothing about the target
+
+        lower = [l for l in state.rates if l < level]
+        higher = [l for l in state.rates if l > level]
+        best = max(state.rates, key=state.rates.get)
+        limit = min(self.max_per_job, state.ceiling or self.max_per_job)
+        gained = not lower or state.rates[level] >= GROWTH_GAIN * state.rates[max(lower)]
+        # A higher level that was measured and didn't pay off is not worth probing again
+        worth_growing = not higher or state.rates[min(higher)] >= GROWTH_GAIN * state.rates[level]
+        if gained and worth_growing:
+            state.target = min(limit, level * 2)
+        else:
+            state.target = min(limit, best)
+
+    def stats(self):
+        """Per-host tuning state, for display."""
+        with self._lock:
+            return {
+                host: {
+                    'target': state.target,
+                    'ceiling': state.ceiling,
+                    'runs': state.runs,
+                    'throughput': dict(sorted(state.rates.items())),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+_shared_tuner = None
+_shared_lock = threading.Lock()
+
+def get_fragment_tuner():
+    """Process-wide FragmentTuner instance."""
+    global _shared_tuner
+    with _shared_lock:
+        if _shared_tuner is None:
+            _shared_tuner = FragmentTuner()
+        return _shared_tuner
@@ -0,0 +1,305 @@
+import collections
+import concurrent.futures
+import itertools
+import threading
+import time
+from urllib.parse import urlparse
+
+# Concurrent downloads from one site, unless configured otherwise
+DEFAULT_PER_HOST_LIMIT = 3
+
+
+def host_of(url):
+    """Returns the lowercase host of a URL, used to group jobs per site."""
+    try:
+        host = urlparse(url).hostname or ""
+    except ValueError:
+        host = ""
+    host = host.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+class Job:
+    """
+    A single entry in the download queue.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    # Downloaded, waiting for or running post-processing; holds no worker
+    PROCESSING = "processing"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id, url, opts=None, cookies_browser=None, title=None, info=None,
+                 journal_key=None, weight=1.0):
+        self.id = job_id
+        self.url = url
+        self.opts = opts or {}
+        self.cookies_browser = cookies_browser
+        self.title = title or url
+        # Already-extracted info dict, lets the runner skip re-extraction
+        self.info = info
+        # Identifies the job in the JobJournal, if it is journaled
+        self.journal_key = journal_key
+        # Relative share of the bandwidth when it is capped
+        self.weight = weight
+        self.host = host_of(url)
+        self.status = Job.PENDING
+        self.error = None
+        self.filename = None
+        # True when the file was already in the download archive
+        self.skipped = False
+        # FragmentRun stats of the HLS/DASH formats it downloaded
+        self.fragment_stats = []
+        # Stopped by an app shutdown rather than the user: keep partial files
+        self.suspended = False
+        self.cancel_event = threading.Event()
+        self.created = time.monotonic()
+        # JobTimings of its run, set by the runner
+        self.timings = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def done(self):
+        return self.status in (Job.FINISHED, Job.FAILED, Job.CANCELLED)
+
+
+class JobScheduler:
+    """
+    Feeds queued jobs to a pool of worker threads.
+
+    At most `max_workers` jobs run at once, and at most `per_host_limit` of
+    them may target the same host. Jobs are handed out in FIFO order, skipping
+    over jobs whose host is already at its limit.
+
+    `runner(job)` does the actual work on a worker thread; it should raise on
+    failure. It may also return a concurrent.futures.Future for remaining
+    work done elsewhere: the job then becomes PROCESSING, its worker moves
+    on, and the job finishes with the future. `on_update(job)` is called
+    (from whichever thread changed it) every time a job changes status.
+    """
+
+    def __init__(self, runner, max_workers=8, per_host_limit=DEFAULT_PER_HOST_LIMIT, on_update=None):
+        self._runner = runner
+        self._on_update = on_update
+        self._max_workers = max(1, int(max_workers))
+        self._per_host_limit = max(1, int(per_host_limit))
+
+        self._cond = threading.Condition()
+        self._pending = collections.deque()
+        self._jobs = {}
+        self._host_counts = collections.Counter()
+        self._running = 0
+        self._workers = []
+        # Workers still unwinding a cancelled job whose slot was handed over
+        self._retiring = []
+        self._job_workers = {}
+        # Futures of PROCESSING jobs
+        self._job_futures = {}
+        self._ids = itertools.count(1)
+        self._shutdown = False
+
+    # --- Configuration ---
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def per_host_limit(self):
+        return self._per_host_limit
+
+    def set_limits(self, max_workers=None, per_host_limit=None):
+        """Changes pool limits; takes effect for the next job handed out."""
+        with self._cond:
+            if max_workers is not None:
+                self._max_workers = max(1, int(max_workers))
+            if per_host_limit is not None:
+                self._per_host_limit = max(1, int(per_host_limit))
+            self._ensure_workers()
+            self._cond.notify_all()
+
+    # --- Public API ---
+
+    def submit(self, url, opts=None, cookies_browser=None, title=None, info=None, journal_key=None,
+               weight=1.0):
+        """Queues a download and returns its Job."""
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler has been shut down")
+            job = Job(next(self._ids), url, opts, cookies_browser, title, info, journal_key, weight)
+            self._jobs[job.id] = job
+        # Report the job as queued before any worker can pick it up
+        self._notify(job)
+        with self._cond:
+            if not job.cancelled:
+                self._pending.append(job)
+                self._ensure_workers()
+                self._cond.notify_all()
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def active_count(self):
+        """Number of jobs that are queued, running or processing."""
+        with self._cond:
+            return len(self._pending) + self._running + len(self._job_futures)
+
+    def cancel(self, job_id):
+        """
+        Requests cancellation. Pending jobs are dropped immediately. Running
+        jobs are flagged and reported cancelled right away: their slot goes
+        to a fresh worker while the old one unwinds the runner in the background.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job.cancel_event.set()
+            future = self._job_futures.get(job.id)
+        if future is not None:
+            # Reported by _finish_processing; the future's owner stops and cleans up its work
+            future.cancel()
+            return True
+        with self._cond:
+            if job.done:
+                return False
+            if job.status == Job.PENDING:
+                if job in self._pending:
+                    self._pending.remove(job)
+            else:
+                worker = self._job_workers.pop(job.id, None)
+                if worker is None:
+                    return True # Runner is just returning, the worker reports it
+                self._release(job)
+                if worker in self._workers:
+                    self._workers.remove(worker)
+                    self._retiring.append(worker)
+                if not self._shutdown:
+                    self._ensure_workers()
+                self._cond.notify_all()
+            job.status = Job.CANCELLED
+            job.info = None
+        self._notify(job)
+        return True
+
+    def cancel_all(self):
+        for job in self.jobs():
+            self.cancel(job.id)
+
+    def shutdown(self, wait=True, timeout=None):
+        """Cancels everything and stops the worker threads."""
+        self.cancel_all()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            workers = self._workers + self._retiring
+        if wait:
+            for worker in workers:
+                worker.join(timeout)
+
+    # --- Internals ---
+
+    def _notify(self, job):
+        if self._on_update:
+            try:
+                self._on_update(job)
+            except Exception:
+                pass
+
+    def _release(self, job):
+        # Caller holds self._cond
+        self._running -= 1
+        self._host_counts[job.host] -= 1
+        if self._host_counts[job.host] <= 0:
+            del self._host_counts[job.host]
+
+    def _ensure_workers(self):
+        # Caller holds self._cond
+        self._retiring = [w for w in self._retiring if w.is_alive()]
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self._max_workers:
+            worker = threading.Thread(target=self._worker_loop, name="DownloadWorker", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        # Caller holds self._cond
+        if self._running >= self._max_workers:
+            return None
+        for job in self._pending:
+            if self._host_counts[job.host] < self._per_host_limit:
+                self._pending.remove(job)
+                return job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._shutdown:
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if job is None:
+                    return
+                self._running += 1
+                self._host_counts[job.host] += 1
+                self._job_workers[job.id] = threading.current_thread()
+                job.status = Job.RUNNING
+            self._notify(job)
+
+            future = None
+            try:
+                future = self._runner(job)
+                status, error = Job.FINISHED, None
+            except Exception as e:
+                status, error = Job.FAILED, str(e)
+            if job.cancelled:
+                status, error = Job.CANCELLED, None
+            elif isinstance(future, concurrent.futures.Future):
+                status = Job.PROCESSING
+
+            with self._cond:
+                if self._job_workers.pop(job.id, None) is None:
+                    # cancel() already reported the job and replaced this worker
+                    if isinstance(future, concurrent.futures.Future):
+                        future.cancel()
+                    return
+                self._release(job)
+                job.status = status
+                job.error = error
+                job.info = None # Can be large, no longer needed
+                if status == Job.PROCESSING:
+                    self._job_futures[job.id] = future
+                self._cond.notify_all()
+            self._notify(job)
+            if status == Job.PROCESSING:
+                future.add_done_callback(lambda f, job=job: self._finish_processing(job, f))
+
+    def _finish_processing(self, job, future):
+        """Done callback of a PROCESSING job's future."""
+        if future.cancelled() or job.cancelled:
+            status, error = Job.CANCELLED, None
+        elif future.exception() is not None:
+            status, error = Job.FAILED, str(future.exception())
+        else:
+            status, error = Job.FINISHED, None
+        with self._cond:
+            self._job_futures.pop(job.id, None)
+            job.status = status
+            job.error = error
+            self._cond.notify_all()
+        self._notify(job)
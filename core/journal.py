@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+from core.settings import get_app_data_dir
+
+# Progress records are appended at most this often per job
+PROGRESS_INTERVAL = 2.0
+
+
+class JobJournal:
+    """
+    Write-ahead log of queued and in-flight downloads, one JSON object per line.
+
+    Each job gets an "add" record (URL, options, cookies browser, title) when
+    it is queued, "progress" records with its partial file paths, selected
+    formats and bytes done while it runs, and a "done" record once it
+    finished, failed or was cancelled by the user. Jobs without a "done"
+    record were interrupted (app closed or crashed) and are returned by
+    load() so they can be re-queued. "add" and "done" are fsync'ed; a torn
+    last line after a crash is ignored.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or get_app_data_dir() / "jobs.journal")
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_progress = {}
+
+    def load(self):
+        """
+        Returns the interrupted jobs (latest state merged into the "add"
+        record, in queue order) and compacts the journal down to them.
+        """
+        entries = {}
+        with self._lock:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue # Torn write
+                        key = record.get('key')
+                        op = record.pop('op', None)
+                        if op == 'add':
+                            entries[key] = record
+                        elif op == 'progress' and key in entries:
+                            entries[key].update(record)
+                        elif op == 'done':
+                            entries.pop(key, None)
+            except FileNotFoundError:
+                pass
+            self._rewrite(entries.values())
+        return list(entries.values())
+
+    def _rewrite(self, entries):
+        # Caller holds self._lock
+        if self._file:
+            self._file.close()
+            self._file = None
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(dict(entry, op='add')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record, sync):
+        line = json.dumps(record)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line + '\n')
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def added(self, key, url, opts, cookies_browser=None, title=None):
+        """Records a newly queued job. Returns False if its options can't be stored."""
+        try:
+            self._append({'op': 'add', 'key': key, 'url': url, 'opts': opts,
+                          'cookies_browser': cookies_browser, 'title': title}, sync=True)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def progress(self, key, force=False, **fields):
+        """Records partial-download state; rate-limited unless `force`."""
+        now = time.monotonic()
+        if not force and now - self._last_progress.get(key, 0.0) < PROGRESS_INTERVAL:
+            return
+        self._last_progress[key] = now
+        self._append(dict(fields, op='progress', key=key), sync=False)
+
+    def done(self, key):
+        self._last_progress.pop(key, None)
+        self._append({'op': 'done', 'key': key}, sync=True)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def resume_opts(entry):
+    """
+    Download options that make a journaled job continue where it stopped:
+    same output file (so yt-dlp picks up the .part/fragment files) and the
+    same formats, falling back to the original selector if they are gone.
+    """
+    opts = dict(entry.get('opts') or {})
+    filename = entry.get('filename')
+    if filename:
+        opts['outtmpl'] = filename.replace('%', '%%')
+    format_ids = entry.get('format_ids')
+    if format_ids:
+        opts['format'] = f"{'+'.join(format_ids)}/{opts.get('format') or 'bestvideo*+bestaudio/best'}"
+    return opts
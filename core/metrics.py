@@ -0,0 +1,192 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# Phases of a job, in the order they happen. 'first_byte' is the time from
+# the start of the run to the first payload byte, overlapping the others.
+PHASES = ('queued', 'setup', 'extraction', 'format_selection', 'disk_wait', 'first_byte',
+          'download', 'merge', 'post_processing', 'cleanup')
+
+COUNTERS = (
+    'bytes', # Payload bytes of the downloaded files
+    'requests', # HTTP requests made
+    'retries', # Failed HTTP requests, each retried by yt-dlp until its retry limit
+    'fragments', # HLS/DASH fragments downloaded
+    'throttled', # Requests the server pushed back on (403/429/503)
+    'bandwidth_wait_seconds', # Time reads waited for the bandwidth limit
+)
+
+# The JSON-lines log is rotated to "<name>.1" beyond this size
+MAX_LOG_BYTES = 5 * 1024 * 1024
+RECENT_JOBS = 100
+
+PROMETHEUS_PREFIX = "mediadownloader"
+
+
+class JobTimings:
+    """
+    Phase timings and counters of one job run.
+
+    The running thread moves through phases with switch(); time is charged
+    to the phase that was active. Counters and first_byte() may be updated
+    from any thread (fragment downloads run on their own threads).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.phases = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._phase = None
+        self._since = self.started
+
+    def switch(self, phase):
+        """Ends the current phase and starts `phase` (None to stop timing)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._phase is not None:
+                self.phases[self._phase] = self.phases.get(self._phase, 0.0) + now - self._since
+            self._phase = phase
+            self._since = now
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def first_byte(self):
+        """Marks the arrival of the first payload byte (only the first call counts)."""
+        with self._lock:
+            if 'first_byte' not in self.phases:
+                self.phases['first_byte'] = time.monotonic() - self.started
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'phases': {phase: round(self.phases[phase], 4) for phase in PHASES if phase in self.phases},
+                'counters': {name: round(value, 4) if isinstance(value, float) else value
+                             for name, value in self.counters.items()},
+            }
+
+
+class MetricsRecorder:
+    """
+    Collects the timings of finished jobs.
+
+    Each job is appended to a JSON-lines log (`log_path`), and the running
+    totals are rewritten to a Prometheus text-format file
+    (`prometheus_path`) that node_exporter's textfile collector or a script
+    can pick up. Either path may be None. The last jobs and the totals stay
+    in memory for display.
+    """
+
+    def __init__(self, log_path=None, prometheus_path=None):
+        self._lock = threading.Lock()
+        self.log_path = None
+        self.prometheus_path = None
+        self._recent = collections.deque(maxlen=RECENT_JOBS)
+        self._jobs = collections.Counter()
+        self._phase_sums = collections.Counter()
+        self._phase_counts = collections.Counter()
+        self._counters = collections.Counter()
+        self.configure(log_path, prometheus_path)
+
+    def configure(self, log_path=None, prometheus_path=None):
+        with self._lock:
+            self.log_path = str(log_path) if log_path else None
+            self.prometheus_path = str(prometheus_path) if prometheus_path else None
+
+    def record(self, job, timings):
+        """Adds the JobTimings of a finished, failed or cancelled Job."""
+        entry = {
+            'time': round(time.time(), 3),
+            'job': job.id,
+            'url': job.url,
+            'host': job.host,
+            'status': job.status,
+        }
+        entry.update(timings.as_dict())
+        if job.error:
+            entry['error'] = job.error
+        with self._lock:
+            self._recent.append(entry)
+            self._jobs[job.status] += 1
+            for phase, seconds in entry['phases'].items():
+                self._phase_sums[phase] += seconds
+                self._phase_counts[phase] += 1
+            self._counters.update(entry['counters'])
+            try:
+                if self.log_path:
+                    self._append_log(entry)
+                if self.prometheus_path:
+                    self._write_prometheus()
+            except OSError:
+                pass # Metrics must never fail a download
+
+    def recent(self):
+        """Entries of the last jobs recorded, oldest first."""
+        with self._lock:
+            return list(self._recent)
+
+    def totals(self):
+        """{'jobs': {status: n}, 'phases': {phase: (total s, jobs)}, 'counters': {...}}"""
+        with self._lock:
+            return {
+                'jobs': dict(self._jobs),
+                'phases': {phase: (self._phase_sums[phase], self._phase_counts[phase])
+                           for phase in PHASES if self._phase_counts[phase]},
+                'counters': {name: self._counters[name] for name in COUNTERS},
+            }
+
+    def _append_log(self, entry):
+        # Caller holds self._lock
+        try:
+            if os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+        except FileNotFoundError:
+            pass
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def _write_prometheus(self):
+        # Caller holds self._lock
+        p = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {p}_jobs_total Jobs that ended, by final status.",
+            f"# TYPE {p}_jobs_total counter",
+        ]
+        lines += [f'{p}_jobs_total{{status="{status}"}} {count}' for status, count in sorted(self._jobs.items())]
+        lines += [
+            f"# HELP {p}_phase_seconds Time jobs spent in each phase.",
+            f"# TYPE {p}_phase_seconds summary",
+        ]
+        for phase in PHASES:
+            if self._phase_counts[phase]:
+                lines.append(f'{p}_phase_seconds_sum{{phase="{phase}"}} {self._phase_sums[phase]:.4f}')
+                lines.append(f'{p}_phase_seconds_count{{phase="{phase}"}} {self._phase_counts[phase]}')
+        for name in COUNTERS:
+            metric = f"{p}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {self._counters[name]}"]
+
+        # Written aside and renamed, so readers never see a half-written file
+        temp_path = self.prometheus_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self.prometheus_path)
+
+
+_shared_recorder = None
+_shared_lock = threading.Lock()
+
+def get_metrics_recorder():
+    """Process-wide MetricsRecorder instance (in memory only until configured)."""
+    global _shared_recorder
+    with _shared_lock:
+        if _shared_recorder is None:
+            _shared_recorder = MetricsRecorder()
+        return _shared_recorder
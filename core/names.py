@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+# A directory changed behind our back is rescanned at most this often
+RESCAN_INTERVAL = 30.0
+
+
+class _DirectoryIndex:
+    __slots__ = ('existing', 'reserved', 'mtime', 'scanned_at', 'next_counter')
+
+    def __init__(self):
+        self.existing = set()
+        self.reserved = set()
+        self.mtime = None
+        self.scanned_at = 0.0
+        self.next_counter = {}
+
+
+class NameIndex:
+    """
+    In-memory index of the file names taken in each download directory.
+
+    A directory is listed once with os.scandir; after that, finding a free
+    "name (N).ext" is a set lookup instead of one stat() per candidate.
+    reserve() hands out names atomically, so concurrent jobs with the same
+    title never pick the same file. Directories modified by other programs
+    are rescanned when their mtime changes (at most every RESCAN_INTERVAL).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs = {}
+
+    @staticmethod
+    def _key(name):
+        # Case-insensitive on Windows
+        return os.path.normcase(name)
+
+    def _index(self, folder):
+        # Caller holds self._lock
+        index = self._dirs.get(folder)
+        if index is None:
+            index = self._dirs[folder] = _DirectoryIndex()
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            return index # Not created yet, nothing on disk to collide with
+        now = time.monotonic()
+        if index.mtime is None or (mtime != index.mtime and now - index.scanned_at >= RESCAN_INTERVAL):
+            try:
+                with os.scandir(folder) as entries:
+                    index.existing = {self._key(entry.name) for entry in entries}
+            except OSError:
+                index.existing = set()
+            index.mtime = mtime
+            index.scanned_at = now
+        return index
+
+    def reserve(self, path):
+        """
+        Returns `path`, or the first free 'stem (N).ext' next to it, and marks
+        the returned name as taken until it is released.
+        """
+        folder, name = os.path.split(os.path.abspath(path))
+        stem, suffix = os.path.splitext(name)
+        with self._lock:
+            index = self._index(folder)
+            def taken(candidate):
+                key = self._key(candidate)
+                return key in index.existing or key in index.reserved
+
+            candidate = name
+            if taken(candidate):
+                # Resume from the last counter handed out for this name
+                counter = index.next_counter.get(self._key(name), 1)
+                while True:
+                    candidate = f"{stem} ({counter}){suffix}"
+                    if not taken(candidate):
+                        break
+                    counter += 1
+                index.next_counter[self._key(name)] = counter + 1
+            index.reserved.add(self._key(candidate))
+        return os.path.join(folder, candidate)
+
+    def release(self, path, written=False):
+        """
+        Ends a reservation. With `written=True` the name stays taken because
+        the file now exists; otherwise it becomes available again.
+        """
+        folder, name = os.path.split(os.path.abspath(path))
+        with self._lock:
+            index = self._dirs.get(folder)
+            if index is None:
+                return
+            index.reserved.discard(self._key(name))
+            if written:
+                index.existing.add(self._key(name))
+            else:
+                index.existing.discard(self._key(name))
+
+    def forget(self, folder=None):
+        """Drops cached listings so they are rescanned on next use."""
+        with self._lock:
+            if folder is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(os.path.abspath(folder), None)
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+def get_name_index():
+    """Process-wide NameIndex instance."""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = NameIndex()
+        return _shared_index
@@ -0,0 +1,161 @@
+import itertools
+
+# Entries listed per page; each page may cost the extractor one request
+PAGE_SIZE = 50
+# url results followed before giving up (channel -> tab -> playlist...)
+MAX_REDIRECTS = 5
+
+# Options of the YoutubeDL instances that enumerate playlists
+PLAYLIST_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'extract_flat': 'in_playlist',
+    'lazy_playlist': True,
+}
+
+
+def extract_unprocessed(ydl, url):
+    """
+    The extractor's own result for `url`, with redirects (url results)
+    followed but nothing else resolved: a playlist's entries stay the
+    extractor's lazy generator or paged list. The fields of a
+    url_transparent result are merged over the one it points to, as
+    YoutubeDL.process_ie_result does.
+    """
+    result = ydl.extract_info(url, download=False, process=False)
+    for _ in range(MAX_REDIRECTS):
+        result_type = (result or {}).get('_type')
+        if result_type not in ('url', 'url_transparent'):
+            break
+        inner = ydl.extract_info(result['url'], download=False, ie_key=result.get('ie_key'), process=False)
+        if result_type == 'url' or not inner:
+            result = inner
+            continue
+        exempted = {'_type', 'url', 'ie_key'}
+        if not result.get('section_end') and result.get('section_start') is None:
+            # The id etc. of a clip come from the clip's extractor
+            exempted |= {'id', 'extractor', 'extractor_key'}
+        merged = dict(inner)
+        merged.update((key, value) for key, value in result.items() if value is not None and key not in exempted)
+        if merged.get('_type') == 'url':
+            # Still a redirect: the outer fields have to carry over to its target too
+            merged['_type'] = 'url_transparent'
+        result = merged
+    return result
+
+
+def is_playlist(result):
+    return (result or {}).get('_type') in ('playlist', 'multi_video')
+
+
+def playlist_summary(result, url=None):
+    """What the UI shows about a playlist before any entry is listed."""
+    entries = result.get('entries')
+    count = result.get('playlist_count')
+    if count is None and isinstance(entries, list):
+        count = len(entries)
+    return {
+        '_type': 'playlist',
+        'id': result.get('id'),
+        'title': result.get('title') or result.get('id') or url,
+        'uploader': result.get('uploader') or result.get('channel'),
+        'playlist_count': count,
+        'webpage_url': result.get('webpage_url') or url,
+        'original_url': url or result.get('webpage_url'),
+    }
+
+
+def entry_item(entry, index):
+    """The flat fields of a playlist entry needed to list and queue it."""
+    url = entry.get('url') or entry.get('webpage_url') or entry.get('original_url')
+    if url and entry.get('ie_key') == 'Youtube' and '://' not in url:
+        url = f"https://www.youtube.com/watch?v={url}"
+    return {
+        'index': index,
+        'url': url,
+        'id': entry.get('id'),
+        'title': entry.get('title') or url,
+        'duration': entry.get('duration'),
+        'duration_string': entry.get('duration_string'),
+    }
+
+
+class PlaylistCursor:
+    """
+    Walks the entries of a playlist or channel one page at a time.
+
+    Entries are taken from the extractor as they are requested, so a
+    channel with thousands of videos costs only the pages actually listed
+    and never sits in memory as a whole. Entries are flat (URL, title,
+    duration); full metadata is left for the items the user picks. A cursor
+    holds one pooled YoutubeDL until close() or the last page, and must be
+    used from one thread at a time.
+    """
+
+    def __init__(self, url, cookies_browser=None, page_size=PAGE_SIZE):
+        self.url = url
+        self.cookies_browser = cookies_browser
+        self.page_size = max(1, int(page_size))
+        self.summary = None
+        self.exhausted = False
+        self.position = 0
+        self._ydl = None
+        self._entries = None
+        self._iterator = None
+
+    def open(self):
+        """Extracts the playlist itself (not its entries); returns playlist_summary()."""
+        from core.engine import _browser_cookie_jar
+        from core.ydl_pool import get_ydl_pool
+        pool = get_ydl_pool()
+        self._ydl = pool.acquire(PLAYLIST_OPTIONS, _browser_cookie_jar(self.cookies_browser))
+        try:
+            result = extract_unprocessed(self._ydl, self.url)
+        except Exception:
+            self.close(reusable=False)
+            raise
+        if not is_playlist(result):
+            self.close()
+            raise ValueError("Not a playlist")
+        self.summary = playlist_summary(result, self.url)
+        self._entries = result.get('entries') or []
+        return self.summary
+
+    def next_page(self):
+        """The next page of entry_item() dicts; empty once the playlist is exhausted."""
+        if self.exhausted or self._ydl is None:
+            return []
+        try:
+            entries = self._take(self.page_size)
+        except Exception:
+            self.close(reusable=False)
+            raise
+        items = []
+        for entry in entries:
+            self.position += 1
+            if entry:
+                item = entry_item(entry, self.position)
+                if item['url']:
+                    items.append(item)
+        if len(entries) < self.page_size:
+            self.close()
+        return items
+
+    def _take(self, count):
+        entries = self._entries
+        if isinstance(entries, list):
+            return entries[self.position:self.position + count]
+        if hasattr(entries, 'getslice'): # yt-dlp PagedList
+            return list(entries.getslice(self.position, self.position + count))
+        if self._iterator is None:
+            self._iterator = iter(entries)
+        return list(itertools.islice(self._iterator, count))
+
+    def close(self, reusable=True):
+        self.exhausted = True
+        self._entries = self._iterator = None
+        ydl, self._ydl = self._ydl, None
+        if ydl is not None:
+            from core.ydl_pool import get_ydl_pool
+            get_ydl_pool().release(ydl, reusable)
@@ -0,0 +1,242 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+
+# yt-dlp options that hold callables (or load cookies) and stay with the downloading process
+_PARENT_ONLY_OPTIONS = ('progress_hooks', 'postprocessor_hooks', 'match_filter', 'logger', 'cookiesfrombrowser')
+# How often a running task looks at its cancel flag
+CANCEL_POLL_INTERVAL = 0.1
+
+# In pool processes: the cancel flags shared with the parent, and the ffmpeg processes started
+_cancel_flags = None
+_processes = set()
+_processes_lock = threading.Lock()
+
+
+class PostProcessingCancelled(Exception):
+    """Raised by a pool task whose cancel flag was set."""
+
+
+def _init_child(cancel_flags):
+    """Pool process initializer: keeps the cancel flags and tracks the processes yt-dlp starts."""
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+    from yt_dlp.utils import Popen
+    original_init = Popen.__init__
+
+    def tracked_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        with _processes_lock:
+            _processes.add(self)
+
+    Popen.__init__ = tracked_init
+
+
+def _watch_cancel_flag(slot, done):
+    """Kills the task's ffmpeg processes for as long as its cancel flag is set."""
+    while not done.wait(CANCEL_POLL_INTERVAL):
+        if not _cancel_flags[slot]:
+            continue
+        with _processes_lock:
+            processes = list(_processes)
+            _processes.clear()
+        for process in processes:
+            if process.poll() is None:
+                try:
+                    process.kill()
+                except OSError:
+                    pass
+
+
+def child_options(ydl_opts):
+    """The picklable part of a download's yt-dlp options, for the post-processing process."""
+    return {key: value for key, value in ydl_opts.items() if key not in _PARENT_ONLY_OPTIONS}
+
+
+def run_post_processing(params, filename, info, files_to_move, extra_pps, slot=None):
+    """
+    Runs in a pool process: what YoutubeDL.post_process would have done
+    after the download (merge, fixups, audio extraction, moving to the final
+    folder), on a YoutubeDL rebuilt from the download's options. `extra_pps`
+    names the per-video postprocessors yt-dlp had queued (merger, fixups).
+    Returns the updated, sanitized info dict and the seconds spent merging
+    and post-processing ({'merge': s, 'post_processing': s}).
+    `slot` is the task's cancel flag: once set, its ffmpeg is killed and no
+    further postprocessor (nor moving the files) starts.
+    """
+    import yt_dlp
+    phases = {}
+    started = {}
+
+    def cancelled():
+        return slot is not None and _cancel_flags is not None and _cancel_flags[slot]
+
+    def on_postprocessor(d):
+        name = d.get('postprocessor')
+        if d.get('status') == 'started':
+            if cancelled():
+                raise PostProcessingCancelled()
+            started[name] = time.perf_counter()
+        elif d.get('status') == 'finished' and name in started:
+            phase = 'merge' if name == 'Merger' else 'post_processing'
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - started.pop(name)
+
+    done = threading.Event()
+    if slot is not None and _cancel_flags is not None:
+        threading.Thread(target=_watch_cancel_flag, args=(slot, done), daemon=True).start()
+    try:
+        with yt_dlp.YoutubeDL(params) as ydl:
+            ydl.add_postprocessor_hook(on_postprocessor)
+            info['__postprocessors'] = [getattr(yt_dlp.postprocessor, name)(ydl) for name in extra_pps]
+            info = ydl.post_process(filename, info, files_to_move)
+            info.pop('__postprocessors', None)
+            return ydl.sanitize_info(info), phases
+    except Exception as e:
+        # A killed ffmpeg surfaces as an ordinary postprocessor error
+        if cancelled():
+            raise PostProcessingCancelled() from e
+        raise
+    finally:
+        done.set()
+        if cancelled():
+            _forget_ffmpeg_versions()
+
+
+def _forget_ffmpeg_versions():
+    """
+    Drops the ffmpeg versions yt-dlp cached in this process: a version probe
+    killed by a cancel would otherwise make ffmpeg look missing from then on.
+    """
+    from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor
+    FFmpegPostProcessor._version_cache.clear()
+    FFmpegPostProcessor._version_cache[None] = None
+    FFmpegPostProcessor._features_cache.clear()
+
+
+def gather(futures):
+    """A Future for the list of results of `futures`, or the first exception among them."""
+    combined = concurrent.futures.Future()
+    futures = list(futures)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        try:
+            combined.set_result([future.result() for future in futures])
+        except concurrent.futures.InvalidStateError:
+            pass # Cancelled meanwhile
+        except Exception as e:
+            try:
+                combined.set_exception(e)
+            except concurrent.futures.InvalidStateError:
+                pass
+
+    if not futures:
+        combined.set_result([])
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+class PostProcessPool:
+    """
+    Process pool for ffmpeg post-processing, so a worker thread can start its
+    next download while the previous file is still being transcoded.
+
+    At most `max_pending` tasks (queued or running) exist at a time; submit()
+    blocks beyond that, which holds back new downloads instead of letting
+    finished-but-unprocessed files pile up on disk.
+
+    Every task holds one of `max_pending` slots, each with a cancel flag in
+    memory shared with the pool processes; cancel() sets it to stop a task
+    that already runs in a child (see run_post_processing).
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.max_pending = max(1, max_pending or self.max_workers * 2)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        # Spawned rather than forked: the parent has Qt and worker threads running
+        self._context = multiprocessing.get_context('spawn')
+        self._cancel_flags = self._context.RawArray('b', self.max_pending)
+        self._free_slots = list(range(self.max_pending))
+        self._task_slots = {} # Future -> slot
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    self.max_workers, mp_context=self._context,
+                    initializer=_init_child, initargs=(self._cancel_flags,))
+            return self._executor
+
+    def submit(self, params, filename, info, files_to_move, extra_pps, cancel_event=None):
+        """
+        Queues a post-processing task and returns its Future, or None if
+        `cancel_event` was set while waiting for room in the queue.
+        """
+        while not self._slots.acquire(timeout=0.2):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+        with self._lock:
+            slot = self._free_slots.pop()
+            self._cancel_flags[slot] = 0
+        try:
+            future = self._pool().submit(run_post_processing, params, filename, info, files_to_move, extra_pps, slot)
+        except Exception:
+            self._release_slot(slot)
+            raise
+        with self._lock:
+            self._task_slots[future] = slot
+        future.add_done_callback(self._task_done)
+        return future
+
+    def cancel(self, future):
+        """
+        Cancels a task of this pool: a queued one is dropped, a running one
+        has its ffmpeg killed and ends with PostProcessingCancelled (unless
+        it was already done). Files it leaves behind are the caller's.
+        """
+        if future.cancel():
+            return
+        with self._lock:
+            # Under the lock: once the task is done its slot may go to another one
+            slot = self._task_slots.get(future)
+            if slot is not None:
+                self._cancel_flags[slot] = 1
+
+    def _task_done(self, future):
+        with self._lock:
+            slot = self._task_slots.pop(future)
+        self._release_slot(slot)
+
+    def _release_slot(self, slot):
+        with self._lock:
+            self._free_slots.append(slot)
+        self._slots.release()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+def get_post_process_pool():
+    """Process-wide PostProcessPool instance."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = PostProcessPool()
+        return _shared_pool
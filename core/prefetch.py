@@ -0,0 +1,126 @@
+import collections
+import concurrent.futures
+import threading
+import time
+
+from core.cache import normalize_url
+
+# Prefetched metadata is handed out only this long; stream URLs go stale
+PREFETCH_TTL = 120
+MAX_PREFETCHED = 8
+# The newest lookup plus one it superseded that was already extracting
+MAX_WORKERS = 2
+
+
+class MetadataPrefetcher:
+    """
+    Looks up the metadata of a link before the user asks for it.
+
+    prefetch() queues a lookup and drops the queued lookups it supersedes
+    (one already extracting cannot be interrupted; it runs to the end and
+    its result is kept). Only links a specific extractor recognizes are
+    looked up: anything else would go to the generic extractor, which
+    downloads arbitrary pages. Results stay in memory for PREFETCH_TTL
+    seconds until take() hands them over.
+
+    `on_result(url, info, error)` is called from a pool thread as each
+    lookup ends: `info` on success, `error` (the message) on failure, both
+    None when the link was not recognized and nothing was fetched.
+    """
+
+    def __init__(self, on_result=None, fetch_info=None, is_supported=None, ttl=PREFETCH_TTL,
+                 max_workers=MAX_WORKERS):
+        self._on_result = on_result
+        self._fetch_info = fetch_info or self._engine_fetch_info
+        self._is_supported = is_supported or self._engine_is_supported
+        self.ttl = ttl
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max(1, int(max_workers)), thread_name_prefix="MetadataPrefetcher")
+        self._lock = threading.Lock()
+        self._pending = {} # key -> future
+        self._results = collections.OrderedDict() # key -> (monotonic time, info)
+        self._stats = collections.Counter()
+
+    @staticmethod
+    def _engine_fetch_info(url, cookies_browser, use_cache):
+        from core.engine import YtDlpEngine
+        return YtDlpEngine().fetch_info(url, cookies_browser, use_cache)
+
+    @staticmethod
+    def _engine_is_supported(url):
+        from core.engine import specific_extractor
+        return specific_extractor(url) is not None
+
+    @staticmethod
+    def _key(url, cookies_browser):
+        return normalize_url(url), cookies_browser
+
+    def prefetch(self, url, cookies_browser=None, use_cache=True):
+        """Starts looking up `url` unless it already is or was. Returns True if a lookup was queued."""
+        key = self._key(url, cookies_browser)
+        with self._lock:
+            self._expire()
+            if key in self._results or key in self._pending:
+                return False
+            for other, future in list(self._pending.items()):
+                if future.cancel():
+                    del self._pending[other]
+                    self._stats['superseded'] += 1
+            self._pending[key] = self._executor.submit(self._resolve, key, url, cookies_browser, use_cache)
+            self._stats['started'] += 1
+        return True
+
+    def _resolve(self, key, url, cookies_browser, use_cache):
+        info = error = None
+        try:
+            if self._is_supported(url):
+                info = self._fetch_info(url, cookies_browser, use_cache)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        with self._lock:
+            self._pending.pop(key, None)
+            if info is not None:
+                self._results[key] = (time.monotonic(), info)
+                self._results.move_to_end(key)
+                while len(self._results) > MAX_PREFETCHED:
+                    self._results.popitem(last=False)
+        if self._on_result:
+            self._on_result(url, info, error)
+
+    def _expire(self):
+        # Caller holds self._lock
+        limit = time.monotonic() - self.ttl
+        for key, (fetched, _) in list(self._results.items()):
+            if fetched < limit:
+                del self._results[key]
+
+    def take(self, url, cookies_browser=None):
+        """The prefetched info of `url` (removed from the prefetcher), or None."""
+        key = self._key(url, cookies_browser)
+        with self._lock:
+            self._expire()
+            entry = self._results.pop(key, None)
+            self._stats['hits' if entry else 'misses'] += 1
+        return entry[1] if entry else None
+
+    def is_pending(self, url, cookies_browser=None):
+        """Whether `url` is being looked up; on_result reports it when done."""
+        with self._lock:
+            return self._key(url, cookies_browser) in self._pending
+
+    def stats(self):
+        """{'started', 'superseded', 'hits', 'misses'} since creation."""
+        with self._lock:
+            return {name: self._stats[name] for name in ('started', 'superseded', 'hits', 'misses')}
+
+    def cancel(self):
+        """Drops queued lookups and prefetched results."""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending = {key: f for key, f in self._pending.items() if not f.cancelled()}
+            self._results.clear()
+
+    def shutdown(self, wait=True):
+        self.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,31 @@
+# Quality presets shared by the GUI and the command line
+QUALITY_PRESETS = {
+    "Best Quality": {}, # Default behavior
+    "1080p": {'format': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]'},
+    "720p": {'format': 'bestvideo[height<=720]+bestaudio/best[height<=720]'},
+    "480p": {'format': 'bestvideo[height<=480]+bestaudio/best[height<=480]'},
+    "Audio Only (MP3)": {
+        'format': 'bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }],
+    }
+}
+
+def build_download_opts(quality, download_path, connections=1, preallocate=False):
+    """
+    yt-dlp options for a quality preset, saving into download_path.
+    `connections` above 1 selects the segmented downloader for progressive
+    files; `preallocate` allocates them at full size before downloading.
+    """
+    opts = {
+        'paths': {'home': str(download_path)}
+    }
+    opts.update(QUALITY_PRESETS.get(quality, {}))
+    if connections > 1:
+        opts['segmented_connections'] = connections
+    if preallocate:
+        opts['preallocate'] = True
+    return opts
@@ -0,0 +1,613 @@
+import collections
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import signal
+import threading
+import time
+
+from core.bandwidth import BURST
+from core.fragments import get_fragment_tuner
+from core.metrics import JobTimings
+from core.names import get_name_index
+from core.reaper import get_file_reaper
+
+# A cancelled worker gets this long to clean up and return before it is killed
+CANCEL_GRACE = 3.0
+# How often the parent checks for cancellation while waiting on a worker
+POLL_INTERVAL = 0.05
+# Progress messages a worker sends at most this often (status changes go at once)
+PROGRESS_INTERVAL = 0.1
+# How often a worker reports its reads to the parent's BandwidthGovernor
+BANDWIDTH_REPORT_INTERVAL = 0.25
+
+# Progress hook fields that cross the pipe, as a tuple in this order,
+# followed by the format id and final file name of the info dict
+_PROGRESS_FIELDS = ('status', 'filename', 'tmpfilename', 'downloaded_bytes', 'total_bytes',
+                    'total_bytes_estimate', 'speed', 'eta', 'fragment_parallelism')
+
+
+def pack_progress(d):
+    info = d.get('info_dict') or {}
+    return tuple(d.get(field) for field in _PROGRESS_FIELDS) + (info.get('format_id'), info.get('_filename'))
+
+
+def unpack_progress(packed):
+    d = dict(zip(_PROGRESS_FIELDS, packed))
+    d['info_dict'] = {'format_id': packed[-2], '_filename': packed[-1]}
+    return d
+
+
+class WorkerError(Exception):
+    """A job failed in (or with) its worker process; the message is the worker's."""
+
+
+# --- Worker process side ---
+
+class _Channel:
+    """
+    Worker end of the pipe. Any thread may send; one thread reads, handling
+    cancellation and bandwidth updates at once and queueing tasks for the
+    main thread.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.tasks = queue.Queue()
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._calls = itertools.count()
+        self._replies = {} # call id -> [Event, value]
+        self._cancelled = set()
+        self.task_id = None
+        self.cancel_event = None
+        self.engine = None
+        self.bandwidth = None
+
+    def send(self, message):
+        with self._send_lock:
+            self.conn.send(message)
+
+    def call(self, kind, *args):
+        """Asks the parent for something and waits for its reply."""
+        call_id = next(self._calls)
+        waiter = [threading.Event(), None]
+        with self._lock:
+            self._replies[call_id] = waiter
+        self.send((kind, call_id) + args)
+        waiter[0].wait()
+        return waiter[1]
+
+    def start_task(self, task_id):
+        with self._lock:
+            self.task_id = task_id
+            self.cancel_event = threading.Event()
+            if task_id in self._cancelled:
+                self.cancel_event.set()
+            return self.cancel_event
+
+    def end_task(self):
+        with self._lock:
+            self._cancelled.discard(self.task_id)
+            self.task_id = self.cancel_event = self.engine = self.bandwidth = None
+
+    def listen(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                os._exit(0) # The parent is gone
+            kind = message[0]
+            if kind == 'reply':
+                with self._lock:
+                    waiter = self._replies.pop(message[1], None)
+                if waiter is not None:
+                    waiter[1] = message[2]
+                    waiter[0].set()
+            elif kind == 'cancel':
+                _, task_id, keep_partial_files = message
+                with self._lock:
+                    self._cancelled.add(task_id)
+                    current = task_id == self.task_id
+                    engine = self.engine
+                if current:
+                    self.cancel_event.set()
+                    if engine is not None:
+                        engine.keep_partial_files = engine.keep_partial_files or keep_partial_files
+                        engine.cancel()
+            elif kind == 'rate':
+                bandwidth = self.bandwidth
+                if bandwidth is not None:
+                    bandwidth.rate = message[1]
+            else:
+                self.tasks.put(message)
+
+
+class _RemoteBandwidth:
+    """
+    The job's BandwidthStream as seen from its worker: a local token bucket
+    at the rate the parent last granted. Reads are reported back so the
+    parent keeps sharing its limits out between all running jobs.
+    """
+
+    def __init__(self, channel, rate):
+        self._channel = channel
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._refilled = self._reported = time.monotonic()
+        self._unreported = 0
+
+    @property
+    def limited(self):
+        return self.rate is not None
+
+    def consume(self, size, cancel_event=None):
+        with self._lock:
+            now = time.monotonic()
+            self._unreported += size
+            if now - self._reported >= BANDWIDTH_REPORT_INTERVAL:
+                self._channel.send(('bandwidth', self._unreported))
+                self._unreported = 0
+                self._reported = now
+            rate = self.rate
+            if rate is None:
+                self._tokens = 0.0
+                self._refilled = now
+                return
+            self._tokens = min(rate * BURST, self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            self._tokens -= size
+            delay = -self._tokens / rate if self._tokens < 0 else 0.0
+        deadline = time.monotonic() + delay
+        while delay > 0:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if cancel_event is not None:
+                cancel_event.wait(min(delay, 0.25))
+            else:
+                time.sleep(min(delay, 0.25))
+            delay = deadline - time.monotonic()
+
+    def close(self):
+        pass
+
+
+class _RemoteNameIndex:
+    """Output names reserved in the parent's NameIndex, which all workers share."""
+
+    def __init__(self, channel):
+        self._channel = channel
+
+    def reserve(self, path):
+        return self._channel.call('reserve', path)
+
+    def release(self, path, written=False):
+        self._channel.send(('release', path, written))
+
+    def forget(self, folder=None):
+        pass
+
+
+class _RemoteDiskSpace:
+    """The job's DiskReservation, held in the parent's DiskSpaceLedger."""
+
+    def __init__(self, channel):
+        self._channel = channel
+
+    def try_claim(self, size):
+        return tuple(self._channel.call('disk_claim', size))
+
+
+def _run_task(channel, task, cancel_event):
+    from core.engine import YtDlpEngine
+    kind, _, *args = task
+    if kind == 'fetch_info':
+        return YtDlpEngine().fetch_info(*args)
+
+    url, opts, cookies_browser, info, settings = args
+    last = [0.0, None] # time and format of the last progress sent
+
+    def on_progress(d):
+        now = time.monotonic()
+        format_id = (d.get('info_dict') or {}).get('format_id')
+        if d.get('status') == 'downloading' and format_id == last[1] and now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[:] = [now, format_id]
+        channel.send(('progress', pack_progress(d)))
+
+    engine = YtDlpEngine(progress_callback=on_progress, use_archive=settings['use_archive'],
+                         parallel_fragments=settings['parallel_fragments'])
+    engine.keep_partial_files = settings['keep_partial_files']
+    engine.bandwidth = channel.bandwidth = _RemoteBandwidth(channel, settings['rate'])
+    if settings['disk_space']:
+        engine.disk_space = _RemoteDiskSpace(channel)
+    get_fragment_tuner().set_limits(max_connections=settings['max_fragment_connections'])
+    channel.engine = engine
+    if cancel_event.is_set():
+        engine.cancel()
+    engine.download(url, opts, cookies_browser, cancel_event=cancel_event, info=info)
+    return {
+        'filename': engine.current_filename,
+        'skipped': engine.skipped_existing,
+        'fragment_stats': engine.fragment_stats,
+        'timings': engine.timings.as_dict(),
+    }
+
+
+def _worker_main(conn):
+    """Entry point of a worker process: runs the tasks the parent sends, one at a time."""
+    import core.names
+    from core.engine import DownloadCancelled, warm_up
+
+    # Ctrl+C in a terminal reaches the whole process group; the parent decides what stops
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    channel = _Channel(conn)
+    # File names are handed out by the parent, so jobs in different workers never collide
+    core.names._shared_index = _RemoteNameIndex(channel)
+    threading.Thread(target=channel.listen, name="WorkerChannel", daemon=True).start()
+    warm_up()
+    while True:
+        task = channel.tasks.get()
+        if task[0] == 'exit':
+            return
+        cancel_event = channel.start_task(task[1])
+        try:
+            channel.send(('result', _run_task(channel, task, cancel_event)))
+        except DownloadCancelled:
+            channel.send(('cancelled',))
+        except Exception as e:
+            channel.send(('error', str(e) or type(e).__name__))
+        finally:
+            channel.end_task()
+
+
+# --- Parent side ---
+
+class WorkerProcess:
+    """A spawned worker process and the parent end of its pipe."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,),
+                                       name="MediaDownloaderWorker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._send_lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def send(self, message):
+        with self._send_lock:
+            self.conn.send(message)
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.send(('exit',))
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ProcessWorkerPool:
+    """
+    Worker processes for ProcessEngine, spawned on demand up to
+    `max_processes`.
+
+    Processes are started with 'spawn', so they inherit nothing from the GUI
+    process. A worker runs one task at a time and is kept for the next one,
+    with yt-dlp imported and its YoutubeDL instances warm; one that was
+    killed or crashed is replaced on demand. Jobs in different workers run
+    on different cores.
+    """
+
+    def __init__(self, max_processes=None):
+        self.max_processes = max(1, int(max_processes or os.cpu_count() or 2))
+        self._context = multiprocessing.get_context('spawn')
+        self._cond = threading.Condition()
+        self._idle = []
+        self._count = 0
+        self._closed = False
+        self._stats = collections.Counter()
+
+    def configure(self, max_processes):
+        with self._cond:
+            self.max_processes = max(1, int(max_processes))
+            self._cond.notify_all()
+
+    def acquire(self):
+        """A worker to run one task on, waiting while all are busy."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise WorkerError("Worker pool is shut down")
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._count -= 1
+                if self._count < self.max_processes:
+                    self._count += 1
+                    break
+                self._cond.wait()
+        try:
+            worker = WorkerProcess(self._context)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['spawned'] += 1
+        return worker
+
+    def release(self, worker, reusable=True):
+        with self._cond:
+            keep = reusable and not self._closed and worker.alive
+            if keep:
+                self._idle.append(worker)
+            else:
+                self._count -= 1
+                self._stats['retired'] += 1
+            self._cond.notify()
+        if not keep:
+            worker.stop()
+
+    def prewarm(self, count=1):
+        """Starts workers ahead of the first tasks (they import yt-dlp meanwhile)."""
+        workers = []
+        with self._cond:
+            count = min(count, self.max_processes) - len(self._idle)
+        try:
+            for _ in range(max(0, count)):
+                workers.append(self.acquire())
+        finally:
+            for worker in workers:
+                self.release(worker)
+
+    def fetch_info(self, url, cookies_browser=None, use_cache=True):
+        """YtDlpEngine.fetch_info, run in a worker."""
+        return ProcessEngine(self).fetch_info(url, cookies_browser, use_cache)
+
+    def stats(self):
+        """{'spawned', 'retired', 'killed', 'idle', 'busy'}"""
+        with self._cond:
+            return {
+                'spawned': self._stats['spawned'],
+                'retired': self._stats['retired'],
+                'killed': self._stats['killed'],
+                'idle': len(self._idle),
+                'busy': self._count - len(self._idle),
+            }
+
+    def count_killed(self):
+        with self._cond:
+            self._stats['killed'] += 1
+
+    def shutdown(self):
+        """Stops the idle workers; busy ones stop when their task ends."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+_task_ids = itertools.count(1)
+
+
+class ProcessEngine:
+    """
+    YtDlpEngine's download() and fetch_info() run in a worker process from
+    `pool`, behind the same interface, so the Qt and queue layers use either.
+
+    Progress comes back as compact tuples, at most every PROGRESS_INTERVAL
+    per file. The worker throttles its own reads at the rate the job's
+    BandwidthStream grants, and reserves file names through this process.
+    cancel() asks the worker to stop; if it has not returned after
+    CANCEL_GRACE seconds (a hung extractor, a blocking read), the process is
+    killed and the partial files are removed from here. Post-processing
+    always runs in the worker, as part of the job.
+    """
+
+    def __init__(self, pool=None, progress_callback=None, use_archive=True, parallel_fragments=True):
+        self.pool = pool or get_process_pool()
+        self._progress_callback = progress_callback
+        self.use_archive = use_archive
+        self.parallel_fragments = parallel_fragments
+        self.fragment_stats = []
+        self.timings = JobTimings()
+        self.bandwidth = None
+        self.disk_space = None
+        # Accepted for YtDlpEngine compatibility; workers post-process inline
+        self.defer_post_processing = False
+        self.deferred = []
+        self.skipped_existing = False
+        self.keep_partial_files = False
+        self._current_filename = None
+        self._cancel_requested = False
+        self._cancel_event = None
+        self._lock = threading.Lock()
+        self._worker = None
+        self._task_id = None
+        self._cancel_sent = False
+        self._files = set()
+        self._reserved = set()
+
+    @property
+    def current_filename(self):
+        return self._current_filename
+
+    def cancel(self):
+        """Cancels the running task; safe to call from any thread."""
+        self._cancel_requested = True
+        self._send_cancel()
+
+    def _is_cancelled(self):
+        return self._cancel_requested or bool(self._cancel_event and self._cancel_event.is_set())
+
+    def _send_cancel(self):
+        with self._lock:
+            worker, task_id = self._worker, self._task_id
+            if worker is None or self._cancel_sent:
+                return
+            self._cancel_sent = True
+        try:
+            worker.send(('cancel', task_id, self.keep_partial_files))
+        except (OSError, ValueError):
+            pass
+
+    def fetch_info(self, url, cookies_browser=None, use_cache=True):
+        self._cancel_requested = False
+        self._cancel_event = None
+        return self._run('fetch_info', url, cookies_browser, use_cache)
+
+    def download(self, url, opts=None, cookies_browser=None, cancel_event=None, info=None):
+        """See YtDlpEngine.download."""
+        from core.engine import DownloadCancelled
+        self._cancel_requested = False
+        self._cancel_event = cancel_event
+        self._current_filename = None
+        self.fragment_stats = []
+        self.timings = JobTimings()
+        self.skipped_existing = False
+        self._files = set()
+        self._reserved = set()
+        settings = {
+            'use_archive': self.use_archive,
+            'parallel_fragments': self.parallel_fragments,
+            'keep_partial_files': self.keep_partial_files,
+            'rate': self.bandwidth.report() if self.bandwidth is not None else None,
+            'disk_space': self.disk_space is not None,
+            'max_fragment_connections': get_fragment_tuner().max_connections,
+        }
+        try:
+            result = self._run('download', url, opts or {}, cookies_browser, info, settings)
+        except DownloadCancelled:
+            self.timings.switch(None)
+            raise
+        self._current_filename = result['filename']
+        self.skipped_existing = result['skipped']
+        self.fragment_stats = result['fragment_stats']
+        for phase, seconds in result['timings']['phases'].items():
+            self.timings.add(phase, seconds)
+        for name, value in result['timings']['counters'].items():
+            self.timings.count(name, value)
+        return self._current_filename if self.skipped_existing else None
+
+    def _run(self, kind, *args):
+        from core.engine import DownloadCancelled
+        worker = self.pool.acquire()
+        task_id = next(_task_ids)
+        with self._lock:
+            self._worker, self._task_id, self._cancel_sent = worker, task_id, False
+        reusable = False
+        try:
+            worker.send((kind, task_id) + args)
+            deadline = None
+            while True:
+                if self._is_cancelled():
+                    self._send_cancel()
+                    if deadline is None:
+                        deadline = time.monotonic() + CANCEL_GRACE
+                    elif time.monotonic() > deadline:
+                        self._kill(worker)
+                        raise DownloadCancelled()
+                ready = multiprocessing.connection.wait([worker.conn, worker.process.sentinel], POLL_INTERVAL)
+                if not ready:
+                    continue
+                try:
+                    message = worker.conn.recv()
+                except (EOFError, OSError):
+                    if self._is_cancelled():
+                        raise DownloadCancelled()
+                    raise WorkerError("Worker process exited unexpectedly")
+                result = self._handle(worker, message)
+                if result is not None:
+                    reusable = True
+                    return result
+        except (DownloadCancelled, WorkerError):
+            # A worker that reported the failure itself is fine to reuse
+            reusable = worker.alive
+            raise
+        finally:
+            with self._lock:
+                self._worker = None
+            self.pool.release(worker, reusable and worker.alive)
+
+    def _handle(self, worker, message):
+        """Handles a message of the running task. Returns its result once done; raises if it failed."""
+        from core.engine import DownloadCancelled
+        kind = message[0]
+        if kind == 'progress':
+            d = unpack_progress(message[1])
+            for name in (d.get('filename'), d.get('tmpfilename')):
+                if name:
+                    self._files.add(name)
+            if d.get('filename'):
+                self._current_filename = d['filename']
+            if self._progress_callback:
+                self._progress_callback(d)
+        elif kind == 'bandwidth':
+            if self.bandwidth is not None:
+                worker.send(('rate', self.bandwidth.report()))
+        elif kind == 'reserve':
+            _, call_id, path = message
+            name = get_name_index().reserve(path)
+            self._reserved.add(name)
+            worker.send(('reply', call_id, name))
+        elif kind == 'disk_claim':
+            _, call_id, size = message
+            claim = self.disk_space.try_claim(size) if self.disk_space is not None else ('ok', None)
+            worker.send(('reply', call_id, claim))
+        elif kind == 'release':
+            _, path, written = message
+            self._reserved.discard(path)
+            get_name_index().release(path, written)
+        elif kind == 'result':
+            return message[1]
+        elif kind == 'cancelled':
+            raise DownloadCancelled()
+        elif kind == 'error':
+            if self._is_cancelled():
+                raise DownloadCancelled()
+            raise WorkerError(message[1])
+        return None
+
+    def _kill(self, worker):
+        """Kills a worker that did not stop when asked, and cleans up after it."""
+        worker.kill()
+        self.pool.count_killed()
+        names = get_name_index()
+        for name in self._reserved:
+            names.release(name)
+        if not self.keep_partial_files:
+            get_file_reaper().reap(sorted(self._files | self._reserved))
+        self._reserved = set()
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+def get_process_pool():
+    """Process-wide ProcessWorkerPool (one worker per CPU until configured)."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ProcessWorkerPool()
+        return _shared_pool
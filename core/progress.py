@@ -0,0 +1,116 @@
+import threading
+import time
+
+
+class _JobProgress:
+    __slots__ = (
+        'status', 'filename', 'downloaded', 'total', 'hint_speed', 'dirty',
+        'sample_time', 'sample_bytes', 'speed', 'parallelism',
+    )
+
+    def __init__(self):
+        self.status = 'downloading'
+        self.filename = None
+        self.downloaded = 0
+        self.total = 0
+        self.hint_speed = None
+        self.dirty = False
+        self.sample_time = None
+        self.sample_bytes = 0
+        self.speed = None
+        self.parallelism = None
+
+
+class ProgressAggregator:
+    """
+    Collects raw yt-dlp progress hook calls and turns them into UI-rate samples.
+
+    `update()` is called from download threads for every chunk and only stores
+    the latest counters. `drain()` is called at a fixed rate (e.g. 10 Hz) by the
+    consumer and returns one state dict per job that changed since the last
+    drain, with numeric percent, an exponentially smoothed speed and the ETA
+    derived from it. The consumer's load therefore depends on the sampling rate
+    and the number of jobs, not on how fast chunks arrive.
+    """
+
+    def __init__(self, smoothing=0.3):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def update(self, key, d):
+        """Records a yt-dlp progress hook dict for job `key`."""
+        status = d.get('status')
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = _JobProgress()
+            filename = d.get('filename')
+            if filename != job.filename:
+                # New file within the same job (e.g. the audio part of a merge)
+                job.filename = filename
+                job.sample_time = None
+                job.speed = None
+            job.status = status
+            if status == 'downloading':
+                job.downloaded = d.get('downloaded_bytes') or 0
+                job.total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+                job.hint_speed = d.get('speed')
+                job.parallelism = d.get('fragment_parallelism')
+            elif status == 'finished':
+                job.downloaded = job.total = d.get('total_bytes') or job.downloaded
+            job.dirty = True
+
+    def discard(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def drain(self):
+        """Returns {key: state} for every job updated since the previous call."""
+        now = time.monotonic()
+        states = {}
+        with self._lock:
+            for key, job in self._jobs.items():
+                if not job.dirty:
+                    continue
+                job.dirty = False
+                states[key] = self._sample(job, now)
+        return states
+
+    def _sample(self, job, now):
+        if job.status == 'finished':
+            return {'status': 'finished', 'filename': job.filename, 'percent': 100.0}
+
+        if job.sample_time is not None:
+            elapsed = now - job.sample_time
+            delta = job.downloaded - job.sample_bytes
+            if elapsed > 0 and delta >= 0:
+                current = delta / elapsed
+                if job.speed is None:
+                    job.speed = current
+                else:
+                    job.speed = self.smoothing * current + (1 - self.smoothing) * job.speed
+        job.sample_time = now
+        job.sample_bytes = job.downloaded
+
+        speed = job.speed if job.speed is not None else (job.hint_speed or 0)
+        percent = 0.0
+        eta = None
+        if job.total:
+            percent = min(100.0, job.downloaded * 100.0 / job.total)
+            if speed > 0:
+                eta = max(0, job.total - job.downloaded) / speed
+
+        state = {
+            'status': 'downloading',
+            'filename': job.filename or 'Unknown',
+            'downloaded_bytes': job.downloaded,
+            'total_bytes': job.total,
+            'speed': speed,
+            'eta': eta,
+            'percent': percent,
+        }
+        if job.parallelism:
+            # Fragments downloaded in parallel (HLS/DASH)
+            state['fragment_parallelism'] = job.parallelism
+        return state
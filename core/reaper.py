@@ -0,0 +1,107 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# Waits between attempts at deleting a file that is still in use (Windows
+# keeps files locked until every handle, e.g. a just-killed ffmpeg's, is gone)
+RETRY_DELAYS = (0.25, 0.5, 1.0, 2.0, 4.0)
+
+
+class FileReaper:
+    """
+    Deletes the leftovers of cancelled downloads on a background thread, so
+    the worker that cancelled can move on to its next job right away.
+
+    reap(path) removes every file in the same folder whose name starts with
+    the name of `path` (the file itself, .part, .ytdl, .part-FragN, ...).
+    Files that can't be deleted yet are retried with growing delays.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._tasks = [] # Heap of (due, seq, path, attempt)
+        self._seq = itertools.count()
+        self._busy = 0
+        self._thread = None
+
+    def reap(self, paths):
+        """Schedules removal of `paths` and their related files."""
+        now = time.monotonic()
+        with self._cond:
+            for path in paths:
+                if path:
+                    heapq.heappush(self._tasks, (now, next(self._seq), str(path), 0))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="FileReaper", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Blocks until nothing is left to delete. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._tasks or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._tasks:
+                        self._cond.notify_all()
+                        self._cond.wait()
+                        continue
+                    delay = self._tasks[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                _, _, path, attempt = heapq.heappop(self._tasks)
+                self._busy += 1
+            try:
+                locked = self._remove_related(path)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    if locked and attempt < len(RETRY_DELAYS):
+                        heapq.heappush(self._tasks, (time.monotonic() + RETRY_DELAYS[attempt],
+                                                     next(self._seq), path, attempt + 1))
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _remove_related(path):
+        """Deletes `path` and its siblings with the same name prefix. True if some were locked."""
+        folder, name = os.path.split(os.path.abspath(path))
+        locked = False
+        try:
+            with os.scandir(folder) as entries:
+                matches = [entry.path for entry in entries if entry.name.startswith(name)]
+        except OSError:
+            return False
+        for match in matches:
+            try:
+                os.remove(match)
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                locked = True
+            except OSError:
+                pass
+        return locked
+
+
+_shared_reaper = None
+_shared_lock = threading.Lock()
+
+def get_file_reaper():
+    """Process-wide FileReaper instance."""
+    global _shared_reaper
+    with _shared_lock:
+        if _shared_reaper is None:
+            _shared_reaper = FileReaper()
+        return _shared_reaper
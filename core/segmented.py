@@ -0,0 +1,272 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+from yt_dlp.utils import ContentTooShortError, parse_http_range
+from yt_dlp.utils.networking import HTTPHeaderDict
+
+from core.diskspace import preallocate
+
+# Connections per file when a job asks for segmented downloads without a number
+DEFAULT_CONNECTIONS = 4
+MAX_CONNECTIONS = 16
+# Smaller files are left to the native downloader, the extra requests would not pay off
+MIN_SEGMENTED_SIZE = 4 * 1024 * 1024
+MIN_SEGMENT_SIZE = 1024 * 1024
+# More segments than connections: connections that finish early pick up the rest
+SEGMENTS_PER_CONNECTION = 4
+READ_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 0.1
+# Segment positions saved next to the .part file this often, for resuming
+STATE_INTERVAL = 1.0
+STATE_SUFFIX = '.segments'
+# Errors answered by retrying the segment; other 4xx responses are final
+RETRY_STATUSES = (408, 429)
+
+
+def is_segmentable(info_dict, params):
+    """True if this (single) format is one plain HTTP file the segmented downloader can take."""
+    url = info_dict.get('url') or ''
+    return (info_dict.get('protocol') in ('http', 'https') and '\n' not in url
+            and not info_dict.get('request_data') and not params.get('external_downloader')
+            and not params.get('http_chunk_size'))
+
+
+def plan_segments(total, connections):
+    """[start, end, position] byte ranges (inclusive ends) covering `total` bytes."""
+    count = max(1, min(connections * SEGMENTS_PER_CONNECTION, total // MIN_SEGMENT_SIZE))
+    size = -(-total // count)
+    return [[start, min(start + size, total) - 1, start] for start in range(0, total, size)]
+
+
+def segmented_dl(ydl, name, info_dict, connections=DEFAULT_CONNECTIONS, preallocate=False):
+    """
+    Stands in for ydl.dl(name, info_dict) with a SegmentedHttpFD, reporting
+    to the same progress hooks.
+    """
+    fd = SegmentedHttpFD(ydl, ydl.params, connections, preallocate)
+    for hook in ydl._progress_hooks:
+        fd.add_progress_hook(hook)
+    new_info = ydl._copy_infodict(info_dict)
+    if new_info.get('http_headers') is None:
+        new_info['http_headers'] = ydl._calc_headers(new_info)
+    return fd.download(name, new_info)
+
+
+class SegmentedHttpFD(HttpFD):
+    """
+    yt-dlp's HTTP downloader, fetching the file as byte ranges over several
+    connections at once.
+
+    The .part file is allocated at the full size up front and every segment
+    is written at its own offset. Each segment retries on its own; their
+    positions are saved to `<part file>.segments`, so an interrupted
+    download continues where every segment stopped. Servers that do not
+    answer a range request with 206, files of unknown size and small files
+    go through the native single-connection download instead.
+
+    With `preallocate` the .part file's blocks are allocated up front (in
+    one extent where the filesystem supports it) rather than left sparse;
+    with a single connection that is all this downloader changes.
+    """
+    FD_NAME = 'segmented'
+
+    def __init__(self, ydl, params, connections=DEFAULT_CONNECTIONS, preallocate=False):
+        super().__init__(ydl, params)
+        self.connections = max(1, min(int(connections), MAX_CONNECTIONS))
+        self.preallocate = preallocate
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._downloaded = 0
+
+    def real_download(self, filename, info_dict):
+        tmpfilename = self.temp_name(filename)
+        probe = self._probe(info_dict) if self.connections > 1 or self.preallocate else None
+        if probe is None or probe[0] < MIN_SEGMENTED_SIZE:
+            # A preallocated .part would look complete to the native resume
+            self._discard(tmpfilename)
+            return super().real_download(filename, info_dict)
+        total, last_modified = probe
+
+        segments = self._load_state(tmpfilename, total)
+        if segments is None:
+            segments = plan_segments(total, self.connections)
+            resume_len = os.path.getsize(tmpfilename) if os.path.isfile(tmpfilename) else 0
+            if 0 < resume_len < total and self.params.get('continuedl', True):
+                # A native download stopped here: its bytes are kept
+                for segment in segments:
+                    segment[2] = max(segment[0], min(resume_len, segment[1] + 1))
+            elif resume_len:
+                os.remove(tmpfilename)
+        self.report_destination(filename)
+        with open(tmpfilename, 'ab') as f:
+            if f.tell() != total:
+                if self.preallocate:
+                    preallocate(f, total)
+                else:
+                    f.truncate(total)
+        self._save_state(tmpfilename, total, segments)
+
+        self._downloaded = resumed = sum(s[2] - s[0] for s in segments)
+        pending = [s for s in segments if s[2] <= s[1]]
+        started = time.time()
+        workers = min(self.connections, max(1, len(pending)))
+        executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="SegmentedDownload")
+        futures = [executor.submit(self._worker, tmpfilename, info_dict, pending) for _ in range(workers)]
+        saved = time.monotonic()
+        try:
+            while True:
+                done, running = concurrent.futures.wait(
+                    futures, PROGRESS_INTERVAL, concurrent.futures.FIRST_EXCEPTION)
+                for future in done:
+                    future.result()
+                if not running:
+                    break
+                now = time.time()
+                downloaded = self._downloaded
+                speed = self.calc_speed(started, now, downloaded - resumed)
+                self._hook_progress({
+                    'status': 'downloading',
+                    'downloaded_bytes': downloaded,
+                    'total_bytes': total,
+                    'tmpfilename': tmpfilename,
+                    'filename': filename,
+                    'eta': self.calc_eta(speed, total - downloaded),
+                    'speed': speed,
+                    'elapsed': now - started,
+                }, info_dict)
+                if time.monotonic() - saved >= STATE_INTERVAL:
+                    self._save_state(tmpfilename, total, segments)
+                    saved = time.monotonic()
+        finally:
+            self._stop.set()
+            executor.shutdown(wait=True)
+            if any(s[2] <= s[1] for s in segments):
+                self._save_state(tmpfilename, total, segments)
+
+        self._discard_state(tmpfilename)
+        self.try_rename(tmpfilename, filename)
+        if self.params.get('updatetime'):
+            info_dict.setdefault('filetime', self.try_utime(filename, last_modified))
+        self._hook_progress({
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - started,
+        }, info_dict)
+        return True
+
+    def _request(self, info_dict, start, end):
+        headers = HTTPHeaderDict({'Accept-Encoding': 'identity'}, info_dict.get('http_headers'))
+        headers['Range'] = f'bytes={start}-{end}'
+        extensions = {}
+        impersonate_target = self._get_impersonate_target(info_dict)
+        if impersonate_target is not None:
+            extensions['impersonate'] = impersonate_target
+        return self.ydl.urlopen(Request(info_dict['url'], headers=headers, extensions=extensions))
+
+    def _probe(self, info_dict):
+        """(size, Last-Modified) if the server serves byte ranges of a known size, else None."""
+        try:
+            response = self._request(info_dict, 0, 0)
+        except (HTTPError, TransportError):
+            return None # The native downloader retries and reports it
+        try:
+            if response.status != 206:
+                return None
+            _, _, total = parse_http_range(response.headers.get('Content-Range'))
+            return (total, response.headers.get('Last-Modified')) if total else None
+        finally:
+            response.close()
+
+    def _worker(self, tmpfilename, info_dict, pending):
+        with open(tmpfilename, 'r+b') as f:
+            while not self._stop.is_set():
+                with self._lock:
+                    if not pending:
+                        return
+                    segment = pending.pop(0)
+                self._download_segment(f, info_dict, segment)
+
+    def _download_segment(self, f, info_dict, segment):
+        retries = self.params.get('retries', 10)
+        count = 0
+        while segment[2] <= segment[1] and not self._stop.is_set():
+            position = segment[2]
+            # Only network errors are retried: failing to write the .part file (disk full...) ends the download
+            try:
+                self._fetch(f, info_dict, segment)
+            except (HTTPError, TransportError, ContentTooShortError) as e:
+                if self._stop.is_set():
+                    return
+                if isinstance(e, HTTPError) and e.status < 500 and e.status not in RETRY_STATUSES:
+                    raise
+                # Only failures in a row count, a segment that made progress starts over
+                count = 1 if segment[2] > position else count + 1
+                if count > retries:
+                    raise
+                self.report_retry(e, count, retries)
+
+    def _fetch(self, f, info_dict, segment):
+        start, end = segment[2], segment[1]
+        response = self._request(info_dict, start, end)
+        try:
+            served_start, _, _ = parse_http_range(response.headers.get('Content-Range'))
+            if response.status != 206 or served_start != start:
+                raise ContentTooShortError(0, end - start + 1)
+            while segment[2] <= end:
+                data = response.read(min(READ_SIZE, end - segment[2] + 1))
+                if not data:
+                    raise ContentTooShortError(segment[2] - start, end - start + 1)
+                f.seek(segment[2])
+                f.write(data)
+                with self._lock:
+                    segment[2] += len(data)
+                    self._downloaded += len(data)
+                if self._stop.is_set():
+                    return
+        finally:
+            response.close()
+
+    def _load_state(self, tmpfilename, total):
+        """Segments saved by an interrupted run of the same file, or None."""
+        if not self.params.get('continuedl', True) or not os.path.isfile(tmpfilename):
+            return None
+        try:
+            with open(tmpfilename + STATE_SUFFIX, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('size') != total or os.path.getsize(tmpfilename) != total:
+            return None
+        return state.get('segments')
+
+    def _save_state(self, tmpfilename, total, segments):
+        with self._lock:
+            state = {'size': total, 'segments': [list(s) for s in segments]}
+        try:
+            with open(tmpfilename + STATE_SUFFIX, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+        except OSError:
+            pass # Only resuming suffers
+
+    def _discard_state(self, tmpfilename):
+        try:
+            os.remove(tmpfilename + STATE_SUFFIX)
+        except OSError:
+            pass
+
+    def _discard(self, tmpfilename):
+        """Removes a segmented .part and its state, leaving native .part files alone."""
+        if os.path.isfile(tmpfilename + STATE_SUFFIX):
+            self._discard_state(tmpfilename)
+            try:
+                os.remove(tmpfilename)
+            except OSError:
+                pass
@@ -1,7 +1,22 @@
 import json
 import os
+import sys
 from pathlib import Path
 
+from core.jobs import DEFAULT_PER_HOST_LIMIT
+
+APP_NAME = "MediaDownloader"
+
+def get_app_data_dir():
+    """Per-user directory for caches and databases (created on demand)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    path = Path(base) / APP_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
 class SettingsManager:
     def __init__(self, filename="settings.json"):
         self.filename = filename
@@ -38,3 +53,151 @@ class SettingsManager:
     def set_cookies_browser(self, browser):
         self.settings["cookies_browser"] = browser
         self.save_settings()
+
+    def get_max_concurrent_downloads(self):
+        return int(self.settings.get("max_concurrent_downloads", 8))
+
+    def set_max_concurrent_downloads(self, count):
+        self.settings["max_concurrent_downloads"] = int(count)
+        self.save_settings()
+
+    def get_per_host_limit(self):
+        return int(self.settings.get("per_host_limit", DEFAULT_PER_HOST_LIMIT))
+
+    def set_per_host_limit(self, count):
+        self.settings["per_host_limit"] = int(count)
+        self.save_settings()
+
+    def get_archive_enabled(self):
+        return bool(self.settings.get("archive_enabled", True))
+
+    def set_archive_enabled(self, enabled):
+        self.settings["archive_enabled"] = bool(enabled)
+        self.save_settings()
+
+    def get_metadata_cache_enabled(self):
+        return bool(self.settings.get("metadata_cache_enabled", True))
+
+    def set_metadata_cache_enabled(self, enabled):
+        self.settings["metadata_cache_enabled"] = bool(enabled)
+        self.save_settings()
+
+    def get_parallel_fragments_enabled(self):
+        return bool(self.settings.get("parallel_fragments_enabled", True))
+
+    def set_parallel_fragments_enabled(self, enabled):
+        self.settings["parallel_fragments_enabled"] = bool(enabled)
+        self.save_settings()
+
+    def get_max_fragment_connections(self):
+        return int(self.settings.get("max_fragment_connections", 32))
+
+    def set_max_fragment_connections(self, count):
+        self.settings["max_fragment_connections"] = int(count)
+        self.save_settings()
+
+    def get_bandwidth_limit(self):
+        """Global download rate cap in bytes/s, 0 for unlimited."""
+        return int(self.settings.get("bandwidth_limit", 0))
+
+    def set_bandwidth_limit(self, rate):
+        self.settings["bandwidth_limit"] = int(rate or 0)
+        self.save_settings()
+
+    def get_host_bandwidth_limits(self):
+        """{host: bytes/s} caps for individual sites."""
+        return dict(self.settings.get("host_bandwidth_limits", {}))
+
+    def set_host_bandwidth_limits(self, limits):
+        self.settings["host_bandwidth_limits"] = {host: int(rate) for host, rate in limits.items()}
+        self.save_settings()
+
+    def get_bandwidth_schedule(self):
+        """[{'start': 'HH:MM', 'end': 'HH:MM', 'rate': bytes/s or null}] overriding the global cap."""
+        return list(self.settings.get("bandwidth_schedule", []))
+
+    def set_bandwidth_schedule(self, schedule):
+        self.settings["bandwidth_schedule"] = list(schedule)
+        self.save_settings()
+
+    def get_background_post_processing_enabled(self):
+        return bool(self.settings.get("background_post_processing", True))
+
+    def set_background_post_processing_enabled(self, enabled):
+        self.settings["background_post_processing"] = bool(enabled)
+        self.save_settings()
+
+    def get_metrics_enabled(self):
+        """Write per-job timings to metrics.jsonl / metrics.prom in the app data directory."""
+        return bool(self.settings.get("metrics_enabled", True))
+
+    def set_metrics_enabled(self, enabled):
+        self.settings["metrics_enabled"] = bool(enabled)
+        self.save_settings()
+
+    def get_metadata_workers(self):
+        """Links of a pasted/dropped batch whose metadata is looked up at once."""
+        return int(self.settings.get("metadata_workers", 4))
+
+    def set_metadata_workers(self, count):
+        self.settings["metadata_workers"] = int(count)
+        self.save_settings()
+
+    def get_prefetch_enabled(self):
+        """Look up the metadata of a supported link as soon as it is typed into the URL field."""
+        return bool(self.settings.get("prefetch_enabled", True))
+
+    def set_prefetch_enabled(self, enabled):
+        self.settings["prefetch_enabled"] = bool(enabled)
+        self.save_settings()
+
+    def get_clipboard_watch_enabled(self):
+        """Also prefetch supported links copied to the clipboard while the app is open."""
+        return bool(self.settings.get("clipboard_watch_enabled", False))
+
+    def set_clipboard_watch_enabled(self, enabled):
+        self.settings["clipboard_watch_enabled"] = bool(enabled)
+        self.save_settings()
+
+    def get_process_isolation_enabled(self):
+        """Run downloads and lookups in worker processes: several cores, and hung jobs can be killed."""
+        return bool(self.settings.get("process_isolation", False))
+
+    def set_process_isolation_enabled(self, enabled):
+        self.settings["process_isolation"] = bool(enabled)
+        self.save_settings()
+
+    def get_worker_processes(self):
+        """Worker processes with process isolation on; 0 sizes the pool to the download limit."""
+        return int(self.settings.get("worker_processes", 0))
+
+    def set_worker_processes(self, count):
+        self.settings["worker_processes"] = int(count)
+        self.save_settings()
+
+    def get_segmented_connections(self):
+        """
+        Connections per progressive file (byte ranges in parallel); 1, the
+        default, keeps yt-dlp's native single-stream downloader.
+        """
+        return int(self.settings.get("segmented_connections", 1))
+
+    def set_segmented_connections(self, count):
+        self.settings["segmented_connections"] = int(count)
+        self.save_settings()
+
+    def get_disk_space_check_enabled(self):
+        """Fail a job before it starts writing if its formats will not fit in the download folder."""
+        return bool(self.settings.get("disk_space_check", True))
+
+    def set_disk_space_check_enabled(self, enabled):
+        self.settings["disk_space_check"] = bool(enabled)
+        self.save_settings()
+
+    def get_preallocate_enabled(self):
+        """Allocate progressive files at full size before downloading, against fragmentation."""
+        return bool(self.settings.get("preallocate_files", False))
+
+    def set_preallocate_enabled(self, enabled):
+        self.settings["preallocate_files"] = bool(enabled)
+        self.save_settings()
@@ -0,0 +1,213 @@
+import contextlib
+import json
+import threading
+import time
+
+# Idle instances are closed, with their connections, after this long
+IDLE_TIMEOUT = 120
+MAX_IDLE_PER_PROFILE = 4
+MAX_IDLE = 16
+
+
+def profile_key(params, cookiejar=None):
+    """Instances are shared between uses with equal options and the same cookie jar."""
+    return (json.dumps(params, sort_keys=True, default=repr),
+            id(cookiejar) if cookiejar is not None else None)
+
+
+class _Pooled:
+    __slots__ = ('ydl', 'key', 'params', 'progress_hooks', 'postprocessor_hooks', 'pp_hooks', 'released')
+
+    def __init__(self, ydl, key):
+        self.ydl = ydl
+        self.key = key
+        # State right after construction, restored before every reuse
+        self.params = dict(ydl.params)
+        self.progress_hooks = list(ydl._progress_hooks)
+        self.postprocessor_hooks = list(ydl._postprocessor_hooks)
+        # add_postprocessor_hook() also adds the hook to every postprocessor
+        self.pp_hooks = [(pp, list(pp._progress_hooks)) for pps in ydl._pps.values() for pp in pps]
+        self.released = 0.0
+
+
+class YoutubeDLPool:
+    """
+    Reusable YoutubeDL instances, one set per option profile (the options
+    and the cookie jar they were built with).
+
+    A reused instance has already parsed its options, set up its
+    postprocessors and extractors, and keeps its HTTP sessions, so requests
+    to a host it talked to before go over a kept-alive connection instead of
+    a new TCP/TLS handshake. Between uses the instance is reset: per-use
+    method patches, hooks and options are dropped, download counters zeroed.
+    An instance that raised is closed instead of reused. Idle instances are
+    closed after `idle_timeout` seconds, or beyond `max_idle_per_profile`
+    per profile and `max_idle` overall.
+    """
+
+    def __init__(self, max_idle_per_profile=MAX_IDLE_PER_PROFILE, max_idle=MAX_IDLE, idle_timeout=IDLE_TIMEOUT):
+        self.max_idle_per_profile = max_idle_per_profile
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._idle = {} # profile key -> [_Pooled], most recently released last
+        self._borrowed = {} # id(ydl) -> _Pooled
+        self._thread = None
+        self._stats = {'created': 0, 'reused': 0, 'closed': 0}
+
+    def acquire(self, params, cookiejar=None):
+        """A YoutubeDL for `params` using `cookiejar`; give it back with release()."""
+        key = profile_key(params, cookiejar)
+        with self._cond:
+            idle = self._idle.get(key)
+            # The most recently used one has the freshest connections
+            pooled = idle.pop() if idle else None
+            if idle == []:
+                del self._idle[key]
+            self._stats['reused' if pooled else 'created'] += 1
+        if pooled is None:
+            pooled = self._create(key, params, cookiejar)
+        with self._cond:
+            self._borrowed[id(pooled.ydl)] = pooled
+        return pooled.ydl
+
+    def release(self, ydl, reusable=True):
+        """Returns an instance from acquire(); it is closed unless `reusable`."""
+        with self._cond:
+            pooled = self._borrowed.pop(id(ydl), None)
+        if pooled is None:
+            return
+        if reusable:
+            try:
+                self._reset(pooled)
+            except Exception:
+                reusable = False
+        if not reusable or self.max_idle_per_profile <= 0:
+            self._close([pooled])
+            return
+
+        with self._cond:
+            pooled.released = time.monotonic()
+            idle = self._idle.setdefault(pooled.key, [])
+            idle.append(pooled)
+            excess = idle[:-self.max_idle_per_profile]
+            del idle[:-self.max_idle_per_profile]
+            excess += self._over_total()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="YoutubeDLPool", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        self._close(excess)
+
+    @contextlib.contextmanager
+    def borrow(self, params, cookiejar=None):
+        """acquire() as a context manager; the instance is not reused if the block raised."""
+        ydl = self.acquire(params, cookiejar)
+        reusable = False
+        try:
+            yield ydl
+            reusable = True
+        finally:
+            self.release(ydl, reusable)
+
+    def prewarm(self, params, cookiejar=None):
+        """Builds an instance for `params` and leaves it idle in the pool."""
+        self.release(self.acquire(params, cookiejar))
+
+    def clear(self):
+        """Closes every idle instance."""
+        with self._cond:
+            idle = [pooled for instances in self._idle.values() for pooled in instances]
+            self._idle.clear()
+        self._close(idle)
+
+    def stats(self):
+        """Counters of instances created, reused and closed, and how many are idle."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['idle'] = sum(len(instances) for instances in self._idle.values())
+            stats['borrowed'] = len(self._borrowed)
+        return stats
+
+    def _create(self, key, params, cookiejar):
+        import yt_dlp
+        # YoutubeDL keeps (and modifies) the dict it is given
+        ydl = yt_dlp.YoutubeDL(dict(params))
+        if cookiejar is not None:
+            ydl.cookiejar = cookiejar
+        return _Pooled(ydl, key)
+
+    @staticmethod
+    def _reset(pooled):
+        ydl = pooled.ydl
+        # Methods patched on the instance for one use
+        for name, value in list(vars(ydl).items()):
+            if callable(value) and callable(getattr(type(ydl), name, None)):
+                delattr(ydl, name)
+        ydl.params.clear()
+        ydl.params.update(pooled.params)
+        ydl._progress_hooks[:] = pooled.progress_hooks
+        ydl._postprocessor_hooks[:] = pooled.postprocessor_hooks
+        for pp, hooks in pooled.pp_hooks:
+            pp._progress_hooks[:] = hooks
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        ydl._num_videos = 0
+        ydl._playlist_level = 0
+        ydl._playlist_urls = set()
+
+    def _over_total(self):
+        # Caller holds self._cond; removes and returns the oldest idle instances beyond max_idle
+        idle = sorted((pooled for instances in self._idle.values() for pooled in instances),
+                      key=lambda pooled: pooled.released)
+        excess = idle[:max(0, len(idle) - self.max_idle)]
+        for pooled in excess:
+            self._remove(pooled)
+        return excess
+
+    def _remove(self, pooled):
+        # Caller holds self._cond
+        instances = self._idle.get(pooled.key, [])
+        if pooled in instances:
+            instances.remove(pooled)
+        if not instances:
+            self._idle.pop(pooled.key, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    idle = [pooled for instances in self._idle.values() for pooled in instances]
+                    expired = [pooled for pooled in idle if now - pooled.released >= self.idle_timeout]
+                    if expired:
+                        break
+                    if idle:
+                        self._cond.wait(min(pooled.released for pooled in idle) + self.idle_timeout - now)
+                    else:
+                        self._cond.wait()
+                for pooled in expired:
+                    self._remove(pooled)
+            self._close(expired)
+
+    def _close(self, instances):
+        for pooled in instances:
+            try:
+                pooled.ydl.close()
+            except Exception:
+                pass
+        if instances:
+            with self._cond:
+                self._stats['closed'] += len(instances)
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+def get_ydl_pool():
+    """Process-wide YoutubeDLPool instance."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = YoutubeDLPool()
+        return _shared_pool
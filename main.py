@@ -1,12 +1,21 @@
+import multiprocessing
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
 
 def main():
+    # Headless mode: `main.py --cli ...` runs the batch downloader without loading Qt
+    if len(sys.argv) > 1 and sys.argv[1] == "--cli":
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[2:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Post-processing pool children of the frozen executable start here
+    multiprocessing.freeze_support()
     main()
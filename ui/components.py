@@ -1,12 +1,14 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-    QPushButton, QFrame, QGraphicsDropShadowEffect, QComboBox
+    QPushButton, QFrame, QGraphicsDropShadowEffect, QComboBox,
+    QProgressBar, QScrollArea, QGridLayout, QListWidget, QListWidgetItem, QAbstractItemView
 )
-from PyQt6.QtCore import Qt, QSize, QUrl
-from PyQt6.QtGui import QPixmap, QColor, QFontMetrics
-from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest
+from PyQt6.QtCore import Qt, QSize, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap, QColor, QFontMetrics, QIcon
 from PyQt6.QtWidgets import QSizePolicy
 
+from ui.thumbnails import get_thumbnail_service
+
 class FlexibleLabel(QLabel):
     def __init__(self, text="", parent=None):
         super().__init__(text, parent)
@@ -61,8 +63,11 @@ class VideoCard(QFrame):
 
         self.layout.addLayout(self.info_layout)
         
-        # Network Manager for async image loading
-        self.network_manager = QNetworkAccessManager()
+        # Shared, cached thumbnail loading (decoded off the GUI thread)
+        self.thumbnails = get_thumbnail_service()
+        self.thumbnails.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self.thumbnails.thumbnail_failed.connect(self._on_thumbnail_failed)
+        self._thumbnail_url = None
 
         # Hidden by default until data is loaded
         self.setVisible(False)
@@ -73,25 +78,34 @@ class VideoCard(QFrame):
         self._load_thumbnail(thumbnail_url)
         self.setVisible(True)
 
+    def _thumbnail_size(self):
+        # In device pixels, so HiDPI screens get a sharp image
+        return self.thumbnail_label.size() * self.thumbnail_label.devicePixelRatioF()
+
     def _load_thumbnail(self, url):
+        self._thumbnail_url = url or None
+        self.thumbnail_label.clear()
         if not url:
             self.thumbnail_label.setText("No Image")
             return
 
-        request = QNetworkRequest(QUrl(url))
-        reply = self.network_manager.get(request)
-        reply.finished.connect(lambda: self._on_thumbnail_loaded(reply))
-
-    def _on_thumbnail_loaded(self, reply):
-        reply.deleteLater()
-        if reply.error() == reply.NetworkError.NoError:
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            self.thumbnail_label.setPixmap(pixmap)
-        else:
+        image = self.thumbnails.load(url, self._thumbnail_size())
+        if image is not None:
+            self._show_thumbnail(image)
+
+    def _on_thumbnail_ready(self, url, size, image):
+        if url == self._thumbnail_url and size == self._thumbnail_size():
+            self._show_thumbnail(image)
+
+    def _on_thumbnail_failed(self, url):
+        if url == self._thumbnail_url:
             self.thumbnail_label.setText("No Image")
 
+    def _show_thumbnail(self, image):
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.thumbnail_label.devicePixelRatioF())
+        self.thumbnail_label.setPixmap(pixmap)
+
 class MaterialComboBox(QComboBox):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -113,3 +127,381 @@ class MaterialButton(QPushButton):
             shadow.setYOffset(2)
             shadow.setColor(QColor(0, 0, 0, 60))
             self.setGraphicsEffect(shadow)
+
+class JobItemWidget(QFrame):
+    """One row in the download queue: title, status, progress and a cancel button."""
+    cancel_requested = pyqtSignal(int)
+
+    def __init__(self, job_id, title, parent=None):
+        super().__init__(parent)
+        self.job_id = job_id
+        self.setObjectName("SurfaceCard")
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(12, 8, 12, 8)
+        layout.setSpacing(12)
+
+        info_layout = QVBoxLayout()
+        info_layout.setSpacing(4)
+
+        self.title_label = QLabel(title)
+        self.title_label.setStyleSheet("font-weight: bold;")
+        self.title_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Preferred)
+        info_layout.addWidget(self.title_label)
+
+        self.status_label = QLabel("Queued")
+        self.status_label.setObjectName("DurationLabel")
+        self.status_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Preferred)
+        info_layout.addWidget(self.status_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(False)
+        info_layout.addWidget(self.progress_bar)
+
+        layout.addLayout(info_layout, stretch=1)
+
+        self.cancel_btn = MaterialButton("Cancel", primary=False)
+        self.cancel_btn.clicked.connect(lambda: self.cancel_requested.emit(self.job_id))
+        layout.addWidget(self.cancel_btn)
+
+    def set_status(self, text):
+        self.status_label.setText(text)
+
+    def set_progress(self, percent):
+        self.progress_bar.setValue(int(percent))
+
+    def set_done(self, text, success=False):
+        self.status_label.setText(text)
+        self.cancel_btn.setEnabled(False)
+        if success:
+            self.progress_bar.setValue(100)
+
+class JobListWidget(QScrollArea):
+    """Scrollable list of JobItemWidgets, newest at the bottom."""
+    cancel_requested = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWidgetResizable(True)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+
+        self._container = QWidget()
+        self._layout = QVBoxLayout(self._container)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._layout.setSpacing(8)
+        self._layout.addStretch()
+        self.setWidget(self._container)
+
+        self._items = {}
+
+    def add_job(self, job_id, title):
+        item = JobItemWidget(job_id, title)
+        item.cancel_requested.connect(self.cancel_requested)
+        # Insert before the trailing stretch
+        self._layout.insertWidget(self._layout.count() - 1, item)
+        self._items[job_id] = item
+        return item
+
+    def item(self, job_id):
+        return self._items.get(job_id)
+
+    def clear_finished(self):
+        for job_id, item in list(self._items.items()):
+            if not item.cancel_btn.isEnabled():
+                self._layout.removeWidget(item)
+                item.deleteLater()
+                del self._items[job_id]
+
+class StatsPanel(QFrame):
+    """
+    Where download time goes: average time per phase and the counters of
+    all jobs recorded by a MetricsRecorder, refreshed while visible.
+    """
+    PHASE_NAMES = {
+        'queued': "Queued", 'setup': "Setup", 'extraction': "Extraction",
+        'format_selection': "Format selection", 'disk_wait': "Waiting for disk space",
+        'first_byte': "Time to first byte",
+        'download': "Download", 'merge': "Merge", 'post_processing': "Post-processing",
+        'cleanup': "Cleanup",
+    }
+
+    def __init__(self, recorder, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.setObjectName("SurfaceCard")
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 8, 12, 8)
+        self.jobs_label = QLabel()
+        self.jobs_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.jobs_label)
+
+        self._grid = QGridLayout()
+        self._grid.setHorizontalSpacing(16)
+        self._grid.setVerticalSpacing(2)
+        layout.addLayout(self._grid)
+
+        self.counters_label = QLabel()
+        self.counters_label.setObjectName("DurationLabel")
+        self.counters_label.setWordWrap(True)
+        layout.addWidget(self.counters_label)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+
+    def refresh(self):
+        totals = self.recorder.totals()
+        jobs = totals['jobs']
+        self.jobs_label.setText(
+            f"{sum(jobs.values())} job(s): " + ", ".join(f"{count} {status}" for status, count in sorted(jobs.items()))
+            if jobs else "No finished jobs yet")
+
+        while self._grid.count():
+            widget = self._grid.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        for row, (phase, (seconds, count)) in enumerate(totals['phases'].items()):
+            self._grid.addWidget(QLabel(self.PHASE_NAMES.get(phase, phase)), row, 0)
+            average = QLabel(f"{seconds / count:.2f} s avg")
+            average.setAlignment(Qt.AlignmentFlag.AlignRight)
+            self._grid.addWidget(average, row, 1)
+            total = QLabel(f"{seconds:.1f} s total")
+            total.setAlignment(Qt.AlignmentFlag.AlignRight)
+            self._grid.addWidget(total, row, 2)
+
+        counters = totals['counters']
+        self.counters_label.setText(
+            f"{counters['bytes'] / (1024 * 1024):.1f} MiB, {counters['requests']} requests, "
+            f"{counters['retries']} retries, {counters['fragments']} fragments, "
+            f"{counters['throttled']} throttled, {counters['bandwidth_wait_seconds']:.1f} s waiting for the rate limit")
+
+BATCH_ICON_SIZE = QSize(64, 36)
+
+class BatchPanel(QFrame):
+    """
+    Links added in bulk, filled in with their title as the metadata arrives.
+    Emits the URLs to download when the user queues all or the selected ones.
+
+    Also lists a playlist or channel page by page (set_playlist, add_entries):
+    its entries arrive with flat metadata only, and the panel asks for the
+    full metadata of those the user selects (lookup_requested).
+    """
+    queue_requested = pyqtSignal(list)
+    queue_rest_requested = pyqtSignal() # Queue All on a playlist not fully listed yet
+    lookup_requested = pyqtSignal(list)
+    more_requested = pyqtSignal()
+    dismissed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("SurfaceCard")
+        self.setFrameShape(QFrame.Shape.StyledPanel)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 8, 12, 8)
+        layout.setSpacing(8)
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.summary_label)
+
+        self.list = QListWidget()
+        self.list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.list.setIconSize(BATCH_ICON_SIZE)
+        self.list.itemSelectionChanged.connect(self._on_selection_changed)
+        self.list.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        layout.addWidget(self.list, stretch=1)
+
+        buttons = QHBoxLayout()
+        self.dismiss_btn = MaterialButton("Dismiss", primary=False)
+        self.dismiss_btn.clicked.connect(self.dismissed)
+        buttons.addWidget(self.dismiss_btn)
+        self.more_btn = MaterialButton("Load More", primary=False)
+        self.more_btn.clicked.connect(self._request_more)
+        self.more_btn.setVisible(False)
+        buttons.addWidget(self.more_btn)
+        buttons.addStretch()
+        self.queue_selected_btn = MaterialButton("Queue Selected", primary=False)
+        self.queue_selected_btn.clicked.connect(lambda: self._request(self.list.selectedItems()))
+        buttons.addWidget(self.queue_selected_btn)
+        self.queue_all_btn = MaterialButton("Queue All")
+        self.queue_all_btn.clicked.connect(self._request_all)
+        buttons.addWidget(self.queue_all_btn)
+        layout.addLayout(buttons)
+
+        self._items = {} # url -> QListWidgetItem
+        self._failed = set()
+        self._resolved = set()
+        self._listed = {} # url -> title, playlist entries known only from the listing
+        self._looking_up = set()
+        self._playlist = None # (title, entry count or None)
+        self._more = False
+        self._loading = False
+        self._thumbnail_items = {} # thumbnail url -> urls of the items showing it
+        self.thumbnails = get_thumbnail_service()
+        self.thumbnails.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+    def add_urls(self, urls):
+        """Adds the URLs not listed yet; returns those."""
+        added = [url for url in urls if url not in self._items]
+        for url in added:
+            self._add_item(url, f"{url}  (looking up...)")
+            self._looking_up.add(url)
+        self._update_summary()
+        return added
+
+    def set_playlist(self, title, count=None):
+        """Switches the panel to listing the entries of playlist `title`."""
+        self._playlist = (title, count)
+        self._update_summary()
+
+    def add_entries(self, entries):
+        """
+        Adds playlist entries (core.playlist.entry_item dicts) by their flat
+        title; their full metadata is looked up once selected.
+        """
+        self._loading = False
+        for entry in entries:
+            url = entry['url']
+            if url in self._items:
+                continue
+            duration = entry.get('duration_string')
+            title = entry.get('title') or url
+            self._add_item(url, f"{entry['index']}. {title}  [{duration}]" if duration else f"{entry['index']}. {title}")
+            self._listed[url] = title
+        self._update_summary()
+
+    def set_more(self, available):
+        """Whether the playlist has entries not listed yet."""
+        self._more = available
+        self._loading = False
+        self.more_btn.setVisible(available)
+        self.more_btn.setEnabled(available)
+        self._update_summary()
+
+    def title(self, url):
+        """The title an entry was listed under, if it came from a playlist."""
+        return self._listed.get(url)
+
+    def set_info(self, url, title, duration, thumbnail=None):
+        item = self._items.get(url)
+        if item is not None:
+            item.setText(f"{title}  [{duration}]" if duration else title)
+            if thumbnail:
+                self._set_thumbnail(url, item, thumbnail)
+            self._resolved.add(url)
+            self._looking_up.discard(url)
+            self._update_summary()
+
+    def set_error(self, url, message):
+        item = self._items.get(url)
+        if item is not None:
+            item.setText(f"{url}  (error: {message})")
+            item.setToolTip(message)
+            item.setForeground(QColor("#B3261E"))
+            self._failed.add(url)
+            self._looking_up.discard(url)
+            self._update_summary()
+
+    def urls(self):
+        return list(self._items)
+
+    def remove_urls(self, urls):
+        for url in urls:
+            item = self._items.pop(url, None)
+            if item is not None:
+                self.list.takeItem(self.list.row(item))
+            self._failed.discard(url)
+            self._resolved.discard(url)
+            self._listed.pop(url, None)
+            self._looking_up.discard(url)
+        self._update_summary()
+
+    def clear(self):
+        self.remove_urls(list(self._items))
+        self._playlist = None
+        self.set_more(False)
+
+    def _add_item(self, url, text):
+        item = QListWidgetItem(text)
+        item.setData(Qt.ItemDataRole.UserRole, url)
+        item.setToolTip(url)
+        self.list.addItem(item)
+        self._items[url] = item
+
+    def _set_thumbnail(self, url, item, thumbnail):
+        size = self._icon_pixels()
+        image = self.thumbnails.load(thumbnail, size)
+        if image is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
+        else:
+            self._thumbnail_items.setdefault(thumbnail, set()).add(url)
+
+    def _icon_pixels(self):
+        return BATCH_ICON_SIZE * self.list.devicePixelRatioF()
+
+    def _on_thumbnail_ready(self, thumbnail, size, image):
+        if size != self._icon_pixels():
+            return
+        for url in self._thumbnail_items.pop(thumbnail, ()):
+            item = self._items.get(url)
+            if item is not None:
+                item.setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def _on_selection_changed(self):
+        # Only what the user picks is worth a full extraction
+        urls = [item.data(Qt.ItemDataRole.UserRole) for item in self.list.selectedItems()]
+        urls = [url for url in urls if url in self._listed
+                and url not in self._resolved and url not in self._failed and url not in self._looking_up]
+        if urls:
+            self._looking_up.update(urls)
+            self.lookup_requested.emit(urls)
+
+    def _on_scrolled(self, value):
+        if value >= self.list.verticalScrollBar().maximum() > 0:
+            self._request_more()
+
+    def _request_more(self):
+        if self._more and not self._loading:
+            self._loading = True
+            self.more_btn.setEnabled(False)
+            self.more_requested.emit()
+
+    def _request(self, items):
+        # Links whose lookup failed would only fail again as downloads
+        urls = [item.data(Qt.ItemDataRole.UserRole) for item in items]
+        urls = [url for url in urls if url not in self._failed]
+        if urls:
+            self.queue_requested.emit(urls)
+
+    def _request_all(self):
+        if self._more:
+            # Announced first, so the owner keeps the playlist open once the listed entries are queued
+            self.queue_rest_requested.emit()
+        self._request([self.list.item(row) for row in range(self.list.count())])
+
+    def _update_summary(self):
+        total = len(self._items)
+        if self._playlist:
+            title, count = self._playlist
+            listed = f"{total} of {count}" if count is not None and self._more else str(total)
+            text = f"{title}: {listed} listed, {len(self._resolved)} resolved"
+        else:
+            text = f"{total} link(s), {len(self._resolved)} resolved"
+        if self._failed:
+            text += f", {len(self._failed)} failed"
+        self.summary_label.setText(text)
@@ -3,26 +3,42 @@ from PyQt6.QtWidgets import (
     QLineEdit, QLabel, QProgressBar, QMessageBox, QApplication,
     QFileDialog, QSizePolicy
 )
-from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer
 from PyQt6.QtGui import QIcon, QAction
 
 from ui.styles import get_stylesheet
-from ui.components import MaterialButton, VideoCard, MaterialComboBox
-from core.downloader import DownloaderThread
-from core.settings import SettingsManager
+from ui.components import MaterialButton, VideoCard, MaterialComboBox, JobListWidget, StatsPanel, BatchPanel
+from core.bandwidth import get_bandwidth_governor
+from core.batch import extract_urls, urls_from_file
+from core.cache import normalize_url
+from core.cookies import get_cookie_jar_cache
+from core.downloader import BatchFetcher, DownloaderThread, DownloadQueue, MetadataPrefetch, PlaylistThread
+from core.engine import start_warm_up
+from core.journal import JobJournal
+from core.metrics import get_metrics_recorder
+from core.settings import SettingsManager, get_app_data_dir
+from core.presets import QUALITY_PRESETS, build_download_opts
+from core.process_pool import get_process_pool
 import sys
 import os
+import threading
+
+# Pause in typing after which the URL field's link is looked up
+PREFETCH_DEBOUNCE_MS = 400
 
 class MainWindow(QMainWindow):
-    request_fetch_info = pyqtSignal(str, str) # Signal to worker (url, browser)
-    request_download_action = pyqtSignal(str, dict, str) # Signal to worker (url, options, browser)
-    request_download_action = pyqtSignal(str, dict, str) # Signal to worker (url, options, browser)
+    request_fetch_info = pyqtSignal(str, str, bool) # Signal to worker (url, browser, use_cache)
+    request_playlist_open = pyqtSignal(str, str) # Signal to playlist loader (url, browser)
+    request_playlist_page = pyqtSignal()
+    request_playlist_close = pyqtSignal()
 
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Media Downloader")
-        self.resize(750, 500)
+        self.resize(750, 680)
         self.setStyleSheet(get_stylesheet())
+        # Links and link lists can be dropped anywhere on the window
+        self.setAcceptDrops(True)
         
         # Settings
         self.settings_manager = SettingsManager()
@@ -47,6 +63,7 @@ class MainWindow(QMainWindow):
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText("Paste Media URL here...")
         self.url_input.returnPressed.connect(self.check_url)
+        self.url_input.textChanged.connect(self.on_url_edited)
         input_layout.addWidget(self.url_input)
         
         # Paste Button
@@ -73,6 +90,16 @@ class MainWindow(QMainWindow):
         # Ensure card is visible but empty initially
         self.video_card.setVisible(False) 
         left_layout.addWidget(self.video_card)
+
+        # Several links at once (pasted or dropped)
+        self.batch_panel = BatchPanel()
+        self.batch_panel.setVisible(False)
+        self.batch_panel.queue_requested.connect(self.queue_batch)
+        self.batch_panel.dismissed.connect(self.dismiss_batch)
+        self.batch_panel.queue_rest_requested.connect(self.queue_playlist_rest)
+        self.batch_panel.lookup_requested.connect(self.lookup_batch)
+        self.batch_panel.more_requested.connect(self.request_playlist_page)
+        left_layout.addWidget(self.batch_panel)
         left_layout.addStretch()
         
         content_layout.addLayout(left_layout, stretch=1)
@@ -85,7 +112,7 @@ class MainWindow(QMainWindow):
         # Quality
         right_layout.addWidget(QLabel("Quality:"))
         self.quality_combo = MaterialComboBox()
-        self.quality_combo.addItems(["Best Quality", "1080p", "720p", "480p", "Audio Only (MP3)"])
+        self.quality_combo.addItems(list(QUALITY_PRESETS))
         right_layout.addWidget(self.quality_combo)
         
         # Cookies
@@ -127,9 +154,9 @@ class MainWindow(QMainWindow):
         btns_layout = QHBoxLayout()
         btns_layout.setSpacing(10)
 
-        self.cancel_btn = MaterialButton("Cancel", primary=False)
+        self.cancel_btn = MaterialButton("Cancel All", primary=False)
         self.cancel_btn.setEnabled(False)
-        self.cancel_btn.clicked.connect(self.cancel_download)
+        self.cancel_btn.clicked.connect(self.cancel_all_downloads)
         btns_layout.addWidget(self.cancel_btn)
 
         self.download_btn = MaterialButton("Download")
@@ -142,52 +169,192 @@ class MainWindow(QMainWindow):
         content_layout.addLayout(right_layout, stretch=1)
         self.main_layout.addLayout(content_layout)
 
-        # Logic / Thread
-        self.downloader_thread = DownloaderThread()
+        # === Download Queue ===
+        queue_header = QHBoxLayout()
+        queue_header.addWidget(QLabel("Downloads:"))
+        queue_header.addStretch()
+        self.stats_btn = MaterialButton("Stats", primary=False)
+        self.stats_btn.setCheckable(True)
+        self.stats_btn.toggled.connect(self.toggle_stats_panel)
+        queue_header.addWidget(self.stats_btn)
+        self.clear_finished_btn = MaterialButton("Clear Finished", primary=False)
+        self.clear_finished_btn.clicked.connect(self.clear_finished_jobs)
+        queue_header.addWidget(self.clear_finished_btn)
+        self.main_layout.addLayout(queue_header)
+
+        self.stats_panel = StatsPanel(get_metrics_recorder())
+        self.stats_panel.setVisible(False)
+        self.main_layout.addWidget(self.stats_panel)
+
+        self.job_list = JobListWidget()
+        self.job_list.cancel_requested.connect(self.cancel_job)
+        self.main_layout.addWidget(self.job_list, stretch=1)
+
+        # Optionally, yt-dlp runs in worker processes (several cores, killable)
+        self.process_pool = None
+        fetch_info = None
+        if self.settings_manager.get_process_isolation_enabled():
+            self.process_pool = get_process_pool()
+            self.process_pool.configure(
+                self.settings_manager.get_worker_processes()
+                or self.settings_manager.get_max_concurrent_downloads() + 2)
+            fetch_info = self.process_pool.fetch_info
+
+        # Logic / Thread (metadata lookups)
+        self.downloader_thread = DownloaderThread(self.process_pool)
         self.worker = self.downloader_thread.worker
         
         # Wiring Signals (GUI -> Worker)
         self.request_fetch_info.connect(self.worker.fetch_info)
-        self.request_download_action.connect(self.worker.download)
         
         # Wiring Signals (Worker -> GUI)
         self.worker.info_ready.connect(self.on_info_ready)
-        self.worker.progress.connect(self.on_progress)
-        self.worker.finished.connect(self.on_finished)
         self.worker.error_occurred.connect(self.on_error)
-        
-        self.downloader_thread.start()
+        # The thread is started in finish_startup(); requests made before
+        # that are queued and handled once its event loop runs.
+
+        # Metadata of batches, resolved a few at a time
+        self.batch_fetcher = BatchFetcher(max_workers=self.settings_manager.get_metadata_workers(),
+                                          fetch_info=fetch_info)
+        self.batch_fetcher.item_ready.connect(self.on_batch_item_ready)
+        self.batch_fetcher.item_failed.connect(self.on_batch_item_failed)
+        self.batch_infos = {}
+
+        # Playlists and channels, listed a page at a time on their own thread
+        self.playlist_thread = PlaylistThread()
+        self.playlist_loader = self.playlist_thread.loader
+        self.request_playlist_open.connect(self.playlist_loader.open)
+        self.request_playlist_page.connect(self.playlist_loader.next_page)
+        self.request_playlist_close.connect(self.playlist_loader.close)
+        self.playlist_loader.opened.connect(self.on_playlist_opened)
+        self.playlist_loader.page_ready.connect(self.on_playlist_page)
+        self.playlist_loader.error_occurred.connect(self.on_playlist_error)
+        self.playlist_url = None
+        self.queue_playlist_remaining = False
+
+        # Metadata looked up while the user is still typing or copying a link
+        self.prefetch = MetadataPrefetch(fetch_info, parent=self)
+        self.prefetch.ready.connect(self.on_prefetch_ready)
+        self.prefetch.failed.connect(self.on_prefetch_failed)
+        self.prefetch.skipped.connect(self.on_prefetch_skipped)
+        self.awaited_prefetch = None # Normalized URL check_url() is waiting on
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_DEBOUNCE_MS)
+        self.prefetch_timer.timeout.connect(lambda: self.start_prefetch(self.url_input.text()))
+        QApplication.clipboard().dataChanged.connect(self.on_clipboard_changed)
+
+        # Per-job phase timings, logged next to the other app data
+        if self.settings_manager.get_metrics_enabled():
+            data_dir = get_app_data_dir()
+            get_metrics_recorder().configure(data_dir / "metrics.jsonl", data_dir / "metrics.prom")
+
+        # Download queue (worker pool)
+        get_bandwidth_governor().configure(
+            global_rate=self.settings_manager.get_bandwidth_limit(),
+            host_rates=self.settings_manager.get_host_bandwidth_limits(),
+            schedule=self.settings_manager.get_bandwidth_schedule(),
+        )
+        self.download_queue = DownloadQueue(
+            max_workers=self.settings_manager.get_max_concurrent_downloads(),
+            per_host_limit=self.settings_manager.get_per_host_limit(),
+            use_archive=self.settings_manager.get_archive_enabled(),
+            journal=JobJournal(),
+            parallel_fragments=self.settings_manager.get_parallel_fragments_enabled(),
+            max_fragment_connections=self.settings_manager.get_max_fragment_connections(),
+            pooled_post_processing=self.settings_manager.get_background_post_processing_enabled(),
+            process_pool=self.process_pool,
+            check_disk_space=self.settings_manager.get_disk_space_check_enabled(),
+        )
+        self.download_queue.job_started.connect(self.on_job_started)
+        self.download_queue.job_processing.connect(self.on_job_processing)
+        self.download_queue.progress_updated.connect(self.on_progress)
+        self.download_queue.job_finished.connect(self.on_finished)
+        self.download_queue.job_skipped.connect(self.on_job_skipped)
+        self.download_queue.job_stats.connect(self.on_job_stats)
+        self.download_queue.job_error.connect(self.on_job_error)
+        self.download_queue.job_cancelled.connect(self.on_job_cancelled)
+        self.download_queue.idle.connect(self.on_queue_idle)
         
         self.current_url = ""
+        self.current_title = ""
+        self.current_info = None
         self._is_closing = False
+        self._startup_finished = False
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._startup_finished:
+            # First frame is on screen, now do the slow part
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Deferred initialization that is not needed to paint the window."""
+        if self._startup_finished:
+            return
+        self._startup_finished = True
+        self.downloader_thread.start()
+        self.playlist_thread.start()
+        # Import yt_dlp and load its extractors in the background
+        start_warm_up()
+        if self.process_pool is not None:
+            threading.Thread(target=self.process_pool.prewarm, name="WorkerPrewarm", daemon=True).start()
+        browser = self.browser_combo.currentText()
+        if browser != "None":
+            get_cookie_jar_cache().preload(browser)
+        # Pick up downloads interrupted by the last shutdown or a crash
+        for job_id, title in self.download_queue.resume_interrupted():
+            item = self.job_list.add_job(job_id, title)
+            item.set_status("Resuming...")
+        self.update_queue_status()
 
     def closeEvent(self, event):
-        if self.cancel_btn.isEnabled():
-            # active download
+        if self.download_queue.active_count() > 0:
+            # Active downloads: stop them but keep partial files, they are
+            # resumed from the journal on the next launch
             self._is_closing = True
-            self.status_label.setText("Cleaning up...")
-            self.cancel_download()
+            self.status_label.setText("Saving queue...")
+            self.download_queue.suspend_all()
             event.ignore()
         else:
+            self.batch_fetcher.shutdown(wait=False)
+            self.prefetch.shutdown(wait=False)
+            self.download_queue.shutdown(wait=False)
+            if self.process_pool is not None:
+                self.process_pool.shutdown()
             self.downloader_thread.quit()
+            self.playlist_thread.quit()
             event.accept()
 
     def on_browser_changed(self, text):
         self.settings_manager.set_cookies_browser(text)
+        # Only the selected browser's cookies are kept, loaded ahead of the next request
+        cookie_cache = get_cookie_jar_cache()
+        cookie_cache.invalidate()
+        if text != "None":
+            cookie_cache.preload(text)
+
+    def update_cookie_stats(self):
+        stats = get_cookie_jar_cache().stats()
+        if not stats['loads']:
+            self.browser_combo.setToolTip("")
+            return
+        self.browser_combo.setToolTip(
+            f"Cookies loaded {stats['loads']} time(s), last load took {stats['last_load_seconds']:.2f} s\n"
+            f"{stats['hits']} of {stats['lookups']} lookups served from memory, "
+            f"average lookup {stats['avg_lookup_ms']:.1f} ms"
+        )
 
     def reset_app_state(self):
+        self.dismiss_batch()
+        self.awaited_prefetch = None
         self.url_input.clear()
         self.current_url = ""
+        self.current_info = None
         self.video_card.setVisible(False)
         self.status_label.setText("Ready")
         self.progress_bar.setVisible(False)
         self.download_btn.setEnabled(False)
-        
-        # Re-enable inputs
-        self.url_input.setEnabled(True)
-        self.change_loc_btn.setEnabled(True)
-        self.quality_combo.setEnabled(True)
-        self.browser_combo.setEnabled(True)
 
     def get_short_path(self, path):
         if len(path) > 30:
@@ -203,27 +370,93 @@ class MainWindow(QMainWindow):
 
     def paste_from_clipboard(self):
         clipboard = QApplication.clipboard()
-        self.url_input.setText(clipboard.text())
+        text = clipboard.text()
+        urls = extract_urls(text)
+        if len(urls) > 1:
+            self.add_batch(urls)
+            return
+        self.url_input.setText(text)
         self.check_url()
 
     def check_url(self):
         url = self.url_input.text().strip()
         if not url:
             return
+        urls = extract_urls(url)
+        if len(urls) > 1:
+            self.url_input.clear()
+            self.add_batch(urls)
+            return
         
+        self.prefetch_timer.stop()
+        self.awaited_prefetch = None
+        browser = self.browser_combo.currentText()
+        # Shift+Enter skips the metadata cache and forces a fresh lookup
+        bypass = bool(QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier)
+        if not bypass:
+            info = self.prefetch.take(url, browser)
+            if info is not None:
+                self.on_info_ready(info)
+                return
+
         self.status_label.setText("Fetching video info...")
         self.download_btn.setEnabled(False)
         self.video_card.setVisible(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0) # Indeterminate
-        
-        browser = self.browser_combo.currentText()
-        self.request_fetch_info.emit(url, browser)
+
+        if not bypass and self.prefetch.is_pending(url, browser):
+            self.awaited_prefetch = normalize_url(url) # Reported by on_prefetch_*
+            return
+        use_cache = self.settings_manager.get_metadata_cache_enabled() and not bypass
+        self.request_fetch_info.emit(url, browser, use_cache)
+
+    def on_url_edited(self, text):
+        if self.settings_manager.get_prefetch_enabled():
+            # Restarted on every keystroke: looked up once typing pauses
+            self.prefetch_timer.start()
+
+    def on_clipboard_changed(self):
+        if self.settings_manager.get_clipboard_watch_enabled():
+            urls = extract_urls(QApplication.clipboard().text())
+            if len(urls) == 1:
+                self.start_prefetch(urls[0])
+
+    def start_prefetch(self, text):
+        urls = extract_urls(text)
+        if len(urls) == 1 and urls[0] == text.strip():
+            use_cache = self.settings_manager.get_metadata_cache_enabled()
+            self.prefetch.prefetch(urls[0], self.browser_combo.currentText(), use_cache)
+
+    def _is_awaited(self, url):
+        if self.awaited_prefetch is None or normalize_url(url) != self.awaited_prefetch:
+            return False
+        self.awaited_prefetch = None
+        return True
+
+    @pyqtSlot(str, dict)
+    def on_prefetch_ready(self, url, info):
+        if self._is_awaited(url):
+            self.on_info_ready(self.prefetch.take(url, self.browser_combo.currentText()) or info)
+
+    @pyqtSlot(str, str)
+    def on_prefetch_failed(self, url, err_msg):
+        if self._is_awaited(url):
+            self.on_error(err_msg)
+
+    @pyqtSlot(str)
+    def on_prefetch_skipped(self, url):
+        if self._is_awaited(url):
+            use_cache = self.settings_manager.get_metadata_cache_enabled()
+            self.request_fetch_info.emit(url, self.browser_combo.currentText(), use_cache)
 
     @pyqtSlot(dict)
     def on_info_ready(self, info):
         self.progress_bar.setVisible(False)
         self.progress_bar.setRange(0, 100)
+        if info.get('_type') == 'playlist':
+            self.open_playlist(info)
+            return
         self.status_label.setText("Ready to download")
         
         title = info.get('title', 'Unknown Title')
@@ -232,101 +465,287 @@ class MainWindow(QMainWindow):
         
         self.video_card.set_data(title, duration, thumb)
         self.current_url = info.get('original_url') or info.get('webpage_url')
+        self.current_title = title
+        self.current_info = info
         self.download_btn.setEnabled(True)
-        self.cancel_btn.setEnabled(False)
+        self.update_cookie_stats()
+
+    def dragEnterEvent(self, event):
+        mime = event.mimeData()
+        if mime.hasUrls() or mime.hasText():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        mime = event.mimeData()
+        urls = []
+        for dropped in mime.urls():
+            if dropped.isLocalFile():
+                try:
+                    urls += urls_from_file(dropped.toLocalFile())
+                except OSError:
+                    pass
+            elif dropped.scheme() in ('http', 'https'):
+                urls.append(dropped.toString())
+        if not urls and mime.hasText():
+            urls = extract_urls(mime.text())
+        urls = extract_urls("\n".join(urls))
+        if len(urls) == 1:
+            self.url_input.setText(urls[0])
+            self.check_url()
+        elif urls:
+            self.add_batch(urls)
+        event.acceptProposedAction()
+
+    def add_batch(self, urls):
+        """Lists `urls` in the batch panel and resolves their metadata concurrently."""
+        if self.playlist_url:
+            self.dismiss_batch() # A playlist listing and loose links don't mix
+        added = self.batch_panel.add_urls(urls)
+        self.video_card.setVisible(False)
+        self.download_btn.setEnabled(False)
+        self.batch_panel.setVisible(True)
+        if added:
+            self.lookup_batch(added)
+            self.status_label.setText(f"Looking up {len(added)} link(s)...")
+
+    def lookup_batch(self, urls):
+        use_cache = self.settings_manager.get_metadata_cache_enabled()
+        self.batch_fetcher.fetch(urls, self.browser_combo.currentText(), use_cache)
+
+    def open_playlist(self, info):
+        """Lists the entries of the playlist or channel fetch_info() reported, a page at a time."""
+        self.dismiss_batch()
+        self.current_url = ""
+        self.current_info = None
+        self.video_card.setVisible(False)
+        self.download_btn.setEnabled(False)
+        self.playlist_url = info.get('original_url') or info.get('webpage_url')
+        self.batch_panel.set_playlist(info.get('title') or self.playlist_url, info.get('playlist_count'))
+        self.batch_panel.setVisible(True)
+        self.status_label.setText("Listing playlist...")
+        self.request_playlist_open.emit(self.playlist_url, self.browser_combo.currentText())
+
+    @pyqtSlot(str, dict)
+    def on_playlist_opened(self, url, summary):
+        if url == self.playlist_url:
+            self.batch_panel.set_playlist(summary.get('title') or url, summary.get('playlist_count'))
+
+    @pyqtSlot(str, list, bool)
+    def on_playlist_page(self, url, items, more):
+        if url != self.playlist_url:
+            return # Dismissed meanwhile
+        if self.queue_playlist_remaining:
+            # Queue All: the rest goes straight to the queue, never listed
+            self.queue_entries([(item['url'], item.get('title'), None) for item in items])
+            if more:
+                self.status_label.setText(f"Queueing playlist... {len(items)} more added")
+                self.request_playlist_page.emit()
+            else:
+                self.queue_playlist_remaining = False
+                self.status_label.setText("Playlist queued")
+                if not self.batch_panel.urls():
+                    self.dismiss_batch()
+            return
+        self.batch_panel.add_entries(items)
+        self.batch_panel.set_more(more)
+        self.status_label.setText("Select entries to download, or queue them all")
 
-    def cancel_download(self):
+    @pyqtSlot(str, str)
+    def on_playlist_error(self, url, err_msg):
+        if url != self.playlist_url:
+            return
+        self.queue_playlist_remaining = False
+        self.batch_panel.set_more(False)
+        self.status_label.setText(f"Error: {err_msg}")
+
+    def queue_playlist_rest(self):
+        """Queue All on a playlist still being listed: queues its remaining pages as they arrive."""
+        self.queue_playlist_remaining = True
+        self.batch_panel.set_more(False)
+        self.status_label.setText("Queueing playlist...")
+        self.request_playlist_page.emit()
+
+    @pyqtSlot(str, dict)
+    def on_batch_item_ready(self, url, info):
+        if url not in self.batch_panel.urls():
+            return # Dismissed or queued meanwhile
+        self.batch_infos[url] = info
+        self.batch_panel.set_info(url, info.get('title', url), info.get('duration_string'), info.get('thumbnail'))
+        self.update_cookie_stats()
+
+    @pyqtSlot(str, str)
+    def on_batch_item_failed(self, url, err_msg):
+        self.batch_panel.set_error(url, err_msg)
+
+    def queue_batch(self, urls):
+        self.queue_entries([(url, self.batch_panel.title(url), self.batch_infos.pop(url, None)) for url in urls])
+        self.batch_panel.remove_urls(urls)
+        if not self.batch_panel.urls() and not self.queue_playlist_remaining:
+            self.dismiss_batch()
+
+    def queue_entries(self, entries):
+        """Queues (url, title or None, info or None) entries with the selected quality."""
+        selection = self.quality_combo.currentText()
+        opts = build_download_opts(selection, self.settings_manager.get_download_path(),
+                                   self.settings_manager.get_segmented_connections(),
+                                   self.settings_manager.get_preallocate_enabled())
+        browser = self.browser_combo.currentText()
+        for url, title, info in entries:
+            # Links not looked up (yet) are extracted by the download itself
+            title = (info or {}).get('title') or title or url
+            job_id = self.download_queue.add(url, dict(opts), browser, title=title, info=info)
+            self.job_list.add_job(job_id, title)
+        self.update_queue_status()
+
+    def dismiss_batch(self):
+        if self.playlist_url:
+            self.playlist_url = None
+            self.queue_playlist_remaining = False
+            self.request_playlist_close.emit()
+        self.batch_fetcher.cancel()
+        self.batch_panel.clear()
+        self.batch_infos.clear()
+        self.batch_panel.setVisible(False)
+
+    def cancel_job(self, job_id):
+        item = self.job_list.item(job_id)
+        if item:
+            item.set_status("Cancelling...")
+            item.cancel_btn.setEnabled(False)
+        self.download_queue.cancel(job_id)
+
+    def cancel_all_downloads(self):
         self.status_label.setText("Cancelling...")
         self.cancel_btn.setEnabled(False)
-        self.worker.trigger_cancel()
+        self.download_queue.cancel_all()
+
+    def toggle_stats_panel(self, visible):
+        self.stats_panel.setVisible(visible)
+
+    def clear_finished_jobs(self):
+        self.job_list.clear_finished()
+
+    def update_queue_status(self):
+        active = self.download_queue.active_count()
+        self.cancel_btn.setEnabled(active > 0)
+        if active:
+            self.status_label.setText(f"{active} download(s) in queue")
 
     def start_download(self):
         if self.current_url:
-            self.download_btn.setEnabled(False)
-            self.cancel_btn.setEnabled(True)
-            self.url_input.setEnabled(False)
-            self.change_loc_btn.setEnabled(False)
-            self.quality_combo.setEnabled(False)
-            self.status_label.setText("Starting download...")
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            
             # Prepare options with current download path and quality
-            quality_map = {
-                "Best Quality": {}, # Default behavior
-                "1080p": {'format': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]'},
-                "720p": {'format': 'bestvideo[height<=720]+bestaudio/best[height<=720]'},
-                "480p": {'format': 'bestvideo[height<=480]+bestaudio/best[height<=480]'},
-                "Audio Only (MP3)": {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                }
-            }
-            
             selection = self.quality_combo.currentText()
-            opts = {
-                'paths': {'home': self.settings_manager.get_download_path()}
-            }
-            opts.update(quality_map.get(selection, {}))
-            
-            opts.update(quality_map.get(selection, {}))
+            opts = build_download_opts(selection, self.settings_manager.get_download_path(),
+                                       self.settings_manager.get_segmented_connections(),
+                                       self.settings_manager.get_preallocate_enabled())
             
             browser = self.browser_combo.currentText()
-            self.request_download_action.emit(self.current_url, opts, browser)
+            title = self.current_title or self.current_url
+            job_id = self.download_queue.add(self.current_url, opts, browser, title=title, info=self.current_info)
+            self.job_list.add_job(job_id, title)
+
+            # Inputs stay usable so the next URL can be queued right away
+            self.download_btn.setEnabled(False)
+            self.update_queue_status()
+
+    @pyqtSlot(int)
+    def on_job_started(self, job_id):
+        item = self.job_list.item(job_id)
+        if item:
+            item.set_status("Starting download...")
+        self.update_queue_status()
+
+    @pyqtSlot(int)
+    def on_job_processing(self, job_id):
+        item = self.job_list.item(job_id)
+        if item:
+            item.set_progress(100)
+            item.set_status("Processing...")
+        self.update_queue_status()
 
     @pyqtSlot(dict)
-    def on_progress(self, data):
-        status = data.get('status')
-        if status == 'downloading':
-            try:
-                percent = float(data.get('percent', 0))
-                self.progress_bar.setValue(int(percent))
-                self.status_label.setText(f"Downloading: {percent:.1f}%")
-            except:
-                pass
-        elif status == 'finished':
-            # Store filename but don't update text yet to prevent expansion glitch
-            self.last_filename = data.get('filename', 'Unknown')
-            self.progress_bar.setValue(100)
+    def on_progress(self, states):
+        for job_id, data in states.items():
+            item = self.job_list.item(job_id)
+            if item is None:
+                continue
+            status = data.get('status')
+            if status == 'downloading':
+                percent = data.get('percent', 0.0)
+                item.set_progress(percent)
+                text = f"Downloading: {percent:.1f}%{self.format_speed_eta(data)}"
+                if data.get('fragment_parallelism'):
+                    text += f" ({data['fragment_parallelism']} fragments at once)"
+                item.set_status(text)
+            elif status == 'finished':
+                item.set_progress(100)
+
+    def format_speed_eta(self, data):
+        speed = data.get('speed') or 0
+        if speed <= 0:
+            return ""
+        text = f" at {speed / (1024 * 1024):.2f} MiB/s"
+        eta = data.get('eta')
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            text += f", {minutes:02d}:{seconds:02d} left"
+        return text
+
+    @pyqtSlot(int, str)
+    def on_finished(self, job_id, filename):
+        item = self.job_list.item(job_id)
+        if item:
+            # Format the filename to be just the basename if it's a full path
+            item.set_done(f"Downloaded : {os.path.basename(filename) or 'Unknown'}", success=True)
+        self.update_queue_status()
+
+    @pyqtSlot(int, list)
+    def on_job_stats(self, job_id, stats):
+        item = self.job_list.item(job_id)
+        if item:
+            lines = []
+            for run in stats:
+                line = f"Format {run['format_id']}: {run['fragments']} fragments, {run['parallelism']} at once"
+                if run['speedup']:
+                    line += f", {run['speedup']:.1f}x faster than one by one"
+                lines.append(line)
+            item.status_label.setToolTip("\n".join(lines))
+
+    @pyqtSlot(int, str)
+    def on_job_skipped(self, job_id, filename):
+        item = self.job_list.item(job_id)
+        if item:
+            # Entries imported from a yt-dlp archive have no known file
+            item.set_done(f"Already downloaded : {os.path.basename(filename)}" if filename else "Already downloaded",
+                          success=True)
+            item.status_label.setToolTip(filename)
+        self.update_queue_status()
+
+    @pyqtSlot(int, str)
+    def on_job_error(self, job_id, err_msg):
+        item = self.job_list.item(job_id)
+        if item:
+            item.set_done(f"Error: {err_msg}")
+            item.status_label.setToolTip(err_msg)
+        self.update_queue_status()
+
+    @pyqtSlot(int)
+    def on_job_cancelled(self, job_id):
+        item = self.job_list.item(job_id)
+        if item:
+            item.set_done("Cancelled")
+        self.update_queue_status()
 
     @pyqtSlot()
-    def on_finished(self):
+    def on_queue_idle(self):
         if self._is_closing:
             self.close()
             return
-            
-        filename = getattr(self, 'last_filename', 'Unknown')
-        # Format the filename to be just the basename if it's a full path
-        if os.path.sep in filename:
-            filename = os.path.basename(filename)
-            
-        self.status_label.setText(f"Downloaded : {filename}")
-        self.progress_bar.setValue(100)
-        self.progress_bar.setValue(100)
-        self.download_btn.setEnabled(True)
+        self.status_label.setText("All downloads complete")
         self.cancel_btn.setEnabled(False)
-        self.url_input.setEnabled(True)
-        self.change_loc_btn.setEnabled(True)
-        self.quality_combo.setEnabled(True)
-        QMessageBox.information(self, "Success", "Video downloaded successfully!")
 
     @pyqtSlot(str)
     def on_error(self, err_msg):
-        if self._is_closing:
-            self.close()
-            return
-
-        self.status_label.setText("Error occurred")
-        self.progress_bar.setVisible(False)
         self.status_label.setText("Error occurred")
         self.progress_bar.setVisible(False)
-        self.download_btn.setEnabled(True)
-        self.cancel_btn.setEnabled(False)
-        self.url_input.setEnabled(True)
-        self.change_loc_btn.setEnabled(True)
-        self.quality_combo.setEnabled(True)
         QMessageBox.critical(self, "Error", f"An error occurred:\n{err_msg}")
@@ -0,0 +1,154 @@
+import collections
+import threading
+
+from PyQt6.QtCore import (
+    QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QRect, QSize, QUrl,
+    Qt, pyqtSignal
+)
+from PyQt6.QtGui import QImage, QImageReader
+from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkDiskCache, QNetworkRequest
+
+from core.settings import get_app_data_dir
+
+# Decoded, downscaled thumbnails kept in memory (about 56 KiB each at 160x90)
+MEMORY_ITEMS = 128
+DISK_CACHE_BYTES = 50 * 1024 * 1024
+
+
+def decode_thumbnail(data, size):
+    """
+    Decodes image bytes straight to `size` (a QSize), scaled to cover it and
+    centre-cropped. Returns a null QImage if the data is not an image.
+    Safe to call off the GUI thread.
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    source = reader.size()
+    if source.isValid() and not source.isEmpty():
+        # JPEG can decode at the reduced size directly, skipping the full-size image
+        scaled = source.scaled(size, Qt.AspectRatioMode.KeepAspectRatioByExpanding)
+        reader.setScaledSize(scaled)
+        reader.setScaledClipRect(QRect(
+            (scaled.width() - size.width()) // 2, (scaled.height() - size.height()) // 2,
+            size.width(), size.height()))
+    image = reader.read()
+    if not image.isNull() and image.size() != size:
+        # Handlers that ignore the scaled size/clip options
+        image = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                             Qt.TransformationMode.SmoothTransformation)
+        image = image.copy((image.width() - size.width()) // 2, (image.height() - size.height()) // 2,
+                           size.width(), size.height())
+    return image
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, service, url, size, data):
+        super().__init__()
+        self.service = service
+        self.url = url
+        self.size = size
+        self.data = data
+
+    def run(self):
+        # Queued to the service's thread
+        self.service._decoded.emit(self.url, self.size, decode_thumbnail(self.data, self.size))
+
+
+class ThumbnailService(QObject):
+    """
+    Shared source of thumbnails for the UI.
+
+    Images are fetched through one QNetworkAccessManager backed by a
+    QNetworkDiskCache, so a thumbnail seen before is revalidated with its
+    ETag/Last-Modified rather than downloaded again. The bytes are decoded
+    and downscaled to the size asked for on a QThreadPool, and the results
+    kept in a bounded in-memory LRU. Lives on the GUI thread.
+    """
+    thumbnail_ready = pyqtSignal(str, QSize, QImage) # url, requested size, image
+    thumbnail_failed = pyqtSignal(str) # url
+    _decoded = pyqtSignal(str, QSize, QImage)
+
+    def __init__(self, cache_dir=None, parent=None):
+        super().__init__(parent)
+        self.network_manager = QNetworkAccessManager(self)
+        disk_cache = QNetworkDiskCache(self)
+        disk_cache.setCacheDirectory(str(cache_dir or get_app_data_dir() / "thumbnails"))
+        disk_cache.setMaximumCacheSize(DISK_CACHE_BYTES)
+        self.network_manager.setCache(disk_cache)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self._images = collections.OrderedDict() # (url, width, height) -> QImage
+        self._fetching = {} # url -> sizes waiting for it
+        self._decoding = set() # (url, width, height)
+        self._decoded.connect(self._on_decoded)
+
+    @staticmethod
+    def _key(url, size):
+        return url, size.width(), size.height()
+
+    def load(self, url, size):
+        """
+        The thumbnail at `url` scaled to `size`, if in memory; otherwise None,
+        and thumbnail_ready or thumbnail_failed follows.
+        """
+        key = self._key(url, size)
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+        if key in self._decoding:
+            return None
+        waiting = self._fetching.get(url)
+        if waiting is not None:
+            if all(self._key(url, s) != key for s in waiting):
+                waiting.append(size)
+            return None
+        self._fetching[url] = [size]
+        request = QNetworkRequest(QUrl(url))
+        # Cached copies are used when fresh and revalidated when stale
+        request.setAttribute(QNetworkRequest.Attribute.CacheLoadControlAttribute,
+                             QNetworkRequest.CacheLoadControl.PreferNetwork)
+        request.setAttribute(QNetworkRequest.Attribute.RedirectPolicyAttribute,
+                             QNetworkRequest.RedirectPolicy.NoLessSafeRedirectPolicy)
+        reply = self.network_manager.get(request)
+        reply.finished.connect(lambda: self._on_reply(reply, url))
+        return None
+
+    def cached(self, url, size):
+        """The in-memory thumbnail, without fetching anything."""
+        return self._images.get(self._key(url, size))
+
+    def _on_reply(self, reply, url):
+        reply.deleteLater()
+        sizes = self._fetching.pop(url, [])
+        if reply.error() != reply.NetworkError.NoError:
+            self.thumbnail_failed.emit(url)
+            return
+        data = bytes(reply.readAll())
+        for size in sizes:
+            self._decoding.add(self._key(url, size))
+            self.pool.start(_DecodeTask(self, url, size, data))
+
+    def _on_decoded(self, url, size, image):
+        self._decoding.discard(self._key(url, size))
+        if image.isNull():
+            self.thumbnail_failed.emit(url)
+            return
+        self._images[self._key(url, size)] = image
+        while len(self._images) > MEMORY_ITEMS:
+            self._images.popitem(last=False)
+        self.thumbnail_ready.emit(url, size, image)
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+def get_thumbnail_service():
+    """Process-wide ThumbnailService (create it from the GUI thread)."""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = ThumbnailService()
+        return _shared_service